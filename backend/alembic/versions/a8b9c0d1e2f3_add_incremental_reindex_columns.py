@@ -0,0 +1,58 @@
+"""add chunk content hashes and cached curriculum summaries
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-17
+
+Incremental reindex (DocumentService._index_chunks): a reindex now diffs the
+new chunk set against the stored one by `content_hash` and only embeds what
+changed, keeping rows whose content and `embedding_model` still match. The
+vision/enrichment summary is kept on the document with the hash of its
+inputs, so an unchanged first few pages skip the LLM call too.
+
+Existing chunks are hashed here. Their embedding model is not recorded
+anywhere, so it is backfilled with the currently configured one — the
+provider/model has to be fixed for the lifetime of an index anyway (mixed
+vector spaces would already break retrieval). `ingestion_jobs.result` holds
+the reused/recomputed counts shown to the admin.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+
+revision: str = 'a8b9c0d1e2f3'
+down_revision: Union[str, None] = 'f7a8b9c0d1e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('document_chunks', sa.Column('embedding_model', sa.String(length=200), nullable=True))
+    op.add_column('documents', sa.Column('curriculum_summary', sa.Text(), nullable=True))
+    op.add_column('documents', sa.Column('curriculum_summary_key', sa.String(length=64), nullable=True))
+    op.add_column('ingestion_jobs', sa.Column('result', postgresql.JSONB(), nullable=True))
+
+    model = (
+        settings.openai_embedding_model if settings.embedding_provider == "openai"
+        else settings.ollama_embedding_model
+    )
+    op.execute(
+        sa.text("""
+            UPDATE document_chunks
+            SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex'),
+                embedding_model = CASE WHEN embedding IS NOT NULL THEN :model END
+        """).bindparams(model=model)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('ingestion_jobs', 'result')
+    op.drop_column('documents', 'curriculum_summary_key')
+    op.drop_column('documents', 'curriculum_summary')
+    op.drop_column('document_chunks', 'embedding_model')
+    op.drop_column('document_chunks', 'content_hash')
@@ -0,0 +1,47 @@
+"""add embedding_store table
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-10-17
+
+Persistent, content-addressed embeddings (see app/services/embedding_store.py):
+both providers look vectors up here by (model, sha256(text)) before calling
+out, so a restart or re-upload no longer re-embeds the corpus. The vector
+column has no fixed dimension — chunk and answer-cache models share it.
+
+Seeded from the chunks already embedded: their `content_hash` is the same
+digest, so the current corpus is covered from the first restart on.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import pgvector.sqlalchemy
+import sqlalchemy as sa
+
+revision: str = 'b9c0d1e2f3a4'
+down_revision: Union[str, None] = 'a8b9c0d1e2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'embedding_store',
+        sa.Column('model', sa.String(length=200), primary_key=True),
+        sa.Column('text_hash', sa.String(length=64), primary_key=True),
+        sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    op.execute("""
+        INSERT INTO embedding_store (model, text_hash, embedding)
+        SELECT DISTINCT ON (embedding_model, content_hash) embedding_model, content_hash, embedding
+        FROM document_chunks
+        WHERE embedding IS NOT NULL AND content_hash IS NOT NULL AND embedding_model IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('embedding_store')
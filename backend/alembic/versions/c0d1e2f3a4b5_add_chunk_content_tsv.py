@@ -0,0 +1,57 @@
+"""add stored, weighted content_tsv to document_chunks
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-17
+
+idx_dc_content_fts (f6a7b8c9d0e1) let the keyword search *match* without a
+scan, but its `ORDER BY ts_rank_cd(to_tsvector('spanish', content), ...)`
+still re-tokenized every matching chunk on every query. The tsvector is now
+stored once per chunk and the GIN index moves to it.
+
+Weighted: document title A, sheet/slide header B, content D — so a query
+naming the document or the sheet ranks its chunks first. A GENERATED column
+can't read documents.title, so ingestion fills it instead
+(DocumentService._index_chunks); this backfills the existing corpus with the
+same expression.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'c0d1e2f3a4b5'
+down_revision: Union[str, None] = 'b9c0d1e2f3a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_chunks', sa.Column('content_tsv', postgresql.TSVECTOR(), nullable=True))
+    op.execute("""
+        UPDATE document_chunks dc
+        SET content_tsv =
+            setweight(to_tsvector('spanish', coalesce(d.title, '')), 'A')
+            || setweight(to_tsvector('spanish', coalesce(
+                   substring(dc.content FROM '^=== (?:HOJA: )?([^=]+) ==='), '')), 'B')
+            || setweight(to_tsvector('spanish', dc.content), 'D')
+        FROM documents d
+        WHERE d.id = dc.document_id
+    """)
+    op.execute("DROP INDEX IF EXISTS idx_dc_content_fts")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_dc_content_tsv
+        ON document_chunks
+        USING gin (content_tsv)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_dc_content_tsv")
+    op.drop_column('document_chunks', 'content_tsv')
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_dc_content_fts
+        ON document_chunks
+        USING gin (to_tsvector('spanish', content))
+    """)
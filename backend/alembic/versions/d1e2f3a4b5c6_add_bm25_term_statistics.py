@@ -0,0 +1,70 @@
+"""add BM25 term frequencies to chunks and the corpus_terms table
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-17
+
+RAGService._rerank scored lexical overlap by re-tokenizing every
+candidate's content with two regex passes per query, and the score (share of
+query tokens present) wasn't comparable across chunks. It now uses BM25
+(app/utils/bm25.py): each chunk stores its term frequencies and term count,
+and `corpus_terms` holds each term's document frequency, maintained
+incrementally by ingestion and deletion (app/services/corpus_stats.py).
+
+Existing chunks are tokenized here with the same tokenizer ingestion uses,
+in batches, then `corpus_terms` is aggregated from the result.
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.bm25 import term_frequencies
+
+revision: str = 'd1e2f3a4b5c6'
+down_revision: Union[str, None] = 'c0d1e2f3a4b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 2000
+
+
+def upgrade() -> None:
+    op.add_column('document_chunks', sa.Column('term_freqs', postgresql.JSONB(), nullable=True))
+    op.add_column('document_chunks', sa.Column('term_count', sa.Integer(), nullable=True))
+    op.create_table(
+        'corpus_terms',
+        sa.Column('term', sa.Text(), primary_key=True),
+        sa.Column('df', sa.Integer(), nullable=False),
+    )
+
+    bind = op.get_bind()
+    update = sa.text(
+        "UPDATE document_chunks SET term_freqs = CAST(:tf AS jsonb), term_count = :n WHERE id = :id"
+    )
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, content FROM document_chunks WHERE term_count IS NULL LIMIT :batch"
+        ), {"batch": _BATCH}).all()
+        if not rows:
+            break
+        params = []
+        for row_id, content in rows:
+            tf, n = term_frequencies(content)
+            params.append({"id": row_id, "tf": json.dumps(tf), "n": n})
+        bind.execute(update, params)
+
+    op.execute("""
+        INSERT INTO corpus_terms (term, df)
+        SELECT t.term, count(*)
+        FROM document_chunks dc, jsonb_object_keys(dc.term_freqs) AS t(term)
+        GROUP BY t.term
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('corpus_terms')
+    op.drop_column('document_chunks', 'term_count')
+    op.drop_column('document_chunks', 'term_freqs')
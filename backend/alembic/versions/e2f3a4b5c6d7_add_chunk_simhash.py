@@ -0,0 +1,44 @@
+"""add SimHash signatures to document_chunks
+
+Revision ID: e2f3a4b5c6d7
+Revises: d1e2f3a4b5c6
+Create Date: 2026-10-17
+
+RAGService._deduplicate rebuilt a word set from the first 300 characters of
+every candidate and intersected it with every kept one on each query. Each
+chunk now stores a 64-bit SimHash of its terms (app/utils/simhash.py),
+computed at ingestion, and dedup compares signatures (XOR + popcount).
+
+Existing chunks are signed here, in batches, with the same function.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.simhash import signature
+
+revision: str = 'e2f3a4b5c6d7'
+down_revision: Union[str, None] = 'd1e2f3a4b5c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 2000
+
+
+def upgrade() -> None:
+    op.add_column('document_chunks', sa.Column('simhash', sa.BigInteger(), nullable=True))
+
+    bind = op.get_bind()
+    update = sa.text("UPDATE document_chunks SET simhash = :sig WHERE id = :id")
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, content FROM document_chunks WHERE simhash IS NULL LIMIT :batch"
+        ), {"batch": _BATCH}).all()
+        if not rows:
+            break
+        bind.execute(update, [{"id": row_id, "sig": signature(content)} for row_id, content in rows])
+
+
+def downgrade() -> None:
+    op.drop_column('document_chunks', 'simhash')
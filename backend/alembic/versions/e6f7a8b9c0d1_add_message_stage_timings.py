@@ -0,0 +1,30 @@
+"""add stage_timings to messages
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-17
+
+Per-message latency breakdown of the pre-generation pipeline (answer-cache
+embedding/lookup, history fetch, RAG retrieval) written by ChatService — with
+speculative retrieval those stages overlap, and this is where the latency it
+saves is visible. NULL for user messages and for rows written before this
+column existed.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'e6f7a8b9c0d1'
+down_revision: Union[str, None] = 'd5e6f7a8b9c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('messages', sa.Column('stage_timings', postgresql.JSONB(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('messages', 'stage_timings')
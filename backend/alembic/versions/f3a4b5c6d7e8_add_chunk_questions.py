@@ -0,0 +1,65 @@
+"""add chunk_questions (doc2query) and document_chunks.questions_at
+
+Revision ID: f3a4b5c6d7e8
+Revises: e2f3a4b5c6d7
+Create Date: 2026-10-17
+
+HyDE is skipped on Ollama (an extra generate() per search doubles latency
+on CPU), so Ollama deployments retrieved with the raw query alone. A
+background pass (app/services/question_generation.py) now generates a few
+likely student questions per chunk while the server is idle and stores
+their embeddings here; the "questions" retrieval mode matches the query
+against them with no LLM call at search time.
+
+Existing chunks are left pending (questions_at NULL): the background pass
+works through them, there is nothing to backfill synchronously.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import pgvector.sqlalchemy
+
+from app.config import settings
+
+revision: str = 'f3a4b5c6d7e8'
+down_revision: Union[str, None] = 'e2f3a4b5c6d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('document_chunks', sa.Column('questions_at', sa.DateTime(timezone=True), nullable=True))
+    # The background pass's scan: oldest pending chunks first.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_dc_questions_pending
+        ON document_chunks (created_at)
+        WHERE questions_at IS NULL
+    """)
+
+    op.create_table(
+        'chunk_questions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            'chunk_id', postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('document_chunks.id', ondelete='CASCADE'), nullable=False,
+        ),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(settings.embedding_dimensions), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('idx_chunk_questions_chunk', 'chunk_questions', ['chunk_id'])
+    # Same HNSW parameters as idx_dc_embedding_hnsw.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_chunk_questions_embedding_hnsw
+        ON chunk_questions
+        USING hnsw (embedding vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('chunk_questions')
+    op.execute("DROP INDEX IF EXISTS idx_dc_questions_pending")
+    op.drop_column('document_chunks', 'questions_at')
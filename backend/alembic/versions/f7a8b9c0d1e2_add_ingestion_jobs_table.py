@@ -0,0 +1,66 @@
+"""add ingestion_jobs table
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-17
+
+Durable queue for document ingestion (see app/services/ingestion_queue.py):
+uploads and reindexes used to run as untracked asyncio tasks in the web
+process, so a restart left their documents stuck in "processing". Documents
+already stuck that way get a queued job here so the worker pool picks them up.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = 'f7a8b9c0d1e2'
+down_revision: Union[str, None] = 'e6f7a8b9c0d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ingestion_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            'document_id', postgresql.UUID(as_uuid=True),
+            sa.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False,
+        ),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        'idx_ingestion_jobs_queued', 'ingestion_jobs', ['priority', 'created_at'],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+    op.create_index('idx_ingestion_jobs_document', 'ingestion_jobs', ['document_id', 'created_at'])
+
+    op.execute("""
+        INSERT INTO ingestion_jobs
+            (id, document_id, kind, status, priority, attempts, max_attempts,
+             progress, run_after, created_at)
+        SELECT uuid_generate_v4(), id, 'upload', 'queued', 100, 0, 3, 0, now(), now()
+        FROM documents
+        WHERE ingestion_status = 'processing'
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ingestion_jobs_document', table_name='ingestion_jobs')
+    op.drop_index('idx_ingestion_jobs_queued', table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
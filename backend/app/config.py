@@ -42,6 +42,21 @@ class Settings(BaseSettings):
     # ese razonamiento en el origen — medido: una sola consulta con el modelo ya
     # cargado tardaba >300s con thinking habilitado.
     ollama_think_enabled: bool = False
+    # Pool HTTP compartido con Ollama (utils/http_pool.py): un solo cliente
+    # para todo el proceso en vez de una conexión TCP nueva por llamada.
+    # 16 conexiones cubren chat + HyDE + verificación + lotes de embeddings
+    # concurrentes; Ollama serializa la generación por modelo de todos modos,
+    # así que más conexiones solo agregarían cola del lado del servidor.
+    # Ver ollama_pool.saturated_requests en /metrics antes de subirlo.
+    ollama_pool_max_connections: int = 16
+    ollama_pool_max_keepalive: int = 8
+    ollama_pool_keepalive_expiry_seconds: float = 60.0
+    # Embeddings por lotes vía /api/embed (lista de "input" en una sola
+    # petición). Ollama procesa un lote por pasada del modelo y serializa las
+    # peticiones de todos modos, así que 2 lotes en vuelo bastan para que
+    # nunca quede ocioso esperando la red; más solo alarga la cola.
+    ollama_embed_batch_size: int = 32
+    ollama_embed_max_concurrency: int = 2
 
     # OpenAI
     openai_api_key: Optional[str] = None
@@ -80,6 +95,46 @@ class Settings(BaseSettings):
     rag_hyde_enabled: bool = True
     # Diversidad: máximo 2 chunks por documento fuente para evitar respuestas repetitivas
     rag_diversity_enabled: bool = True
+    # MMR: elegir los top_k penalizando la similitud (coseno entre embeddings)
+    # con los ya elegidos, para cubrir más semestres/secciones sin subir top_k.
+    # lambda = peso de la relevancia; 1.0 = solo relevancia, sin penalización.
+    rag_mmr_enabled: bool = True
+    rag_mmr_lambda: float = 0.7
+    # Recuperación híbrida. "fused": una sola consulta (candidatos HNSW y
+    # full-text en CTEs) fusionada con reciprocal rank fusion. "legacy": búsqueda
+    # vectorial, luego full-text aparte y mezcla en Python — se conserva para
+    # comparar A/B en la evaluación GoldStandard. "questions": como "fused", más
+    # una tercera lista — las preguntas generadas por chunk (doc2query, abajo) —
+    # y sin HyDE.
+    rag_retrieval_mode: str = "fused"
+    # k de RRF: score = Σ 1/(k + rango). 60 es el valor del paper original;
+    # más alto aplana la ventaja de los primeros puestos de cada lista.
+    rag_rrf_k: int = 60
+    # Estadísticas de corpus para BM25 (df por término, longitud media): cada
+    # worker guarda una copia en memoria y la recarga cada N segundos — las
+    # ingestas de otros workers se ven con ese retraso como máximo.
+    bm25_stats_refresh_seconds: float = 300.0
+    # Colapsar en la ingesta los chunks casi idénticos a otro del mismo documento
+    # (firma SimHash a ≤ N bits): no se embeden ni se indexan. Desactivado por
+    # defecto — la deduplicación por consulta en RAGService ya los filtra.
+    # 3 bits ≈ el mismo texto salvo formato (mayúsculas, tildes, puntuación,
+    # saltos de línea); cambiar un solo término ya mueve 4–8 bits.
+    ingestion_dedup_enabled: bool = False
+    ingestion_dedup_max_bits: int = 3
+    # Doc2query: en segundo plano, solo cuando no hay chat ni ingesta en curso,
+    # el LLM escribe N preguntas de estudiante por chunk y se guardan sus
+    # embeddings (chunk_questions). rag_retrieval_mode="questions" busca la
+    # consulta cruda contra ellas: recall parecido a HyDE sin una llamada al
+    # LLM por búsqueda — pensado para Ollama, donde HyDE está desactivado.
+    doc2query_enabled: bool = False
+    doc2query_questions_per_chunk: int = 3
+    # Chunks por tanda; entre tandas o sin trabajo pendiente, espera N segundos.
+    doc2query_batch_size: int = 8
+    doc2query_idle_seconds: float = 30.0
+    # Un chunk cuya generación falla se reintenta tras N s × 2^(intento-1); tras
+    # max_attempts queda marcado sin preguntas para no bloquear al resto.
+    doc2query_max_attempts: int = 3
+    doc2query_retry_backoff_seconds: float = 300.0
     # NO cambiar embedding_provider sin migrar la dimensión del vector en pgvector
     embedding_provider: str = "ollama"
     # nomic-embed-text=768 | text-embedding-3-small=1536
@@ -139,9 +194,10 @@ class Settings(BaseSettings):
     # (una respuesta lenta pero correcta es mejor que una rápida pero falsa).
     answer_cache_similarity_threshold: float = 0.90
     # 30 días — es solo una red de seguridad: la invalidación real ocurre al
-    # subir/borrar documentos (answer_cache.invalidate_all() en
-    # document_service.py), así que un TTL largo no arriesga servir
-    # respuestas desactualizadas mientras la base de conocimiento no cambie.
+    # subir/editar/borrar documentos (answer_cache.invalidate_tags() por
+    # documento/programa en document_service.py), así que un TTL largo no
+    # arriesga servir respuestas desactualizadas mientras la base de
+    # conocimiento no cambie.
     answer_cache_ttl_seconds: int = 2592000
     # Subido junto con el TTL: con 30 días de vida, se acumulan más entradas
     # antes de expirar. 1000 entradas ≈ 17 MB en Redis — insignificante
@@ -159,6 +215,23 @@ class Settings(BaseSettings):
     # normal), así que no hay razón para esperar más que unos segundos.
     answer_cache_embed_timeout_seconds: float = 8.0
 
+    # Single-flight (utils/single_flight.py): preguntas idénticas que llegan
+    # al mismo tiempo (un salón entero preguntando por admisiones) esperan a
+    # la primera en vez de repetir HyDE + embedding + búsqueda + generación.
+    # Con REDIS_URL, un lock SET NX coordina también entre workers; el TTL
+    # cubre la generación más lenta en CPU (ver timeout de 600s en
+    # ollama_provider.py) — si el líder muere, los demás calculan por su cuenta
+    # al expirar.
+    single_flight_enabled: bool = True
+    single_flight_redis_lock: bool = True
+    single_flight_lock_ttl_seconds: float = 600.0
+    # Recuperación especulativa: la búsqueda RAG arranca sin esperar la
+    # consulta a la caché de respuestas (embedding con embeddinggemma, hasta
+    # answer_cache_embed_timeout_seconds) y se cancela si la caché acierta.
+    # Cada fallo de caché deja de pagar esa latencia en serie; los tiempos por
+    # etapa quedan en messages.stage_timings.
+    chat_speculative_retrieval: bool = True
+
     # Program/faculty disambiguation: for topics confirmed to genuinely differ
     # by program or faculty (pensum, créditos, misión, etc. — see
     # query_utils.is_varying_topic_query), if the RAG search matches several
@@ -182,6 +255,43 @@ class Settings(BaseSettings):
     max_upload_size_mb: int = 50
     upload_dir: str = "./uploads"
 
+    # Cola de ingesta (ver app/services/ingestion_queue.py): los trabajos se
+    # guardan en la tabla ingestion_jobs y los ejecuta un pool de workers por
+    # proceso, así un reinicio no deja documentos atascados en "processing".
+    # Concurrencia baja a propósito: cada ingesta son varias llamadas a Ollama
+    # (visión, enriquecimiento, embeddings) que compiten con el chat en CPU.
+    ingestion_workers: int = 1
+    ingestion_max_attempts: int = 3
+    # Reintento tras fallo: espera base × 2^(intento-1)
+    ingestion_retry_backoff_seconds: float = 30.0
+    ingestion_poll_interval_seconds: float = 2.0
+    # Un trabajo "running" sin heartbeat en este tiempo se da por huérfano
+    # (worker muerto) y vuelve a la cola. Heartbeat cada lease/4.
+    ingestion_lease_seconds: float = 120.0
+    # Prioridad al chat: antes de cada etapa pesada, la ingesta espera hasta
+    # este máximo mientras haya respuestas de chat en curso.
+    ingestion_chat_yield_max_seconds: float = 30.0
+    # Parseo/chunking en procesos aparte (ver app/utils/parse_pool.py): PyMuPDF,
+    # openpyxl y tiktoken son CPU puro y bloqueaban el event loop (y con él
+    # todos los streams de chat del worker). 0 = en un hilo, sin pool.
+    parse_pool_workers: int = 2
+    # Por archivo: pasado el tiempo se mata el worker; el límite de memoria
+    # (RLIMIT_AS por worker) convierte un archivo patológico en MemoryError.
+    parse_timeout_seconds: float = 300.0
+    parse_memory_limit_mb: int = 2048
+    # Los PDF se extraen, limpian y trocean por lotes de páginas: la memoria
+    # pico es un lote, no el documento, y los embeddings de un lote se
+    # calculan mientras se extrae el siguiente.
+    pdf_stream_batch_pages: int = 16
+    # Almacén persistente de embeddings (tabla embedding_store, ver
+    # app/services/embedding_store.py): sobrevive a reinicios y reindexados,
+    # así no se recalcula el corpus entero en Ollama tras un despliegue.
+    # La recolección borra lo que ningún chunk referencia y lleva más de
+    # `gc_grace` sin usarse (embeddings de consultas, documentos borrados).
+    embedding_store_enabled: bool = True
+    embedding_store_gc_interval_hours: float = 24.0
+    embedding_store_gc_grace_hours: float = 168.0
+
     # Redis (optional — enables persistent RAG cache across restarts)
     # Set to empty string "" to use in-memory fallback
     redis_url: str = ""
@@ -1,11 +1,35 @@
+import time
+from typing import Iterable, Sequence
+
+from pgvector.sqlalchemy import VECTOR
+from pgvector.utils import Vector
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
+from app.utils.metrics import DB_POOL_CHECKOUT_SECONDS, REGISTRY
+
+
+class _TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited —
+    ~0 while connections are idle, up to pool_timeout once all
+    pool_size + max_overflow are busy. SQLAlchemy's pool events only fire
+    after a connection is handed out, so the wait has to be timed here."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
 
 engine = create_async_engine(
     settings.database_url,
     echo=False,
+    poolclass=_TimedQueuePool,
     pool_size=20,
     max_overflow=10,
 )
@@ -21,6 +45,79 @@ class Base(DeclarativeBase):
     pass
 
 
+# ── pgvector binary codec ─────────────────────────────────────────────────────
+
+def _encode_vector(value) -> bytes:
+    # Lists/arrays (BinaryVector columns, RAG query parameters) go straight
+    # to binary; a '[...]' string — pgvector.sqlalchemy's Vector type, or
+    # raw SQL binding the text form — is parsed first.
+    if isinstance(value, str):
+        value = Vector.from_text(value)
+    return Vector._to_db_binary(value)
+
+
+async def _set_vector_codec(conn) -> None:
+    try:
+        await conn.set_type_codec(
+            "vector", schema="public",
+            encoder=_encode_vector, decoder=Vector._from_db_binary, format="binary",
+        )
+    except ValueError:
+        pass  # extension not created yet (fresh DB before `alembic upgrade`)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _register_vector_codec(dbapi_connection, connection_record):
+    """Binary wire format for `vector` on every pooled connection — what
+    `copy_records` needs (COPY is binary-only in asyncpg), and 768 float32s
+    are 3 KB on the wire instead of ~10 KB of decimal text parsed server-side.
+    Decoded values are float32 numpy arrays, as with the text format."""
+    dbapi_connection.run_async(_set_vector_codec)
+
+
+class BinaryVector(VECTOR):
+    """pgvector column type that hands values to asyncpg untouched, for the
+    binary codec above to encode. pgvector.sqlalchemy's own type formats
+    every vector as decimal text first (then parsed again server-side, or
+    by `_encode_vector`). Other drivers keep that text path. Dimensions are
+    still checked — by the column's vector(N) type, server-side."""
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        if dialect.driver == "asyncpg":
+            return None
+        return super().bind_processor(dialect)
+
+
+async def copy_records(
+    db: AsyncSession, table: str, columns: Sequence[str], records: Iterable[tuple],
+) -> None:
+    """Bulk-load `records` (tuples in `columns` order) into `table` with one
+    binary COPY, on `db`'s connection and inside its transaction — rows
+    appear with the caller's commit and vanish with its rollback, exactly
+    like session.add_all(), without per-row INSERT parameter binding.
+
+    Values go through asyncpg's codecs, not SQLAlchemy's: supply every
+    Python-side default (ids, timestamps) and JSONB as a JSON string.
+    """
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    if not driver.is_in_transaction():
+        # SQLAlchemy's asyncpg adapter only opens the transaction on the
+        # first statement; a COPY ahead of it would autocommit.
+        await conn.execute(text("SELECT 1"))
+    await driver.copy_records_to_table(table, records=records, columns=list(columns))
+
+
 async def get_db() -> AsyncSession:
     async with async_session() as session:
         yield session
+
+
+@REGISTRY.collector
+def _collect_db_pool_metrics():
+    pool = engine.pool
+    yield "db_pool_checked_out", "gauge", "SQLAlchemy connections in use.", [({}, pool.checkedout())]
+    yield "db_pool_size", "gauge", "SQLAlchemy pool_size (overflow excluded).", [({}, pool.size())]
+    yield "db_pool_overflow", "gauge", "SQLAlchemy overflow connections open.", [({}, max(pool.overflow(), 0))]
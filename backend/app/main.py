@@ -13,6 +13,7 @@ from sqlalchemy import select, delete as sql_delete
 from app.config import settings
 from app.routers import health, chat, rag, llm, documents, config, auth, audio, analytics, taxonomy, rag_eval, goldstandard_eval
 from app.middleware.error_handler import global_exception_handler
+from app.middleware.upload_limit import FORM_OVERHEAD_BYTES, UploadSizeLimitMiddleware
 from app.utils.rate_limit import limiter
 
 # Strong references to background pull tasks so GC doesn't collect them mid-flight
@@ -177,6 +178,11 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Could not load persisted LLM config (non-fatal): %s", e)
 
+    # One shared Ollama connection pool for the whole process (closed below
+    # on shutdown) — see utils/http_pool.py.
+    from app.utils.http_pool import ollama_http_pool
+    ollama_http_pool.start()
+
     # Check provider availability
     from app.providers.openai_provider import OpenAIProvider
     from app.providers.ollama_provider import OllamaProvider
@@ -260,11 +266,11 @@ async def lifespan(app: FastAPI):
         from sqlalchemy import text as sql_text
         async with async_session() as db:
             await db.execute(sql_text(
-                "CREATE INDEX IF NOT EXISTS idx_dc_content_fts "
-                "ON document_chunks USING gin (to_tsvector('spanish', content))"
+                "CREATE INDEX IF NOT EXISTS idx_dc_content_tsv "
+                "ON document_chunks USING gin (content_tsv)"
             ))
             await db.commit()
-        logger.info("Full-text GIN index verified/created on document_chunks.content")
+        logger.info("Full-text GIN index verified/created on document_chunks.content_tsv")
     except Exception as e:
         logger.warning("Could not ensure full-text GIN index (non-fatal): %s", e)
 
@@ -305,18 +311,35 @@ async def lifespan(app: FastAPI):
     await _reconcile_orphaned_eval_runs()
     # Repeat cleanup every 2 h in background (store ref so GC doesn't collect it)
     _pull_tasks.add(asyncio.create_task(_periodic_guest_cleanup(), name="guest-cleanup"))
+    # Drop stored embeddings no chunk references any more (daily by default)
+    from app.services.embedding_store import embedding_store
+    _pull_tasks.add(asyncio.create_task(embedding_store.run_gc_loop(), name="embedding-store-gc"))
     # Connect RAG + answer caches to Redis if configured
     from app.utils.cache import rag_cache, answer_cache
     if settings.redis_url:
         await rag_cache.connect_redis(settings.redis_url)
         await answer_cache.connect_redis(settings.redis_url)
+        if settings.single_flight_redis_lock:
+            from app.utils import single_flight
+            await single_flight.connect_redis(settings.redis_url)
     else:
         logger.info("REDIS_URL not set — RAG and answer caches using in-memory store")
 
     # Pull models in background so it doesn't block startup/healthcheck
     _pull_tasks.add(asyncio.create_task(_ensure_ollama_models(), name="ensure-models"))
+    # Document ingestion workers — resume whatever the table says is queued
+    # (including jobs a previous process was running, once their lease lapses).
+    from app.services.ingestion_queue import ingestion_queue
+    ingestion_queue.start()
+    # Doc2query questions for chunks that don't have them, in idle time
+    from app.services.question_generation import question_generator
+    _pull_tasks.add(asyncio.create_task(question_generator.run_loop(), name="doc2query"))
     yield
     logger.info("Cerrando Guaca UniPutumayo API...")
+    await ingestion_queue.stop()
+    from app.utils.parse_pool import parse_pool
+    parse_pool.shutdown()
+    await ollama_http_pool.aclose()
 
 
 app = FastAPI(
@@ -330,6 +353,14 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Upload size limit, enforced while the body streams in. Added before CORS so
+# CORS wraps it and the 413 stays readable by the admin UI.
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_upload_size_mb * 1024 * 1024 + FORM_OVERHEAD_BYTES,
+    path_pattern=r"/api/v1/documents/(upload|[^/]+/reindex)",
+)
+
 # CORS
 origins = [origin.strip() for origin in settings.cors_origins.split(",")]
 app.add_middleware(
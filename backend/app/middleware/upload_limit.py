@@ -0,0 +1,61 @@
+"""
+Reject oversized uploads while the request body is still arriving.
+
+FastAPI parses the whole multipart form (spooling the file part to a temp
+file) before the route function runs, so DocumentService's size check alone
+only fired after a 2 GB request had been received in full. This pure ASGI
+middleware sits in front of that for the upload routes:
+
+  * a declared Content-Length over the limit gets 413 without reading the
+    body at all;
+  * otherwise (chunked transfer, or a lying header) bytes are counted as
+    they are received, and the request fails with 413 as soon as the count
+    crosses the limit — FastAPI re-raises an HTTPException that comes out
+    of body parsing instead of turning it into a 400.
+
+The limit is on the whole body: the file limit plus `FORM_OVERHEAD_BYTES`
+for the other form fields and multipart boundaries. The exact per-file
+check stays in DocumentService.upload_and_process.
+"""
+
+import re
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int, path_pattern: str):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_re = re.compile(path_pattern)
+
+    def _detail(self) -> str:
+        limit_mb = (self.max_bytes - FORM_OVERHEAD_BYTES) / (1024 * 1024)
+        return f"Archivo demasiado grande. Máximo permitido: {limit_mb:.0f} MB."
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.path_re.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            response = JSONResponse(status_code=413, content={"detail": self._detail()})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
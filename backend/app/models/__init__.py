@@ -11,6 +11,10 @@ from app.models.program import Program
 from app.models.document_type import DocumentType
 from app.models.rag_eval_run import RagEvalRun
 from app.models.gold_eval_run import GoldEvalRun
+from app.models.ingestion_job import IngestionJob
+from app.models.embedding_store import StoredEmbedding
+from app.models.corpus_term import CorpusTerm
+from app.models.chunk_question import ChunkQuestion
 
 __all__ = [
     "User",
@@ -26,4 +30,8 @@ __all__ = [
     "DocumentType",
     "RagEvalRun",
     "GoldEvalRun",
+    "IngestionJob",
+    "StoredEmbedding",
+    "CorpusTerm",
+    "ChunkQuestion",
 ]
@@ -0,0 +1,37 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base, BinaryVector
+from app.config import settings
+
+
+class ChunkQuestion(Base):
+    """A question a student might ask that `chunk_id` answers, generated
+    and embedded at ingestion time (app/services/question_generation.py).
+
+    The "questions" retrieval mode matches the raw query embedding against
+    these — question against question — which is what HyDE approximates
+    with an LLM call per search. Deleted with their chunk, so a reindex
+    that changes a chunk's content regenerates its questions.
+    """
+    __tablename__ = "chunk_questions"
+    __table_args__ = (
+        Index("idx_chunk_questions_chunk", "chunk_id"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    chunk_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("document_chunks.id", ondelete="CASCADE"), nullable=False
+    )
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    # Same model and dimension as the chunk's own embedding.
+    embedding = mapped_column(BinaryVector(settings.embedding_dimensions), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
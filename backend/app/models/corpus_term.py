@@ -0,0 +1,18 @@
+from sqlalchemy import Integer, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CorpusTerm(Base):
+    """Document frequency of one term: how many chunks contain it.
+
+    The corpus half of BM25 (app/utils/bm25.py) — the per-chunk half is
+    `DocumentChunk.term_freqs`. Maintained incrementally by
+    app/services/corpus_stats.py in the same transaction that inserts or
+    deletes the chunks; rows that drop to 0 are kept and ignored.
+    """
+    __tablename__ = "corpus_terms"
+
+    term: Mapped[str] = mapped_column(Text, primary_key=True)
+    df: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -24,6 +24,11 @@ class Document(Base):
     document_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
     content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     ingestion_status: Mapped[str] = mapped_column(String(50), default="pending")
+    # Validated vision/enrichment summary ("" = none found) and the hash of
+    # what produced it; a reindex whose inputs hash the same reuses it
+    # instead of calling the LLM again (DocumentService._curriculum_summary).
+    curriculum_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    curriculum_summary_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
     total_chunks: Mapped[int] = mapped_column(Integer, default=0)
     uploaded_by: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=True
@@ -1,12 +1,11 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, Integer, Text, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import BigInteger, String, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from pgvector.sqlalchemy import Vector
 
-from app.database import Base
+from app.database import Base, BinaryVector
 from app.config import settings
 
 
@@ -24,7 +23,27 @@ class DocumentChunk(Base):
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     token_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    embedding = mapped_column(Vector(settings.embedding_dimensions), nullable=True)
+    embedding = mapped_column(BinaryVector(settings.embedding_dimensions), nullable=True)
+    # sha256 of `content` + the model that produced `embedding`: a reindex
+    # keeps a row (and skips re-embedding it) when both still match.
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    embedding_model: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    # Weighted Spanish tsvector the keyword search matches and ranks on:
+    # document title (A), sheet/slide header (B), content (D). Not a
+    # GENERATED column — the title lives on `documents` — so ingestion fills
+    # it (DocumentService._index_chunks). Deferred: nothing reads it in Python.
+    content_tsv = mapped_column(TSVECTOR, nullable=True, deferred=True)
+    # BM25 term frequencies (app/utils/bm25.py) and their total, computed at
+    # ingestion so reranking never re-tokenizes `content`.
+    term_freqs: Mapped[dict | None] = mapped_column(JSONB, nullable=True, deferred=True)
+    term_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # 64-bit SimHash of the content's terms (app/utils/simhash.py), stored
+    # signed — near-duplicate checks are an XOR + popcount against it.
+    simhash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # When question generation (doc2query, app/services/question_generation.py)
+    # handled this chunk — set even if it produced no questions, so the
+    # background pass doesn't retry it. NULL = still pending.
+    questions_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     metadata_: Mapped[dict | None] = mapped_column(
         "metadata", JSONB, default=dict, nullable=True
     )
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import String, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base, BinaryVector
+
+
+class StoredEmbedding(Base):
+    """One computed embedding, addressed by (model, sha256 of the text).
+
+    Read and written by app/services/embedding_store.py in front of every
+    provider `embed()` call. `text_hash` is the same digest
+    `document_chunks.content_hash` holds, which is what garbage collection
+    joins on. The vector column has no fixed dimension: the chunk model and
+    the answer-cache model (embeddinggemma) share the table.
+    """
+    __tablename__ = "embedding_store"
+
+    model: Mapped[str] = mapped_column(String(200), primary_key=True)
+    text_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    embedding = mapped_column(BinaryVector(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    # Refreshed on lookup (at most hourly per row) — GC's grace period
+    # counts from here, not from created_at.
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
@@ -0,0 +1,56 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import String, Integer, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class IngestionJob(Base):
+    """One extraction/enrichment/embedding run for a document, claimed by the
+    worker pool in app/services/ingestion_queue.py.
+
+    The row is the source of truth rather than an in-process task, so a
+    restart resumes queued work and reclaims jobs whose worker stopped
+    heartbeating (`heartbeat_at` older than ingestion_lease_seconds).
+    Lower `priority` runs first; `run_after` delays retries (exponential
+    backoff after a failed attempt).
+    """
+    __tablename__ = "ingestion_jobs"
+    __table_args__ = (
+        # Claim query: WHERE status = 'queued' ORDER BY priority, created_at.
+        Index(
+            "idx_ingestion_jobs_queued", "priority", "created_at",
+            postgresql_where="status = 'queued'",
+        ),
+        Index("idx_ingestion_jobs_document", "document_id", "created_at"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    document_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)  # upload | reindex
+    status: Mapped[str] = mapped_column(String(20), default="queued")  # queued | running | completed | failed
+    priority: Mapped[int] = mapped_column(Integer, default=100)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    stage: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    progress: Mapped[int] = mapped_column(Integer, default=0)  # 0-100
+    run_after: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    locked_by: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # IndexStats of a completed run (chunks reused / embedded / removed).
+    result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime, timezone
 
 from sqlalchemy import String, Text, Integer, Boolean, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -31,6 +31,9 @@ class Message(Base):
     # messages, where the loop never runs.
     verification_attempts: Mapped[int | None] = mapped_column(Integer, nullable=True)
     verification_approved: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # Per-stage latency (ms) of the whole pipeline — StageTrace.as_dict(),
+    # see utils/tracing.py and /api/v1/analytics/latency. Assistant messages only.
+    stage_timings: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
     )
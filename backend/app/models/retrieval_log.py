@@ -4,9 +4,8 @@ from datetime import datetime, timezone
 from sqlalchemy import Text, Float, Integer, DateTime, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
-from pgvector.sqlalchemy import Vector
 
-from app.database import Base
+from app.database import Base, BinaryVector
 from app.config import settings
 
 
@@ -23,7 +22,7 @@ class RetrievalLog(Base):
     )
     query_text: Mapped[str] = mapped_column(Text, nullable=False)
     query_embedding = mapped_column(
-        Vector(settings.embedding_dimensions), nullable=True
+        BinaryVector(settings.embedding_dimensions), nullable=True
     )
     chunks_retrieved: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     top_score: Mapped[float | None] = mapped_column(Float, nullable=True)
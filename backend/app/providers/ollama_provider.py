@@ -2,22 +2,43 @@ import asyncio
 import json
 import logging
 import re
+import time
 from typing import AsyncIterator
 
-import httpx
-
 from app.providers.base import BaseLLMProvider
 from app.config import settings, OLLAMA_EMBEDDING_KEYWORDS
-from app.utils.cache import embedding_cache
+from app.services.embedding_store import embedding_store
+from app.utils.http_pool import ollama_http_pool
+from app.utils.metrics import count_tokens, llm_call
+from app.utils.tracing import record, span
 
 logger = logging.getLogger(__name__)
 
 _THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL | re.IGNORECASE)
 
 
+def _is_model_error(response) -> bool:
+    """An Ollama API error about the request itself ({"error": "model \"x\"
+    not found, try pulling it first"}), as opposed to the router's plain-text
+    "404 page not found" for a route the server doesn't have."""
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and "error" in body
+
+
 class OllamaProvider(BaseLLMProvider):
+    """All calls go through the process-wide ollama_http_pool (started in the
+    app lifespan) so keep-alive connections are reused across chat, HyDE,
+    verification and embedding calls. Timeouts are per call, not per client."""
+
     def __init__(self):
         self.base_url = settings.ollama_base_url
+        self._pool = ollama_http_pool
+        self._embed_semaphore = asyncio.Semaphore(max(1, settings.ollama_embed_max_concurrency))
+        # None until the first batch tells us whether /api/embed exists.
+        self._batch_embed_supported: bool | None = None
 
     # ── Think-tag helpers ────────────────────────────────────────────────────
 
@@ -26,6 +47,17 @@ class OllamaProvider(BaseLLMProvider):
         """Remove <think>…</think> blocks (qwen3, deepseek-r1, etc.) from completed text."""
         return _THINK_RE.sub("", content).strip()
 
+    @staticmethod
+    def _tokens_used(data: dict) -> dict | None:
+        """Token counts from a final /api/chat response (streamed or not)."""
+        if "eval_count" not in data:
+            return None
+        return {
+            "prompt": data.get("prompt_eval_count", 0),
+            "completion": data.get("eval_count", 0),
+            "total": data.get("prompt_eval_count", 0) + data.get("eval_count", 0),
+        }
+
     # ── Generation ───────────────────────────────────────────────────────────
 
     async def generate(
@@ -40,9 +72,10 @@ class OllamaProvider(BaseLLMProvider):
         # minutes; a real gold-eval run hit this at exactly 300s (a generate
         # call in verification_graph.py's _generate step), so 300s was too
         # tight even without nginx as the binding constraint.
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            response = await client.post(
+        with span("llm_generate"), llm_call("ollama", "generate"):
+            response = await self._pool.post(
                 f"{self.base_url}/api/chat",
+                timeout=600.0,
                 json={
                     "model": model,
                     "messages": messages,
@@ -57,20 +90,15 @@ class OllamaProvider(BaseLLMProvider):
                 },
             )
             response.raise_for_status()
-            data = response.json()
+        data = response.json()
 
-            tokens_used = None
-            if "eval_count" in data:
-                tokens_used = {
-                    "prompt": data.get("prompt_eval_count", 0),
-                    "completion": data.get("eval_count", 0),
-                    "total": data.get("prompt_eval_count", 0) + data.get("eval_count", 0),
-                }
+        tokens_used = self._tokens_used(data)
+        count_tokens("ollama", tokens_used)
 
-            content = self._strip_think(data["message"]["content"])
-            # Ollama's own "length"/"stop"/etc. vocabulary already matches what
-            # callers expect — no remapping needed.
-            return {"content": content, "tokens_used": tokens_used, "finish_reason": data.get("done_reason")}
+        content = self._strip_think(data["message"]["content"])
+        # Ollama's own "length"/"stop"/etc. vocabulary already matches what
+        # callers expect — no remapping needed.
+        return {"content": content, "tokens_used": tokens_used, "finish_reason": data.get("done_reason")}
 
     async def generate_stream(
         self,
@@ -82,12 +110,15 @@ class OllamaProvider(BaseLLMProvider):
     ) -> AsyncIterator[str]:
         """Stream tokens, filtering out <think>…</think> reasoning blocks."""
         inside_think = False
+        start = time.perf_counter()
+        first_token = True
 
         # Kept in sync with generate()'s timeout — see comment there.
-        async with httpx.AsyncClient(timeout=600.0) as client:
-            async with client.stream(
+        with llm_call("ollama", "stream"):
+            async with self._pool.stream(
                 "POST",
                 f"{self.base_url}/api/chat",
+                timeout=600.0,
                 json={
                     "model": model,
                     "messages": messages,
@@ -110,12 +141,18 @@ class OllamaProvider(BaseLLMProvider):
                         if data.get("done"):
                             if meta is not None:
                                 meta["finish_reason"] = data.get("done_reason")
+                            count_tokens("ollama", self._tokens_used(data))
                             continue
                         if "message" not in data:
                             continue
                         token = data["message"].get("content", "")
                         if not token:
                             continue
+                        if first_token:
+                            # First model token, <think> or not — with thinking
+                            # off (the default) that's also the first visible one.
+                            record("llm_first_token", (time.perf_counter() - start) * 1000)
+                            first_token = False
 
                         if inside_think:
                             if "</think>" in token.lower():
@@ -147,54 +184,79 @@ class OllamaProvider(BaseLLMProvider):
 
     # ── Embeddings ───────────────────────────────────────────────────────────
 
-    async def _embed_one(
-        self, client: httpx.AsyncClient, text: str, model: str
-    ) -> list[float]:
-        """Embed a single text, using the in-memory cache to avoid redundant API calls."""
-        cache_key = embedding_cache.make_key(text=text, model=model)
-        cached = embedding_cache.get(cache_key)
-        if cached is not None:
-            return cached
+    async def _embed_batch(self, texts: list[str], model: str) -> list[list[float]]:
+        """Embed one batch with a single /api/embed call (input list), or one
+        /api/embeddings call per text on servers that predate /api/embed."""
+        async with self._embed_semaphore:
+            if self._batch_embed_supported is not False:
+                response = await self._pool.post(
+                    f"{self.base_url}/api/embed",
+                    timeout=120.0,
+                    json={"model": model, "input": texts, "keep_alive": settings.ollama_keep_alive},
+                )
+                if response.status_code != 404 or _is_model_error(response):
+                    # A 404 for a model that isn't pulled says nothing about
+                    # the endpoint — raise it without deciding anything.
+                    response.raise_for_status()
+                    self._batch_embed_supported = True
+                    return response.json()["embeddings"]
+                # Ollama < 0.3.4 has no /api/embed — remember it so later
+                # batches go straight to the legacy path.
+                logger.warning("Ollama has no /api/embed; falling back to per-text /api/embeddings")
+                self._batch_embed_supported = False
+
+            return list(await asyncio.gather(*[self._embed_legacy(t, model) for t in texts]))
 
-        response = await client.post(
+    async def _embed_legacy(self, text: str, model: str) -> list[float]:
+        response = await self._pool.post(
             f"{self.base_url}/api/embeddings",
+            timeout=120.0,
             json={"model": model, "prompt": text, "keep_alive": settings.ollama_keep_alive},
         )
         response.raise_for_status()
-        vector = response.json()["embedding"]
-        embedding_cache.set(cache_key, vector)
-        return vector
+        return response.json()["embedding"]
 
     async def embed(self, texts: list[str], model: str) -> dict:
-        """Embed all texts in parallel with a shared HTTP client and embedding cache."""
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            embeddings = await asyncio.gather(
-                *[self._embed_one(client, t, model) for t in texts]
-            )
-        return {"embeddings": list(embeddings)}
+        """Embed texts through the embedding store and Ollama's batched /api/embed.
+
+        Texts neither the in-memory cache nor the persistent store has
+        (services/embedding_store.py, deduplicated) are split into batches of
+        `ollama_embed_batch_size`; at most `ollama_embed_max_concurrency`
+        batches are in flight at once — Ollama runs them one model pass per
+        batch, so a 60-chunk document is 2 requests instead of 60 single-prompt
+        ones it would have serialized anyway. /api/embed returns L2-normalized
+        vectors where /api/embeddings didn't; every consumer compares by cosine
+        distance, so scores are unchanged.
+        """
+        return {"embeddings": await embedding_store.embed(texts, model, self._embed_missing)}
+
+    async def _embed_missing(self, texts: list[str], model: str) -> list[list[float]]:
+        size = max(1, settings.ollama_embed_batch_size)
+        batches = [texts[i : i + size] for i in range(0, len(texts), size)]
+        with span("llm_embed"), llm_call("ollama", "embed"):
+            vectors = await asyncio.gather(*[self._embed_batch(b, model) for b in batches])
+        return [vector for batch_vectors in vectors for vector in batch_vectors]
 
     # ── Utilities ────────────────────────────────────────────────────────────
 
     async def get_installed_models(self) -> list[str]:
         """Return chat models installed in Ollama (excludes embedding models)."""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                if response.status_code != 200:
-                    return []
-                data = response.json()
-                all_names = [m["name"] for m in data.get("models", [])]
-                return [
-                    name for name in all_names
-                    if not any(kw in name.lower() for kw in OLLAMA_EMBEDDING_KEYWORDS)
-                ]
+            response = await self._pool.get(f"{self.base_url}/api/tags", timeout=5.0)
+            if response.status_code != 200:
+                return []
+            data = response.json()
+            all_names = [m["name"] for m in data.get("models", [])]
+            return [
+                name for name in all_names
+                if not any(kw in name.lower() for kw in OLLAMA_EMBEDDING_KEYWORDS)
+            ]
         except Exception:
             return []
 
     async def is_available(self) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                return response.status_code == 200
+            response = await self._pool.get(f"{self.base_url}/api/tags", timeout=5.0)
+            return response.status_code == 200
         except Exception:
             return False
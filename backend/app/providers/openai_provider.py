@@ -9,7 +9,9 @@ from openai import AsyncOpenAI
 from app.config import settings
 from app.providers.base import BaseLLMProvider
 from app.runtime_config import runtime_config
-from app.utils.cache import embedding_cache
+from app.services.embedding_store import embedding_store
+from app.utils.metrics import LLM_TOKENS, OPENAI_RATE_LIMIT_WAIT_SECONDS, count_tokens, llm_call
+from app.utils.tracing import record, span
 
 logger = logging.getLogger(__name__)
 
@@ -111,14 +113,16 @@ class OpenAIProvider(BaseLLMProvider):
         max_tokens: int = 1024,
     ) -> dict:
         client = self._ensure_client()
-        await self._rate_limiter.reserve(_estimate_tokens(messages, max_tokens))
-        response = await self._create_completion(
-            client,
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
+        with span("llm_rate_limit_wait"), OPENAI_RATE_LIMIT_WAIT_SECONDS.time():
+            await self._rate_limiter.reserve(_estimate_tokens(messages, max_tokens))
+        with span("llm_generate"), llm_call("openai", "generate"):
+            response = await self._create_completion(
+                client,
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
 
         choice = response.choices[0]
         tokens_used = None
@@ -128,6 +132,7 @@ class OpenAIProvider(BaseLLMProvider):
                 "completion": response.usage.completion_tokens,
                 "total": response.usage.total_tokens,
             }
+            count_tokens("openai", tokens_used)
 
         return {
             "content": choice.message.content or "",
@@ -144,51 +149,51 @@ class OpenAIProvider(BaseLLMProvider):
         meta: dict | None = None,
     ) -> AsyncIterator[str]:
         client = self._ensure_client()
-        await self._rate_limiter.reserve(_estimate_tokens(messages, max_tokens))
-        # Safe to retry-on-429 here too: the error happens on the initial
-        # request that opens the stream, before any chunk is yielded.
-        stream = await self._create_completion(
-            client,
-            model=model,
-            messages=messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True,
-        )
-        async for chunk in stream:
-            if not chunk.choices:
-                continue
-            if chunk.choices[0].finish_reason and meta is not None:
-                meta["finish_reason"] = chunk.choices[0].finish_reason
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        with span("llm_rate_limit_wait"), OPENAI_RATE_LIMIT_WAIT_SECONDS.time():
+            await self._rate_limiter.reserve(_estimate_tokens(messages, max_tokens))
+        start = time.perf_counter()
+        first_token = True
+        with llm_call("openai", "stream"):
+            # Safe to retry-on-429 here too: the error happens on the initial
+            # request that opens the stream, before any chunk is yielded.
+            stream = await self._create_completion(
+                client,
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                # Final chunk (empty `choices`) carries the token usage.
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    count_tokens("openai", {
+                        "prompt": chunk.usage.prompt_tokens,
+                        "completion": chunk.usage.completion_tokens,
+                    })
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].finish_reason and meta is not None:
+                    meta["finish_reason"] = chunk.choices[0].finish_reason
+                if chunk.choices[0].delta.content:
+                    if first_token:
+                        record("llm_first_token", (time.perf_counter() - start) * 1000)
+                        first_token = False
+                    yield chunk.choices[0].delta.content
 
     async def embed(self, texts: list[str], model: str) -> dict:
-        client = self._ensure_client()
+        # Only texts neither the in-memory cache nor the persistent
+        # embedding store has are sent — see services/embedding_store.py.
+        return {"embeddings": await embedding_store.embed(texts, model, self._embed_missing)}
 
-        # Check cache for each text; only call API for uncached ones
-        results: list[list[float] | None] = [None] * len(texts)
-        uncached_indices: list[int] = []
-        uncached_texts: list[str] = []
-
-        for i, text in enumerate(texts):
-            cache_key = embedding_cache.make_key(text=text, model=model)
-            cached = embedding_cache.get(cache_key)
-            if cached is not None:
-                results[i] = cached
-            else:
-                uncached_indices.append(i)
-                uncached_texts.append(text)
-
-        if uncached_texts:
-            response = await client.embeddings.create(model=model, input=uncached_texts)
-            for idx, item in zip(uncached_indices, response.data):
-                vector = item.embedding
-                results[idx] = vector
-                cache_key = embedding_cache.make_key(text=texts[idx], model=model)
-                embedding_cache.set(cache_key, vector)
-
-        return {"embeddings": results}
+    async def _embed_missing(self, texts: list[str], model: str) -> list[list[float]]:
+        client = self._ensure_client()
+        with span("llm_embed"), llm_call("openai", "embed"):
+            response = await client.embeddings.create(model=model, input=texts)
+        if response.usage:
+            LLM_TOKENS.inc(response.usage.prompt_tokens, provider="openai", kind="embedding")
+        return [item.embedding for item in response.data]
 
     async def is_available(self) -> bool:
         key = runtime_config.openai_api_key
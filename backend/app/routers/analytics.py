@@ -1,6 +1,6 @@
 from datetime import datetime, timezone, timedelta
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy import select, func, text, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -168,3 +168,58 @@ async def analytics_overview(
             "recent_corrected": recent_corrected,
         },
     }
+
+
+@router.get("/latency")
+async def analytics_latency(
+    days: int = Query(7, ge=1, le=90),
+    admin: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """p50/p95 per pipeline stage from messages.stage_timings (utils/tracing.py).
+
+    Every `<stage>_ms` key of the assistant messages in the window becomes a
+    row; `total` is response_time_ms, for comparison. Stages only present on
+    some messages (hyde, verify_*, rag on cache hits) are aggregated over the
+    messages that ran them — see `count`.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    rows = (await db.execute(text(r"""
+        SELECT
+            left(s.key, -3) AS stage,
+            COUNT(*) AS cnt,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY (s.value)::numeric) AS p50,
+            percentile_cont(0.95) WITHIN GROUP (ORDER BY (s.value)::numeric) AS p95
+        FROM messages m
+        CROSS JOIN LATERAL jsonb_each(m.stage_timings) AS s
+        WHERE m.role = 'assistant'
+          AND m.created_at >= :since
+          AND s.key LIKE '%\_ms'
+          AND jsonb_typeof(s.value) = 'number'
+        GROUP BY stage
+        UNION ALL
+        SELECT
+            'total',
+            COUNT(*),
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY response_time_ms),
+            percentile_cont(0.95) WITHIN GROUP (ORDER BY response_time_ms)
+        FROM messages
+        WHERE role = 'assistant'
+          AND created_at >= :since
+          AND stage_timings IS NOT NULL
+          AND response_time_ms IS NOT NULL
+        ORDER BY p95 DESC NULLS LAST
+    """), {"since": since})).fetchall()
+
+    return {
+        "days": days,
+        "stages": [
+            {
+                "stage": r.stage,
+                "count": int(r.cnt),
+                "p50_ms": round(float(r.p50)) if r.p50 is not None else None,
+                "p95_ms": round(float(r.p95)) if r.p95 is not None else None,
+            }
+            for r in rows
+        ],
+    }
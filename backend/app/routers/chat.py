@@ -23,6 +23,7 @@ from app.services.chat_service import ChatService
 from app.auth import get_current_user
 from app.models.user import User
 from app.utils.rate_limit import limiter
+from app.utils.activity import chat_activity
 
 logger = logging.getLogger(__name__)
 
@@ -153,7 +154,8 @@ async def send_message(
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     _check_ownership(conversation, current_user)
-    return await service.process_message(conversation_id, data)
+    with chat_activity.track():
+        return await service.process_message(conversation_id, data)
 
 
 @router.post("/conversations/{conversation_id}/messages/stream")
@@ -195,8 +197,9 @@ async def send_message_stream(
                                 f"data: {json.dumps({'type': 'error', 'message': 'Conversation not found'})}\n\n"
                             )
                             return
-                        async for chunk in service.process_message_stream(conversation_id, data):
-                            await q.put(chunk)
+                        with chat_activity.track():
+                            async for chunk in service.process_message_stream(conversation_id, data):
+                                await q.put(chunk)
                     except Exception as e:
                         # Without this, a failure here is invisible in the logs — the
                         # HTTP response still logs 200 (StreamingResponse headers were
@@ -1,4 +1,3 @@
-import asyncio
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File, Form
@@ -8,8 +7,10 @@ from app.database import get_db
 from app.config import settings
 from app.schemas.document import (
     DocumentUploadResponse, DocumentResponse, ChunkResponse, DocumentMetadataUpdate,
+    IngestionJobResponse,
 )
 from app.services.document_service import DocumentService
+from app.services.ingestion_queue import ingestion_queue
 from app.auth import require_admin
 from app.models.user import User
 from app.utils.file_parsers import SUPPORTED_EXTENSIONS, normalize_extension
@@ -19,24 +20,19 @@ router = APIRouter()
 
 _MAX_BYTES = settings.max_upload_size_mb * 1024 * 1024
 
-# Strong references to background ingestion tasks so GC doesn't collect them
-# mid-flight (same pattern as app.main._pull_tasks).
-_ingestion_tasks: set[asyncio.Task] = set()
 
-
-def _spawn_ingestion(document_id: UUID, name: str) -> None:
-    """Fire-and-forget the heavy extraction/embedding pipeline for a document.
-
-    Uses a fresh DocumentService bound to its own DB session (see
-    DocumentService.process_document_background) since the request-scoped
-    session passed to the router closes when this request returns.
-    """
-    task = asyncio.create_task(
-        DocumentService(db=None).process_document_background(document_id),
-        name=f"ingest-{name}-{document_id}",
-    )
-    _ingestion_tasks.add(task)
-    task.add_done_callback(_ingestion_tasks.discard)
+def _check_extension(file: UploadFile) -> None:
+    """Validate file extension before touching the payload."""
+    raw_name = file.filename or ""
+    ext = raw_name.rsplit(".", 1)[-1].lower() if "." in raw_name else ""
+    if not normalize_extension(ext):
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Formato '.{ext}' no soportado. "
+                f"Formatos válidos: {', '.join(e.upper() for e in SUPPORTED_EXTENSIONS)}"
+            ),
+        )
 
 
 @router.post("/upload", response_model=DocumentUploadResponse)
@@ -51,17 +47,7 @@ async def upload_document(
     db: AsyncSession = Depends(get_db),
     admin: User = Depends(require_admin),
 ):
-    # Validate file extension before touching the payload
-    raw_name = file.filename or ""
-    ext = raw_name.rsplit(".", 1)[-1].lower() if "." in raw_name else ""
-    if not normalize_extension(ext):
-        raise HTTPException(
-            status_code=400,
-            detail=(
-                f"Formato '.{ext}' no soportado. "
-                f"Formatos válidos: {', '.join(e.upper() for e in SUPPORTED_EXTENSIONS)}"
-            ),
-        )
+    _check_extension(file)
 
     service = DocumentService(db)
     response = await service.upload_and_process(
@@ -71,8 +57,8 @@ async def upload_document(
         program=program,
         document_type=document_type,
     )
-    if response.status == "processing" and response.document_id:
-        _spawn_ingestion(response.document_id, "upload")
+    if response.status == "processing":
+        ingestion_queue.notify()
     return response
 
 
@@ -166,11 +152,31 @@ async def get_chunks(
 @router.post("/{document_id}/reindex", response_model=DocumentUploadResponse)
 async def reindex_document(
     document_id: UUID,
+    file: UploadFile | None = File(None),
     db: AsyncSession = Depends(get_db),
     admin: User = Depends(require_admin),
 ):
+    """Re-run ingestion; only chunks whose content changed are re-embedded.
+    An optional `file` replaces the stored original (e.g. a corrected
+    version) — same format check as /upload."""
+    if file is not None:
+        _check_extension(file)
     service = DocumentService(db)
-    response = await service.reindex(document_id)
-    if response.status == "processing" and response.document_id:
-        _spawn_ingestion(response.document_id, "reindex")
+    response = await service.reindex(document_id, file=file)
+    if response.status == "processing":
+        ingestion_queue.notify()
     return response
+
+
+@router.get("/{document_id}/job", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    document_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    admin: User = Depends(require_admin),
+):
+    """Status/progress of the document's most recent ingestion job (stage,
+    percent, attempts, last error, next retry) — see services/ingestion_queue.py."""
+    job = await ingestion_queue.latest_job(db, document_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No ingestion job for this document")
+    return job
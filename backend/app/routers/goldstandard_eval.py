@@ -11,6 +11,7 @@ from app.database import get_db, async_session
 from app.models.gold_eval_run import GoldEvalRun
 from app.models.user import User
 from app.auth import require_admin
+from app.config import settings
 from app.schemas.goldstandard_eval import GoldEvalRunSummary, GoldEvalRunDetail
 from app.services.goldstandard_eval_service import run_gold_comparison
 from app.providers.provider_factory import ProviderFactory
@@ -23,15 +24,18 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Strong references so GC doesn't collect an in-flight eval task (same
-# pattern as documents.py's _ingestion_tasks / rag_eval.py's _eval_tasks).
+# pattern as rag_eval.py's _eval_tasks).
 _eval_tasks: set[asyncio.Task] = set()
 
+_RETRIEVAL_MODES = ("fused", "legacy", "questions")
 
-async def _run_and_store(run_id: UUID, file_bytes: bytes, k: int) -> None:
-    """Background task — a full run is 1 retrieval pass + 2 provider passes
-    (each with a real LLM generation + judge call) over the whole query bank,
-    easily minutes on CPU-only Ollama. Opens its own session since the
-    request-scoped one closes when POST /run returns.
+
+async def _run_and_store(run_id: UUID, file_bytes: bytes, k: int, compare_retrieval: bool = False) -> None:
+    """Background task — a full run is 1 retrieval pass (2 with
+    `compare_retrieval`) + 2 provider passes (each with a real LLM
+    generation + judge call) over the whole query bank, easily minutes on
+    CPU-only Ollama. Opens its own session since the request-scoped one
+    closes when POST /run returns.
     """
     async with async_session() as db:
         result = await db.execute(select(GoldEvalRun).where(GoldEvalRun.id == run_id))
@@ -51,10 +55,17 @@ async def _run_and_store(run_id: UUID, file_bytes: bytes, k: int) -> None:
                 ("ollama", runtime_config.resolve_model("ollama")),
                 ("openai", runtime_config.resolve_model("openai")),
             ]
-            comparison = await run_gold_comparison(db, file_bytes, k, providers)
+            modes = [settings.rag_retrieval_mode]
+            if compare_retrieval:
+                modes += [m for m in _RETRIEVAL_MODES if m != settings.rag_retrieval_mode]
+            comparison = await run_gold_comparison(db, file_bytes, k, providers, retrieval_modes=modes)
             run.total_queries = comparison.total_queries
             run.results = {
                 "retrieval": comparison.retrieval.__dict__,
+                "retrieval_mode": comparison.retrieval_mode,
+                "alternative_retrievals": {
+                    mode: summary.__dict__ for mode, summary in comparison.alternative_retrievals.items()
+                },
                 "generations": [g.__dict__ for g in comparison.generations],
             }
             run.status = "completed"
@@ -72,6 +83,10 @@ async def _run_and_store(run_id: UUID, file_bytes: bytes, k: int) -> None:
 async def start_gold_eval_run(
     file: UploadFile = File(...),
     k: int = 5,
+    # Also run retrieval under the other rag_retrieval_modes, for an A/B of
+    # fused (RRF) vs. legacy hybrid search vs. fused + doc2query questions on
+    # the same query bank.
+    compare_retrieval: bool = False,
     db: AsyncSession = Depends(get_db),
     _: User = Depends(require_admin),
 ):
@@ -92,7 +107,7 @@ async def start_gold_eval_run(
     await db.commit()
     await db.refresh(run)
 
-    task = asyncio.create_task(_run_and_store(run.id, file_bytes, k), name=f"gold-eval-{run.id}")
+    task = asyncio.create_task(_run_and_store(run.id, file_bytes, k, compare_retrieval), name=f"gold-eval-{run.id}")
     _eval_tasks.add(task)
     task.add_done_callback(_eval_tasks.discard)
 
@@ -166,6 +181,7 @@ def _compute_generation_stats(g: dict) -> dict:
 def _render_markdown_report(run: GoldEvalRun) -> str:
     r = run.results or {}
     retrieval = r.get("retrieval", {})
+    mode = r.get("retrieval_mode")
     lines = [
         f"# Evaluación GoldStandard — {run.created_at.strftime('%Y-%m-%d %H:%M')} UTC",
         "",
@@ -173,6 +189,7 @@ def _render_markdown_report(run: GoldEvalRun) -> str:
         "",
         "## Retrieval (independiente del proveedor de generación)",
         "",
+        *([f"Modo de recuperación: `{mode}`", ""] if mode else []),
         "| Métrica | Valor |",
         "|---|---|",
         f"| Precision@{run.k} | {retrieval.get('mean_precision_at_k', 0):.3f} |",
@@ -183,6 +200,27 @@ def _render_markdown_report(run: GoldEvalRun) -> str:
         f"| Tiempo promedio de retrieval (ms) | {retrieval.get('avg_retrieval_ms', 0):.0f} |",
         f"| Casos con error (búsqueda falló, excluidos de las métricas) | {retrieval.get('error_cases', 0)} |",
         "",
+    ]
+    alternatives = r.get("alternative_retrievals") or {}
+    if alternatives:
+        columns = {mode or "actual": retrieval, **alternatives}
+        lines += [
+            "## Retrieval A/B por modo de recuperación",
+            "",
+            "| Métrica | " + " | ".join(columns) + " |",
+            "|---|" + "|".join(["---"] * len(columns)) + "|",
+        ]
+        for label, key, fmt in (
+            (f"Precision@{run.k}", "mean_precision_at_k", "{:.3f}"),
+            (f"Recall@{run.k}", "mean_recall_at_k", "{:.3f}"),
+            ("MRR", "mrr", "{:.3f}"),
+            ("Hit rate", "hit_rate", "{:.3f}"),
+            ("Tiempo promedio de retrieval (ms)", "avg_retrieval_ms", "{:.0f}"),
+            ("Casos con error", "error_cases", "{}"),
+        ):
+            lines.append(f"| {label} | " + " | ".join(fmt.format(s.get(key, 0)) for s in columns.values()) + " |")
+        lines.append("")
+    lines += [
         "## Comparación de generación: Ollama vs OpenAI",
         "",
         "| Métrica | " + " | ".join(g.get("provider", "") for g in r.get("generations", [])) + " |",
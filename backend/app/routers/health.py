@@ -1,15 +1,19 @@
 import time
 from datetime import datetime, timezone
 
-import httpx
 from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.services.embedding_store import embedding_store
 from app.config import settings
 from app.schemas.common import HealthResponse, HealthServiceStatus
 from app.utils.cache import rag_cache, embedding_cache
+from app.utils.http_pool import ollama_http_pool
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from app.utils.single_flight import answer_flight, embed_flight, search_flight
 
 router = APIRouter()
 
@@ -31,13 +35,12 @@ async def health_check(db: AsyncSession = Depends(get_db)):
     # Ollama
     try:
         start = time.time()
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            resp = await client.get(f"{settings.ollama_base_url}/api/tags")
-            latency = round((time.time() - start) * 1000, 1)
-            if resp.status_code == 200:
-                services["ollama"] = HealthServiceStatus(status="healthy", latency_ms=latency)
-            else:
-                services["ollama"] = HealthServiceStatus(status="unhealthy")
+        resp = await ollama_http_pool.get(f"{settings.ollama_base_url}/api/tags", timeout=5.0)
+        latency = round((time.time() - start) * 1000, 1)
+        if resp.status_code == 200:
+            services["ollama"] = HealthServiceStatus(status="healthy", latency_ms=latency)
+        else:
+            services["ollama"] = HealthServiceStatus(status="unhealthy")
     except Exception:
         services["ollama"] = HealthServiceStatus(status="unhealthy")
 
@@ -52,21 +55,36 @@ async def health_check(db: AsyncSession = Depends(get_db)):
     )
 
 
+_COUNTED_TABLES = ("documents", "document_chunks", "conversations", "messages", "embedding_store")
+
+
+async def _estimated_row_counts(db: AsyncSession) -> dict[str, int | None]:
+    """Planner row estimates from pg_class — a catalog lookup instead of a
+    sequential scan per table on every scrape. Kept current by autovacuum's
+    ANALYZE; None for a table never analyzed yet (reltuples = -1)."""
+    try:
+        rows = (await db.execute(
+            text(
+                "SELECT relname, reltuples::bigint AS n FROM pg_class "
+                "WHERE relkind = 'r' AND relname = ANY(:tables) "
+                "AND relnamespace = 'public'::regnamespace"
+            ),
+            {"tables": list(_COUNTED_TABLES)},
+        )).fetchall()
+    except Exception:
+        return {}
+    return {r.relname: (int(r.n) if r.n >= 0 else None) for r in rows}
+
+
 @router.get("/metrics")
 async def metrics(db: AsyncSession = Depends(get_db)):
-    """Observable pipeline metrics: cache stats, vector index info, DB counts."""
+    """Observable pipeline metrics: cache stats, vector index info, DB row
+    estimates. Human-readable JSON; Prometheus scrapes /metrics/prometheus."""
     # Cache stats
     rag_entries = rag_cache.size()   # -1 means Redis backend (count unknown without SCAN)
-    emb_entries = len(embedding_cache._store)
+    emb_entries = embedding_cache.size()
 
-    # DB counts
-    counts: dict = {}
-    try:
-        for table in ("documents", "document_chunks", "conversations", "messages"):
-            row = await db.execute(text(f"SELECT COUNT(*) FROM {table}"))
-            counts[table] = row.scalar()
-    except Exception:
-        pass
+    counts = await _estimated_row_counts(db)
 
     # Vector index presence
     index_exists = False
@@ -84,9 +102,31 @@ async def metrics(db: AsyncSession = Depends(get_db)):
         "cache": {
             "rag_entries": rag_entries,
             "embedding_entries": emb_entries,
+            "rag": rag_cache.stats(),
+            "embedding": embedding_cache.stats(),
+            "embedding_store": await embedding_store.stats(db),
+        },
+        "ollama_pool": ollama_http_pool.stats(),
+        "single_flight": {
+            f.name: f.stats() for f in (search_flight, embed_flight, answer_flight)
         },
         "database": counts,
         "vector_index": {
             "hnsw_index_present": index_exists,
         },
     }
+
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def metrics_prometheus(db: AsyncSession = Depends(get_db)):
+    """Prometheus text exposition of app.utils.metrics.REGISTRY plus DB row
+    estimates. Per worker — see the note in utils/metrics.py."""
+    counts = await _estimated_row_counts(db)
+    rows = ("db_rows_estimated", "gauge", "pg_class.reltuples row estimate.", [
+        ({"table": table}, n) for table, n in counts.items()
+    ])
+    store = await embedding_store.stats(db)
+    store_bytes = ("embedding_store_bytes", "gauge", "embedding_store size on disk, indexes and TOAST included.", [
+        ({}, store["bytes"]),
+    ])
+    return PlainTextResponse(REGISTRY.render([rows, store_bytes]), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -19,7 +19,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Strong references so GC doesn't collect an in-flight eval task (same
-# pattern as documents.py's _ingestion_tasks).
+# pattern as app.main._pull_tasks).
 _eval_tasks: set[asyncio.Task] = set()
 
 
@@ -50,3 +50,22 @@ class ChunkResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True, "populate_by_name": True}
+
+
+class IngestionJobResponse(BaseModel):
+    id: UUID
+    document_id: UUID
+    kind: str
+    status: str
+    stage: str | None
+    progress: int
+    attempts: int
+    max_attempts: int
+    last_error: str | None
+    result: dict | None = None
+    run_after: datetime
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    model_config = {"from_attributes": True}
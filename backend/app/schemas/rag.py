@@ -24,6 +24,10 @@ class SearchRequest(BaseModel):
     # compares it against multiple generation providers) should pass a fixed
     # value explicitly.
     hyde_provider_override: str | None = None
+    # "fused" | "legacy" | "questions" — None follows
+    # `settings.rag_retrieval_mode`. Lets the GoldStandard eval run the
+    # retrieval paths side by side.
+    retrieval_mode: str | None = None
 
 
 class SearchResultItem(BaseModel):
@@ -34,6 +38,9 @@ class SearchResultItem(BaseModel):
     program: str | None
     faculty: str | None
     metadata: dict | None
+    # Optional so RAG-cache entries serialized before this field existed
+    # still validate; used to tag cache entries for targeted invalidation.
+    document_id: UUID | None = None
 
 
 class SearchResponse(BaseModel):
@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import json
 import logging
 import random
@@ -11,6 +12,7 @@ from uuid import UUID
 from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import async_session
 from app.models.conversation import Conversation
 from app.models.message import Message
 from app.models.document import Document
@@ -34,7 +36,11 @@ from app.utils.prompts import (
 from app.utils.query_utils import (
     detect_temperature, is_greeting, is_varying_topic_query, mentions_entity,
 )
-from app.utils.cache import answer_cache, suggestion_cache, program_list_cache, program_alias_cache
+from app.utils.cache import (
+    answer_cache, cache_tags, suggestion_cache, program_list_cache, program_alias_cache,
+)
+from app.utils.single_flight import answer_flight, coalesce_key, embed_flight
+from app.utils.tracing import StageTrace, current_trace, span, start_trace
 from app.runtime_config import runtime_config
 from app.config import settings
 from app.providers.provider_factory import ProviderFactory
@@ -85,6 +91,29 @@ class _RAGContext:
     search_ms: int
 
 
+@dataclass
+class _PreparedContext:
+    query_embedding: list[float] | None
+    cached: dict | None
+    greeting: bool
+    history: list[LLMMessage]
+    is_followup: bool
+    rag_ctx: _RAGContext | None   # None on an answer-cache hit
+    trace: StageTrace
+
+
+@dataclass
+class _Reply:
+    content: str
+    provider_name: str
+    model_name: str
+    tokens_used: int | None
+    finish_reason: str | None
+    verification_attempts: int | None = None
+    verification_approved: bool | None = None
+    verification_reason: str | None = None
+
+
 class ChatService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -272,7 +301,7 @@ class ChatService:
         4000→20000 chars — that made the generated "RESUMEN DE MATERIAS POR
         SEMESTRE" summary long enough to itself span 2-3 chunks once
         prepended to the document (`document_service.py`'s
-        `_build_enriched_text`), pushing the original "Primer ciclo de
+        `_document_chunks`), pushing the original "Primer ciclo de
         formación: ..." intro line out of chunk 0 for every reindexed
         curriculum doc — confirmed via re-run of the 9-query GoldStandard
         smoke test still failing GS-007/GS-009 after this alias logic had
@@ -373,6 +402,7 @@ class ChatService:
         sources_payload = [
             {
                 "chunk_id": str(r.chunk_id),
+                "document_id": str(r.document_id) if r.document_id else None,
                 "document_title": r.document_title,
                 "content_preview": r.content[:200],
                 "score": r.score,
@@ -405,6 +435,16 @@ class ChatService:
             search_ms=search_results.search_time_ms,
         )
 
+    @staticmethod
+    def _answer_cache_tags(rag_ctx: "_RAGContext") -> set[str]:
+        """Invalidation tags for a cached answer: every document/program in
+        the context the LLM was given, not just the ones it ended up citing —
+        an edit to an uncited fragment can still change what it would say."""
+        return cache_tags(
+            document_ids={s["document_id"] for s in rag_ctx.sources_payload},
+            programs={s["program"] for s in rag_ctx.sources_payload},
+        )
+
     _CITATION_RE = re.compile(r"\[(\d{1,2})\]")
 
     def _filter_cited_sources(
@@ -474,9 +514,14 @@ class ChatService:
         """
         try:
             provider = ProviderFactory.get_provider("ollama")
-            result = await asyncio.wait_for(
-                provider.embed([query], model=settings.answer_cache_embedding_model),
-                timeout=settings.answer_cache_embed_timeout_seconds,
+            model = settings.answer_cache_embedding_model
+            # Concurrent identical questions share one embedding call.
+            result, _ = await embed_flight.do(
+                coalesce_key(query, model=model),
+                lambda: asyncio.wait_for(
+                    provider.embed([query], model=model),
+                    timeout=settings.answer_cache_embed_timeout_seconds,
+                ),
             )
             return result["embeddings"][0]
         except Exception as e:
@@ -504,6 +549,203 @@ class ChatService:
         cached = await answer_cache.find_similar(embedding, query_text=query)
         return embedding, cached
 
+    async def _run_rag_isolated(self, query: str) -> _RAGContext:
+        """_run_rag on its own DB session, so it can run concurrently with
+        work on self.db (an AsyncSession can't serve two tasks at once).
+        Commits its own RetrievalLog row; a cancelled run rolls it back."""
+        async with async_session() as db:
+            rag_ctx = await ChatService(db)._run_rag(query)
+            await db.commit()
+        return rag_ctx
+
+    @staticmethod
+    async def _spanned(stage: str, coro):
+        with span(stage):
+            return await coro
+
+    async def _prepare_context(
+        self, conversation_id: UUID, user_message_id: UUID, content: str
+    ) -> _PreparedContext:
+        """Everything before generation: answer-cache lookup, history, RAG.
+
+        Sequential mode does them in that order, so every cache miss pays the
+        cache-embedding latency (up to answer_cache_embed_timeout_seconds)
+        before retrieval even starts. Speculative mode
+        (`chat_speculative_retrieval`) starts the cache lookup and the history
+        fetch together, starts retrieval as soon as history resolves the
+        retrieval query (follow-ups need it), and cancels retrieval if the
+        cache hits. A miss then costs max(cache, history + rag) instead of the
+        sum; a hit wastes at most a partial search, which is cheap next to
+        generation.
+
+        Stage spans (answer_cache, history, rag, prepare — the wall-clock time
+        to a ready context) go to the message's trace (utils/tracing.py);
+        with overlap, the stage sum minus prepare_ms is the latency saved.
+        """
+        trace = current_trace() or start_trace()
+        trace.flag("speculative", settings.chat_speculative_retrieval)
+        greeting = is_greeting(content)
+
+        def resolve(history: list[LLMMessage]) -> tuple[bool, str]:
+            if greeting:
+                return False, content
+            return self._resolve_followup_query(history, content)
+
+        with span("prepare"):
+            if not settings.chat_speculative_retrieval:
+                with span("answer_cache"):
+                    query_embedding, cached = await self._check_answer_cache(content)
+                history, is_followup, rag_ctx = [], False, None
+                if cached is None:
+                    with span("history"):
+                        history = await self._get_history(conversation_id, user_message_id)
+                    is_followup, retrieval_query = resolve(history)
+                    if greeting:
+                        rag_ctx = self._empty_rag_ctx()
+                    else:
+                        with span("rag"):
+                            rag_ctx = await self._run_rag(retrieval_query)
+                return _PreparedContext(
+                    query_embedding, cached, greeting, history, is_followup, rag_ctx, trace,
+                )
+
+            cache_task = asyncio.create_task(
+                self._spanned("answer_cache", self._check_answer_cache(content))
+            )
+            rag_task: asyncio.Task | None = None
+            try:
+                with span("history"):
+                    history = await self._get_history(conversation_id, user_message_id)
+                is_followup, retrieval_query = resolve(history)
+                if not greeting:
+                    rag_task = asyncio.create_task(
+                        self._spanned("rag", self._run_rag_isolated(retrieval_query))
+                    )
+
+                query_embedding, cached = await cache_task
+                if cached is not None:
+                    if rag_task is not None:
+                        rag_task.cancel()
+                        rag_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                        trace.flag("rag_cancelled", True)
+                    rag_ctx = None
+                else:
+                    rag_ctx = await rag_task if rag_task is not None else self._empty_rag_ctx()
+            except BaseException:
+                for task in (cache_task, rag_task):
+                    if task is not None and not task.done():
+                        task.cancel()
+                raise
+
+        return _PreparedContext(
+            query_embedding, cached, greeting, history, is_followup, rag_ctx, trace,
+        )
+
+    async def _generate_reply(
+        self,
+        messages: list[LLMMessage],
+        rag_ctx: "_RAGContext",
+        provider_name: str,
+        requested_model: str | None,
+        temperature: float,
+    ) -> _Reply:
+        """Produce the final answer: the verification loop when RAG context is
+        good (and the loop is enabled), a single generate() call otherwise."""
+        if rag_ctx.quality == "good" and settings.verification_loop_enabled:
+            # Self-correction loop (LangGraph): generate -> grade against
+            # rag_ctx.context_text -> retry if ungrounded. See
+            # app/services/verification_graph.py for why this only runs
+            # here (RAG returned context) and not for greetings/refusals.
+            model_name = requested_model or runtime_config.resolve_model(provider_name)
+            verified = await generate_verified(
+                messages=[{"role": m.role, "content": m.content} for m in messages],
+                context_text=rag_ctx.context_text,
+                provider_name=provider_name,
+                model=model_name,
+                temperature=temperature,
+                max_tokens=runtime_config.default_max_tokens,
+            )
+            return _Reply(
+                # The grader itself flagged every attempt as ungrounded —
+                # serve the fixed refusal instead of a known-hallucinated
+                # draft (previously this shipped the draft anyway).
+                content=(
+                    verified["content"] if verified["approved"]
+                    else build_no_context_answer(verification_exhausted=True)
+                ),
+                provider_name=provider_name,
+                model_name=model_name,
+                tokens_used=verified["tokens_used"]["total"] if verified["tokens_used"] else None,
+                finish_reason=verified["finish_reason"],
+                verification_attempts=verified["attempts"],
+                verification_approved=verified["approved"],
+                verification_reason=verified.get("grade_reason"),
+            )
+
+        llm_response = await LLMService().generate(
+            GenerateRequest(
+                messages=messages,
+                provider=provider_name,
+                model=requested_model,
+                temperature=temperature,
+            )
+        )
+        return _Reply(
+            content=llm_response.content,
+            provider_name=llm_response.provider,
+            model_name=llm_response.model,
+            tokens_used=llm_response.tokens_used.total if llm_response.tokens_used else None,
+            finish_reason=llm_response.finish_reason,
+        )
+
+    async def _coalesced_reply(
+        self,
+        query: str,
+        query_embedding: list[float] | None,
+        standalone: bool,
+        messages: list[LLMMessage],
+        rag_ctx: "_RAGContext",
+        provider_name: str,
+        requested_model: str | None,
+        temperature: float,
+    ) -> tuple[_Reply, bool]:
+        """_generate_reply() behind the answer single-flight: identical
+        concurrent questions over the same retrieved context get one
+        generation (+ verification). Returns (reply, computed) — see
+        SingleFlight.do.
+
+        Only standalone questions coalesce. History still goes into each
+        caller's prompt, but the answer cache already treats a standalone
+        question's answer as history-independent (any later asker gets it),
+        so sharing it a few seconds earlier changes nothing; a follow-up's
+        answer genuinely depends on its own conversation and never shares.
+        """
+        generate = lambda: self._generate_reply(  # noqa: E731
+            messages, rag_ctx, provider_name, requested_model, temperature,
+        )
+        if not standalone:
+            return await generate(), True
+
+        recheck = None
+        if query_embedding is not None and settings.answer_cache_enabled:
+            async def recheck() -> _Reply | None:
+                entry = await answer_cache.find_similar(query_embedding, query_text=query)
+                if entry is None:
+                    return None
+                return _Reply(
+                    content=entry["answer"], provider_name=entry["llm_provider"],
+                    model_name=entry["llm_model"], tokens_used=None, finish_reason=None,
+                )
+
+        key = coalesce_key(
+            query,
+            context=hashlib.sha256(rag_ctx.context_text.encode()).hexdigest(),
+            provider=provider_name,
+            model=requested_model,
+            temperature=temperature,
+        )
+        return await answer_flight.do(key, generate, recheck=recheck)
+
     _AMBIGUITY_SCORE_MARGIN = 0.15
 
     @staticmethod
@@ -731,6 +973,7 @@ class ChatService:
         self, conversation_id: UUID, data: MessageCreate
     ) -> ChatResponse:
         t0 = time.time()
+        trace = start_trace()
 
         user_message = Message(
             conversation_id=conversation_id,
@@ -739,9 +982,11 @@ class ChatService:
             input_type=data.input_type,
         )
         self.db.add(user_message)
-        await self.db.flush()
+        with span("db_flush"):
+            await self.db.flush()
 
-        query_embedding, cached = await self._check_answer_cache(data.content)
+        prepared = await self._prepare_context(conversation_id, user_message.id, data.content)
+        query_embedding, cached = prepared.query_embedding, prepared.cached
         verification_attempts: int | None = None
         verification_approved: bool | None = None
         ambiguity: tuple[str, list[str]] | None = None
@@ -755,13 +1000,8 @@ class ChatService:
             source_infos = [SourceInfo(**s) for s in sources_payload]
             tokens_used = None
         else:
-            greeting = is_greeting(data.content)
-            history = await self._get_history(conversation_id, user_message.id)
-            is_followup, retrieval_query = (
-                (False, data.content) if greeting
-                else self._resolve_followup_query(history, data.content)
-            )
-            rag_ctx = self._empty_rag_ctx() if greeting else await self._run_rag(retrieval_query)
+            greeting, history = prepared.greeting, prepared.history
+            is_followup, rag_ctx = prepared.is_followup, prepared.rag_ctx
             self.last_rag_context_text = rag_ctx.context_text
             provider_name = data.llm_provider or runtime_config.default_llm_provider
 
@@ -798,53 +1038,26 @@ class ChatService:
                 temperature = detect_temperature(data.content, default=runtime_config.default_temperature)
 
                 quality = rag_ctx.quality
-                finish_reason: str | None
-                if quality == "good" and settings.verification_loop_enabled:
-                    # Self-correction loop (LangGraph): generate -> grade against
-                    # rag_ctx.context_text -> retry if ungrounded. See
-                    # app/services/verification_graph.py for why this only runs
-                    # here (RAG returned context) and not for greetings/refusals.
-                    model_name = data.llm_model or runtime_config.resolve_model(provider_name)
-                    verified = await generate_verified(
-                        messages=[{"role": m.role, "content": m.content} for m in messages],
-                        context_text=rag_ctx.context_text,
-                        provider_name=provider_name,
-                        model=model_name,
-                        temperature=temperature,
-                        max_tokens=runtime_config.default_max_tokens,
+                with span("generate"):
+                    reply, computed = await self._coalesced_reply(
+                        data.content, query_embedding, not greeting and not is_followup,
+                        messages, rag_ctx, provider_name, data.llm_model, temperature,
                     )
-                    finish_reason = verified["finish_reason"]
-                    tokens_used = verified["tokens_used"]["total"] if verified["tokens_used"] else None
-                    verification_attempts = verified["attempts"]
-                    verification_approved = verified["approved"]
-                    self.last_verification_reason = verified.get("grade_reason")
-                    if verified["approved"]:
-                        content = verified["content"]
-                    else:
-                        # The grader itself flagged every attempt as ungrounded —
-                        # serve the fixed refusal instead of a known-hallucinated
-                        # draft (previously this shipped the draft anyway).
-                        logger.warning(
-                            "Verification loop exhausted retries without approval — serving fixed "
-                            "refusal instead | conv=%s | attempts=%d",
-                            conversation_id, verified["attempts"],
-                        )
-                        content = build_no_context_answer(verification_exhausted=True)
-                else:
-                    llm_service = LLMService()
-                    llm_response = await llm_service.generate(
-                        GenerateRequest(
-                            messages=messages,
-                            provider=provider_name,
-                            model=data.llm_model,
-                            temperature=temperature,
-                        )
+                content = reply.content
+                provider_name = reply.provider_name
+                model_name = reply.model_name
+                tokens_used = reply.tokens_used
+                finish_reason = reply.finish_reason
+                verification_attempts = reply.verification_attempts
+                verification_approved = reply.verification_approved
+                if reply.verification_approved is not None:
+                    self.last_verification_reason = reply.verification_reason
+                if reply.verification_approved is False:
+                    logger.warning(
+                        "Verification loop exhausted retries without approval — serving fixed "
+                        "refusal instead | conv=%s | attempts=%d",
+                        conversation_id, reply.verification_attempts,
                     )
-                    content = llm_response.content
-                    provider_name = llm_response.provider
-                    model_name = llm_response.model
-                    tokens_used = llm_response.tokens_used.total if llm_response.tokens_used else None
-                    finish_reason = llm_response.finish_reason
 
                 if finish_reason == "length":
                     logger.warning(
@@ -862,6 +1075,7 @@ class ChatService:
 
                 if (
                     settings.answer_cache_enabled
+                    and computed  # a coalesced reply was already stored by its leader
                     and query_embedding is not None
                     and quality == "good"
                     and content.strip()
@@ -876,6 +1090,7 @@ class ChatService:
                     await answer_cache.store(
                         query_embedding, data.content, content,
                         sources_payload, provider_name, model_name,
+                        tags=self._answer_cache_tags(rag_ctx),
                     )
 
         response_time = int((time.time() - t0) * 1000)
@@ -894,18 +1109,25 @@ class ChatService:
         )
         self.db.add(assistant_message)
 
-        await self._maybe_set_title(
-            conversation_id, data.content, content, provider_name,
-            use_llm_title=(cached is None and ambiguity is None),
-        )
+        with span("title"):
+            await self._maybe_set_title(
+                conversation_id, data.content, content, provider_name,
+                use_llm_title=(cached is None and ambiguity is None),
+            )
+        # Set while the row is still pending so it goes out in the INSERT.
+        # The commit can't time itself into its own row — it's logged below.
+        assistant_message.stage_timings = trace.as_dict()
+        commit_start = time.perf_counter()
         await self.db.commit()
+        commit_ms = int((time.perf_counter() - commit_start) * 1000)
         await self.db.refresh(user_message)
         await self.db.refresh(assistant_message)
 
         logger.info(
-            "Chat | conv=%s | provider=%s | model=%s | quality=%s | rag=%d | total_ms=%d",
+            "Chat | conv=%s | provider=%s | model=%s | quality=%s | rag=%d | total_ms=%d | "
+            "commit_ms=%d | stages=%s",
             conversation_id, provider_name, model_name,
-            quality, len(sources_payload), response_time,
+            quality, len(sources_payload), response_time, commit_ms, assistant_message.stage_timings,
         )
 
         return ChatResponse(
@@ -921,6 +1143,7 @@ class ChatService:
     ) -> AsyncIterator[str]:
         """Stream the assistant response via SSE."""
         t0 = time.time()
+        trace = start_trace()
 
         user_message = Message(
             conversation_id=conversation_id,
@@ -929,7 +1152,8 @@ class ChatService:
             input_type=data.input_type,
         )
         self.db.add(user_message)
-        await self.db.flush()
+        with span("db_flush"):
+            await self.db.flush()
 
         try:
             # SSE heartbeat comments (lines starting with ':') are valid SSE but
@@ -937,7 +1161,8 @@ class ChatService:
             # so Cloudflare/nginx don't close the connection thinking it's idle.
             yield ": thinking\n\n"
 
-            query_embedding, cached = await self._check_answer_cache(data.content)
+            prepared = await self._prepare_context(conversation_id, user_message.id, data.content)
+            query_embedding, cached = prepared.query_embedding, prepared.cached
             verification_attempts: int | None = None
             verification_approved: bool | None = None
             ambiguity: tuple[str, list[str]] | None = None
@@ -955,13 +1180,8 @@ class ChatService:
                 yield f"data: {json.dumps({'type': 'sources', 'sources': sources_payload})}\n\n"
                 yield f"data: {json.dumps({'type': 'token', 'content': full_content})}\n\n"
             else:
-                greeting = is_greeting(data.content)
-                history = await self._get_history(conversation_id, user_message.id)
-                is_followup, retrieval_query = (
-                    (False, data.content) if greeting
-                    else self._resolve_followup_query(history, data.content)
-                )
-                rag_ctx = self._empty_rag_ctx() if greeting else await self._run_rag(retrieval_query)
+                greeting, history = prepared.greeting, prepared.history
+                is_followup, rag_ctx = prepared.is_followup, prepared.rag_ctx
                 provider_name = data.llm_provider or runtime_config.default_llm_provider
 
                 if not greeting and not is_followup and settings.program_clarification_enabled:
@@ -1013,46 +1233,42 @@ class ChatService:
                     # Second heartbeat: Ollama on CPU can take 10-20 s before the first token
                     yield ": generating\n\n"
 
+                    computed = True
                     if rag_ctx.quality == "good" and settings.verification_loop_enabled:
                         # Self-correction loop (see verification_graph.py): grading needs
                         # the complete draft, so this path can't stream token-by-token —
                         # it sends the whole approved answer as one event, same as the
-                        # answer-cache hit above does.
-                        verified = await generate_verified(
-                            messages=messages_dicts,
-                            context_text=rag_ctx.context_text,
-                            provider_name=provider_name,
-                            model=model,
-                            temperature=temperature,
-                            max_tokens=runtime_config.default_max_tokens,
-                        )
-                        finish_reason = verified["finish_reason"]
-                        verification_attempts = verified["attempts"]
-                        verification_approved = verified["approved"]
-                        self.last_verification_reason = verified.get("grade_reason")
-                        if verified["approved"]:
-                            full_content = verified["content"]
-                        else:
-                            # The grader flagged every attempt as ungrounded —
-                            # send the fixed refusal instead of a known-hallucinated
-                            # draft (previously this streamed the draft anyway).
+                        # answer-cache hit above does. Being whole-answer anyway, it's
+                        # also the streaming path that can coalesce (_coalesced_reply).
+                        with span("generate"):
+                            reply, computed = await self._coalesced_reply(
+                                data.content, query_embedding, not greeting and not is_followup,
+                                messages, rag_ctx, provider_name, model, temperature,
+                            )
+                        finish_reason = reply.finish_reason
+                        verification_attempts = reply.verification_attempts
+                        verification_approved = reply.verification_approved
+                        if reply.verification_approved is not None:
+                            self.last_verification_reason = reply.verification_reason
+                        if reply.verification_approved is False:
                             logger.warning(
                                 "Verification loop exhausted retries without approval — serving fixed "
                                 "refusal instead | conv=%s | attempts=%d",
-                                conversation_id, verified["attempts"],
+                                conversation_id, reply.verification_attempts,
                             )
-                            full_content = build_no_context_answer(verification_exhausted=True)
+                        full_content = reply.content
                         yield f"data: {json.dumps({'type': 'token', 'content': full_content})}\n\n"
                     else:
                         provider = ProviderFactory.get_provider(provider_name)
                         full_content = ""
                         stream_meta: dict = {}
-                        async for token in provider.generate_stream(
-                            messages_dicts, model, temperature, runtime_config.default_max_tokens,
-                            meta=stream_meta,
-                        ):
-                            full_content += token
-                            yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
+                        with span("generate"):
+                            async for token in provider.generate_stream(
+                                messages_dicts, model, temperature, runtime_config.default_max_tokens,
+                                meta=stream_meta,
+                            ):
+                                full_content += token
+                                yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
                         finish_reason = stream_meta.get("finish_reason")
 
                     if finish_reason == "length":
@@ -1084,6 +1300,7 @@ class ChatService:
                     # semantically-similar question instead of just this one reply.
                     if (
                         settings.answer_cache_enabled
+                        and computed
                         and query_embedding is not None
                         and quality == "good"
                         and full_content.strip()
@@ -1092,6 +1309,7 @@ class ChatService:
                         await answer_cache.store(
                             query_embedding, data.content, full_content,
                             sources_payload, provider_name, model,
+                            tags=self._answer_cache_tags(rag_ctx),
                         )
 
             response_time = int((time.time() - t0) * 1000)
@@ -1109,19 +1327,24 @@ class ChatService:
             )
             self.db.add(assistant_message)
 
-            await self._maybe_set_title(
-                conversation_id, data.content, full_content, provider_name,
-                use_llm_title=(cached is None and ambiguity is None),
-            )
+            with span("title"):
+                await self._maybe_set_title(
+                    conversation_id, data.content, full_content, provider_name,
+                    use_llm_title=(cached is None and ambiguity is None),
+                )
+            # See process_message: pending row, so this rides the INSERT.
+            assistant_message.stage_timings = trace.as_dict()
+            commit_start = time.perf_counter()
             await self.db.commit()
+            commit_ms = int((time.perf_counter() - commit_start) * 1000)
             await self.db.refresh(user_message)
             await self.db.refresh(assistant_message)
 
             logger.info(
                 "Chat stream | conv=%s | provider=%s | model=%s | quality=%s | "
-                "rag=%d | total_ms=%d",
+                "rag=%d | total_ms=%d | commit_ms=%d | stages=%s",
                 conversation_id, provider_name, model,
-                quality, rag_count, response_time,
+                quality, rag_count, response_time, commit_ms, assistant_message.stage_timings,
             )
 
             done_payload = {
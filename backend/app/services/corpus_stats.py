@@ -0,0 +1,131 @@
+"""
+Corpus statistics for BM25 reranking: document frequency per term, chunk
+count and average chunk length.
+
+The source of truth is Postgres — `corpus_terms` (term → df) plus
+`document_chunks.term_count` — kept current incrementally: `add_chunks()`
+and `remove_chunks()`/`remove_document()` run set-based upserts in the same
+transaction that writes or deletes the chunks, so the statistics commit or
+roll back with them.
+
+`RAGService._rerank` needs idf for a handful of query terms per search, so
+each worker holds a copy in memory (`df` dict) and reloads it every
+`bm25_stats_refresh_seconds`, or on its next use after `mark_stale()` (this
+worker just changed the corpus). Statistics a few minutes old move idf by a
+rounding error; what matters is that scoring stays a dict lookup.
+"""
+
+import asyncio
+import logging
+import time
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.corpus_term import CorpusTerm
+from app.models.document_chunk import DocumentChunk
+from app.utils import bm25
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Signed df deltas for the terms of the chunks matched by {where}. ORDER BY
+# term makes concurrent ingestions lock corpus_terms rows in the same order
+# — without it two workers upserting overlapping vocabularies can deadlock.
+_APPLY_DF_DELTA = """
+    INSERT INTO corpus_terms (term, df)
+    SELECT t.term, :sign * count(*)
+    FROM document_chunks dc, jsonb_object_keys(dc.term_freqs) AS t(term)
+    WHERE {where}
+    GROUP BY t.term
+    ORDER BY t.term
+    ON CONFLICT (term) DO UPDATE SET df = corpus_terms.df + excluded.df
+"""
+
+
+class CorpusStats:
+    def __init__(self):
+        self.df: dict[str, int] = {}
+        self.chunks = 0
+        self.avgdl = 0.0
+        self.reloads = 0
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self) -> None:
+        self._loaded_at = float("-inf")
+
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._loaded_at < settings.bm25_stats_refresh_seconds
+
+    async def ensure_fresh(self) -> None:
+        if self._fresh():
+            return
+        async with self._lock:
+            if self._fresh():
+                return
+            try:
+                await self._load()
+            except Exception as e:
+                # Keep scoring with what we have (empty → idf is uniform,
+                # plain tf saturation); retry after the interval, not per query.
+                logger.warning("Corpus statistics reload failed: %s", e)
+            self._loaded_at = time.monotonic()
+
+    async def _load(self) -> None:
+        async with async_session() as db:
+            rows = (await db.execute(
+                select(CorpusTerm.term, CorpusTerm.df).where(CorpusTerm.df > 0)
+            )).all()
+            chunks, avgdl = (await db.execute(
+                select(func.count(), func.avg(DocumentChunk.term_count))
+                .where(DocumentChunk.term_count.is_not(None))
+            )).one()
+        self.df = {term: df for term, df in rows}
+        self.chunks = chunks
+        self.avgdl = float(avgdl or 0.0)
+        self.reloads += 1
+
+    def query_weights(self, query: str) -> dict[str, float]:
+        """Distinct query terms → idf, the `query_terms` bm25.score() takes."""
+        return {t: bm25.idf(self.df.get(t, 0), self.chunks) for t in set(bm25.terms(query))}
+
+    # ── Maintenance (caller's transaction; caller marks stale after commit) ──
+
+    async def add_chunks(self, db: AsyncSession, chunk_ids: list[UUID]) -> None:
+        if chunk_ids:
+            await db.execute(
+                text(_APPLY_DF_DELTA.format(where="dc.id = ANY(:ids)")),
+                {"ids": chunk_ids, "sign": 1},
+            )
+
+    async def remove_chunks(self, db: AsyncSession, chunk_ids: list[UUID]) -> None:
+        """Before deleting the rows — their term_freqs are what gets subtracted."""
+        if chunk_ids:
+            await db.execute(
+                text(_APPLY_DF_DELTA.format(where="dc.id = ANY(:ids)")),
+                {"ids": chunk_ids, "sign": -1},
+            )
+
+    async def remove_document(self, db: AsyncSession, document_id: UUID) -> None:
+        """Before deleting the document (its chunks go with it by cascade)."""
+        await db.execute(
+            text(_APPLY_DF_DELTA.format(where="dc.document_id = :document_id")),
+            {"document_id": document_id, "sign": -1},
+        )
+
+
+corpus_stats = CorpusStats()
+
+
+@REGISTRY.collector
+def _collect_corpus_stats_metrics():
+    yield "bm25_corpus_terms", "gauge", "Distinct terms in this worker's BM25 statistics.", [
+        ({}, len(corpus_stats.df)),
+    ]
+    yield "bm25_stats_reloads", "counter", "BM25 corpus statistics reloads.", [
+        ({}, corpus_stats.reloads),
+    ]
@@ -1,24 +1,33 @@
-import base64
+import asyncio
+import contextlib
 import hashlib
+import json
 import logging
 import math
 import os
 import re
-from uuid import UUID
-
-import httpx
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Awaitable, Callable
+from uuid import UUID, uuid4
 
 from fastapi import UploadFile
-from sqlalchemy import select, delete, desc, func
+from sqlalchemy import select, delete, desc, func, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.database import copy_records
 from app.models.document import Document
 from app.models.document_chunk import DocumentChunk
 from app.schemas.document import DocumentUploadResponse
-from app.utils.file_parsers import extract_text, normalize_extension
-from app.utils.text_processing import clean_text, normalize_for_match
-from app.utils.chunking import chunk_text, chunk_tabular_text
-from app.utils.cache import rag_cache, answer_cache
+from app.utils import simhash
+from app.utils.bm25 import term_frequencies
+from app.utils.file_parsers import normalize_extension
+from app.utils.text_processing import normalize_for_match
+from app.utils.parse_pool import parse_pool
+from app.utils.cache import rag_cache, answer_cache, cache_tags
+from app.utils.http_pool import ollama_http_pool
+from app.services.ingestion_queue import ingestion_queue, new_job
+from app.services.corpus_stats import corpus_stats
 from app.services.llm_service import LLMService
 from app.schemas.llm import EmbedRequest
 from app.config import settings
@@ -44,6 +53,79 @@ _SEMESTER_LINE_RE = re.compile(r"^(SEMESTRE\s+\d+)\s*:\s*(.+)$", re.IGNORECASE)
 # (up to ~22,000 chars) almost completely.
 _ENRICHMENT_INPUT_CHARS = 20000
 
+# Pages of a PDF rendered for the vision model (`_extract_pdf_with_vision`).
+_VISION_PAGES = 4
+
+# Chunk batches extracted ahead of the embedder in `process_document`:
+# enough that extraction never waits on a slow embedding call, few enough
+# that a long PDF can't pile up in memory while Ollama is busy with chat.
+_PIPELINE_DEPTH = 2
+
+# Read size for spooling an upload to disk (`_spool_upload`).
+_UPLOAD_READ_BYTES = 1024 * 1024
+
+# Column order of the records `_index_chunks` COPYs into document_chunks.
+_CHUNK_COLUMNS = (
+    "id", "document_id", "chunk_index", "content", "token_count", "embedding",
+    "content_hash", "embedding_model", "metadata", "created_at",
+    "term_freqs", "term_count", "simhash",
+)
+
+# Fills `content_tsv` for a document's chunks that don't have one yet (COPY
+# can't evaluate expressions). Weights feed ts_rank_cd: the document title
+# (A) and the "=== HOJA: X ===" / "=== DIAPOSITIVA N ===" header
+# chunk_tabular_text repeats at the top of each chunk (B) outrank body text
+# (D). Kept in sync with migration c0d1e2f3a4b5's backfill.
+_FILL_CHUNK_TSV = text("""
+    UPDATE document_chunks dc
+    SET content_tsv =
+        setweight(to_tsvector('spanish', coalesce(d.title, '')), 'A')
+        || setweight(to_tsvector('spanish', coalesce(
+               substring(dc.content FROM '^=== (?:HOJA: )?([^=]+) ==='), '')), 'B')
+        || setweight(to_tsvector('spanish', dc.content), 'D')
+    FROM documents d
+    WHERE d.id = dc.document_id
+      AND dc.document_id = :document_id
+      AND dc.content_tsv IS NULL
+""")
+
+# Below this many distinct words the extracted text layer can't vouch for a
+# curriculum summary (scanned/image-only PDF) — see _validate_curriculum_summary.
+_MIN_SOURCE_WORDS = 20
+
+
+@dataclass
+class IndexStats:
+    """What one ingestion run did. Returned by `process_document` and stored
+    on the job (`ingestion_jobs.result`) for the admin UI."""
+    chunks: int = 0      # chunks the document has now
+    reused: int = 0      # kept with their stored embedding (same content + model)
+    embedded: int = 0    # new or changed, embedded this run
+    removed: int = 0     # stored chunks no longer produced
+    collapsed: int = 0   # near-duplicates of an earlier chunk, not indexed (ingestion_dedup_enabled)
+    summary_reused: bool = False
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _chunk_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _source_words(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", normalize_for_match(text)))
+
+
+def _summary_block(summary: str) -> str:
+    if not summary:
+        return ""
+    return (
+        "=== RESUMEN DE MATERIAS POR SEMESTRE ===\n"
+        + summary
+        + "\n=== FIN DEL RESUMEN ===\n\n"
+    )
+
 
 def _looks_like_semester_summary(text: str) -> bool:
     """A bare `"SEMESTRE" in text` check also passes on a confused model just
@@ -63,10 +145,57 @@ def _looks_like_semester_summary(text: str) -> bool:
 _TABULAR_FILE_TYPES = {"xlsx", "xls", "csv", "pptx"}
 
 
+async def _spool_upload(file: UploadFile, upload_dir: str, max_bytes: int) -> tuple[str, int, str] | None:
+    """Copy an upload into `upload_dir` a block at a time, hashing as it goes.
+
+    Returns (temp path, size, sha256 hex), or None — with nothing left on
+    disk — once more than `max_bytes` have been read. The caller renames the
+    ".part" file to its final name when the document row exists. Peak memory
+    is one `_UPLOAD_READ_BYTES` block per upload instead of the whole file
+    (read once, then hashed, then written out again).
+    """
+    if file.size is not None and file.size > max_bytes:
+        return None
+    digest = hashlib.sha256()
+    size = 0
+    part_path = os.path.join(upload_dir, f".upload-{uuid4().hex}.part")
+    try:
+        with open(part_path, "wb") as out:
+            while block := await file.read(_UPLOAD_READ_BYTES):
+                size += len(block)
+                if size > max_bytes:
+                    break
+                # hashlib releases the GIL on large buffers; keep both off the loop.
+                await asyncio.to_thread(_absorb, out, digest, block)
+    except BaseException:
+        # open() itself may be what failed — don't mask that error.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(part_path)
+        raise
+    if size > max_bytes:
+        os.remove(part_path)
+        return None
+    return part_path, size, digest.hexdigest()
+
+
+def _absorb(out, digest, block: bytes) -> None:
+    digest.update(block)
+    out.write(block)
+
+
+async def _invalidate_document_caches(document_id: UUID, programs=()) -> None:
+    """Evict cached RAG results and answers that drew from this document or
+    are scoped to any of `programs` — everything else stays cached. See
+    cache_tags in utils/cache.py."""
+    tags = cache_tags(document_ids=[document_id], programs=programs)
+    await rag_cache.invalidate_tags(tags)
+    await answer_cache.invalidate_tags(tags)
+
+
 class DocumentService:
     def __init__(self, db: AsyncSession | None):
         # `db` is None only when constructed solely to call
-        # process_document_background(), which opens its own session.
+        # process_document(), which opens its own session.
         self.db = db
 
     # ── Private helpers ──────────────────────────────────────────────────────
@@ -81,16 +210,7 @@ class DocumentService:
         if not settings.ollama_vision_model:
             return ""
         try:
-            import fitz  # PyMuPDF
-
-            images_b64: list[str] = []
-            with fitz.open(file_path) as doc:
-                for page_num in range(min(4, len(doc))):
-                    page = doc[page_num]
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2.0, 2.0))
-                    img_b64 = base64.b64encode(pix.tobytes("png")).decode()
-                    images_b64.append(img_b64)
-
+            images_b64 = await parse_pool.render_pdf_pages(file_path, max_pages=_VISION_PAGES, zoom=2.0)
             if not images_b64:
                 return ""
 
@@ -117,22 +237,23 @@ class DocumentService:
             # correct answer in ~110 tokens with thinking off. 180s -> 400s
             # because even with thinking off, model load (~130s cold) + image
             # prompt-eval (~115s) on this CPU-only hardware eat most of the
-            # budget before generation (fast, ~9 tok/s) even starts.
-            async with httpx.AsyncClient(timeout=400.0) as client:
-                response = await client.post(
-                    f"{settings.ollama_base_url}/api/chat",
-                    json={
-                        "model": settings.ollama_vision_model,
-                        "messages": [{
-                            "role": "user",
-                            "content": prompt,
-                            "images": images_b64,
-                        }],
-                        "stream": False,
-                        "think": False,
-                        "options": {"temperature": 0.0, "num_predict": 1200},
-                    },
-                )
+            # budget before generation (fast, ~9 tok/s) even starts. Goes
+            # through the same shared pool as OllamaProvider (utils/http_pool.py).
+            response = await ollama_http_pool.post(
+                f"{settings.ollama_base_url}/api/chat",
+                timeout=400.0,
+                json={
+                    "model": settings.ollama_vision_model,
+                    "messages": [{
+                        "role": "user",
+                        "content": prompt,
+                        "images": images_b64,
+                    }],
+                    "stream": False,
+                    "think": False,
+                    "options": {"temperature": 0.0, "num_predict": 1200},
+                },
+            )
 
             if response.status_code != 200:
                 logger.warning("Vision model returned HTTP %s", response.status_code)
@@ -204,8 +325,8 @@ class DocumentService:
         no real text layer, which is exactly the case the vision-model fallback exists
         for; rejecting its output against near-empty text would defeat that fallback.
         """
-        raw_words = set(re.findall(r"[a-z0-9]+", normalize_for_match(raw_text)))
-        if len(raw_words) < 20:
+        raw_words = _source_words(raw_text)
+        if len(raw_words) < _MIN_SOURCE_WORDS:
             logger.info(
                 "Skipping curriculum summary validation - source text layer too sparse "
                 "(%d words) to cross-check, likely a scanned/image-only document",
@@ -246,41 +367,100 @@ class DocumentService:
 
         return "\n".join(kept_lines)
 
-    async def _build_enriched_text(self, file_path: str, file_type: str) -> str:
-        """Extract, clean, and optionally enrich document text with a structured summary.
+    async def _curriculum_summary(self, file_path: str, file_type: str, text: str) -> str:
+        """Validated "SEMESTRE N: ..." lines for a PDF/DOCX, or "".
+
+        `text` is what the summary is checked against — for a streamed PDF
+        only its first pages, which is all the vision model (first
+        `_VISION_PAGES` pages) or the enrichment LLM (first
+        `_ENRICHMENT_INPUT_CHARS`) was shown: a course name they read has
+        to be in there.
+        """
+        structured_summary = ""
+        if file_type == "pdf":
+            structured_summary = await self._extract_pdf_with_vision(file_path)
+        if not structured_summary:
+            structured_summary = await self._enrich_curriculum_text(text)
+
+        if structured_summary:
+            structured_summary = self._validate_curriculum_summary(structured_summary, text)
+        if structured_summary:
+            logger.info("Prepending structured curriculum summary to document text")
+        return structured_summary
+
+    @staticmethod
+    def _summary_key(document: Document, text: str) -> str:
+        """Hash of everything `_curriculum_summary` depends on: the models
+        involved and the source text — plus the file itself when that text is
+        too sparse to stand for the page images the vision model reads."""
+        from app.runtime_config import runtime_config
+
+        provider = runtime_config.default_llm_provider
+        parts = [
+            settings.ollama_vision_model if document.file_type == "pdf" else "",
+            provider,
+            runtime_config.resolve_model(provider),
+            text,
+        ]
+        if len(_source_words(text)) < _MIN_SOURCE_WORDS:
+            parts.append(document.content_hash or "")
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    async def _document_summary(self, document: Document, file_path: str, text: str, stats: IndexStats) -> str:
+        """The summary block to lead the document's text with. Reuses the one
+        stored on the document when its inputs are unchanged — a reindex of
+        the same first pages doesn't pay for another vision/LLM call, and
+        can't have a differently-worded summary defeat chunk reuse."""
+        key = self._summary_key(document, text)
+        if document.curriculum_summary_key == key:
+            stats.summary_reused = True
+            return _summary_block(document.curriculum_summary or "")
+        summary = await self._curriculum_summary(file_path, document.file_type, text)
+        document.curriculum_summary, document.curriculum_summary_key = summary, key
+        return _summary_block(summary)
+
+    async def _document_chunks(
+        self, document: Document, file_path: str, stats: IndexStats,
+    ) -> AsyncIterator[tuple[list[dict], float]]:
+        """Chunk batches for `process_document`, as (chunks, fraction done).
+
+        PDFs stream: the first pages are extracted for the curriculum summary,
+        then the rest of the document goes through the parse pool a page batch
+        at a time (`parse_pool.stream_pdf_chunks`), the summary and first pages
+        leading the first batch. Everything else is small enough (upload
+        limit, no page structure to stream) to extract and chunk in one piece.
 
         Curriculum enrichment (LLM call) is skipped for tabular formats (XLSX, XLS, CSV,
         PPTX, TXT) since they are unlikely to be academic pensum documents and the prompt
         is designed for paragraphic/grid PDF/DOCX content.
         """
-        raw_text = extract_text(file_path, file_type)
-        cleaned_text = clean_text(raw_text)
-
-        if file_type in ("pdf", "docx"):
-            structured_summary = ""
-            if file_type == "pdf":
-                structured_summary = await self._extract_pdf_with_vision(file_path)
-            if not structured_summary:
-                structured_summary = await self._enrich_curriculum_text(cleaned_text)
-
-            if structured_summary:
-                structured_summary = self._validate_curriculum_summary(structured_summary, cleaned_text)
-
-            if structured_summary:
-                logger.info("Prepending structured curriculum summary to document text")
-                cleaned_text = (
-                    "=== RESUMEN DE MATERIAS POR SEMESTRE ===\n"
-                    + structured_summary
-                    + "\n=== FIN DEL RESUMEN ===\n\n"
-                    + cleaned_text
-                )
-
-        return cleaned_text
+        file_type = document.file_type
+        if file_type != "pdf":
+            text = await parse_pool.extract_clean_text(file_path, file_type)
+            if file_type == "docx":
+                text = await self._document_summary(document, file_path, text, stats) + text
+            yield await parse_pool.chunk(text, tabular=file_type in _TABULAR_FILE_TYPES), 1.0
+            return
+
+        prefix_pages, page_count = await parse_pool.pdf_prefix(
+            file_path, min_pages=_VISION_PAGES, min_chars=_ENRICHMENT_INPUT_CHARS,
+        )
+        prefix = "\n\n".join(page for page in prefix_pages if page)
+        lead = await self._document_summary(document, file_path, prefix, stats) + prefix
+        async for chunks, pages_done in parse_pool.stream_pdf_chunks(
+            file_path, start=len(prefix_pages), page_count=page_count, lead=lead,
+        ):
+            yield chunks, pages_done / max(page_count, 1)
 
     async def _embed_chunks(self, chunks: list[dict]) -> list:
-        """Batch-embed chunks and return the embedding list in order."""
+        """Batch-embed chunks and return the embedding list in order.
+
+        Windows are large on purpose: the provider does its own request
+        batching and concurrency (OllamaProvider.embed), so a window only
+        bounds the OpenAI request size (256 × 512-token chunks stays well
+        under its per-request input limits)."""
         llm_service = LLMService()
-        batch_size = 20
+        batch_size = 256
         all_embeddings = []
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i : i + batch_size]
@@ -305,77 +485,82 @@ class DocumentService:
 
         The slow part (text extraction, LLM enrichment, embeddings — all of which
         can involve several sequential Ollama calls on CPU taking minutes) runs
-        separately via `process_document_background`, kicked off as a fire-and-forget
-        asyncio task by the caller. Keeping it out of this request/response cycle
+        separately via `process_document`, queued as an IngestionJob committed
+        together with the document row. Keeping it out of this request/response cycle
         avoids proxy/edge timeouts (e.g. Cloudflare's ~100s edge limit) aborting the
         upload mid-flight and leaving the client with an uncontrolled network error.
         """
-        content_bytes = await file.read()
-
-        # Enforce file size limit (MAX_UPLOAD_SIZE_MB from config)
-        max_bytes = settings.max_upload_size_mb * 1024 * 1024
-        if len(content_bytes) > max_bytes:
-            size_mb = len(content_bytes) / (1024 * 1024)
-            return DocumentUploadResponse(
-                status="failed",
-                message=(
-                    f"Archivo demasiado grande: {size_mb:.1f} MB. "
-                    f"Máximo permitido: {settings.max_upload_size_mb} MB."
-                ),
-            )
-
         raw_ext = (file.filename or "").rsplit(".", 1)[-1].lower() if "." in (file.filename or "") else ""
         file_type = normalize_extension(raw_ext) or "txt"
-        content_hash = hashlib.sha256(content_bytes).hexdigest()
 
         os.makedirs(settings.upload_dir, exist_ok=True)
-
-        # Deduplication: reject identical file content that was already ingested
-        existing = await self.db.execute(
-            select(Document).where(
-                Document.content_hash == content_hash,
-                Document.ingestion_status == "completed",
-            )
-        )
-        duplicate = existing.scalar_one_or_none()
-        if duplicate:
-            logger.info(
-                "Duplicate document detected (hash=%s), skipping re-ingestion. "
-                "Existing id=%s title='%s'",
-                content_hash[:12], duplicate.id, duplicate.title,
+        spooled = await _spool_upload(file, settings.upload_dir, settings.max_upload_size_mb * 1024 * 1024)
+        if spooled is None:
+            # file.size is what the multipart parser counted; None only for a
+            # hand-built UploadFile, and then all we know is "over the limit".
+            size = (
+                f"{file.size / (1024 * 1024):.1f} MB" if file.size is not None
+                else f"más de {settings.max_upload_size_mb} MB"
             )
             return DocumentUploadResponse(
-                document_id=duplicate.id,
-                status="duplicate",
+                status="failed",
                 message=(
-                    f"El documento ya existe en la base de conocimientos "
-                    f"('{duplicate.title}'). No es necesario volver a procesarlo."
+                    f"Archivo demasiado grande: {size}. "
+                    f"Máximo permitido: {settings.max_upload_size_mb} MB."
                 ),
             )
+        part_path, size_bytes, content_hash = spooled
 
-        document = Document(
-            title=title,
-            file_name=file.filename or "document.txt",
-            file_type=file_type,
-            file_size_bytes=len(content_bytes),
-            faculty=faculty,
-            program=program,
-            document_type=document_type,
-            content_hash=content_hash,
-            ingestion_status="processing",
-        )
-        self.db.add(document)
-        await self.db.flush()
-
-        # Use document ID as filename prefix to avoid collisions
-        safe_name = f"{document.id}_{file.filename or 'document.txt'}"
-        file_path = os.path.join(settings.upload_dir, safe_name)
-        with open(file_path, "wb") as f:
-            f.write(content_bytes)
+        try:
+            # Deduplication: reject identical file content that was already ingested
+            existing = await self.db.execute(
+                select(Document).where(
+                    Document.content_hash == content_hash,
+                    Document.ingestion_status == "completed",
+                )
+            )
+            duplicate = existing.scalar_one_or_none()
+            if duplicate:
+                logger.info(
+                    "Duplicate document detected (hash=%s), skipping re-ingestion. "
+                    "Existing id=%s title='%s'",
+                    content_hash[:12], duplicate.id, duplicate.title,
+                )
+                return DocumentUploadResponse(
+                    document_id=duplicate.id,
+                    status="duplicate",
+                    message=(
+                        f"El documento ya existe en la base de conocimientos "
+                        f"('{duplicate.title}'). No es necesario volver a procesarlo."
+                    ),
+                )
 
-        document.file_name = safe_name
-        await self.db.commit()
-        await self.db.refresh(document)
+            document = Document(
+                title=title,
+                file_name=file.filename or "document.txt",
+                file_type=file_type,
+                file_size_bytes=size_bytes,
+                faculty=faculty,
+                program=program,
+                document_type=document_type,
+                content_hash=content_hash,
+                ingestion_status="processing",
+            )
+            self.db.add(document)
+            await self.db.flush()
+            self.db.add(new_job(document.id, "upload"))
+
+            # Use document ID as filename prefix to avoid collisions
+            safe_name = f"{document.id}_{file.filename or 'document.txt'}"
+            os.replace(part_path, os.path.join(settings.upload_dir, safe_name))
+
+            document.file_name = safe_name
+            await self.db.commit()
+            await self.db.refresh(document)
+        finally:
+            # Still there only if the upload was a duplicate or failed.
+            if os.path.exists(part_path):
+                os.remove(part_path)
 
         return DocumentUploadResponse(
             document_id=document.id,
@@ -383,59 +568,201 @@ class DocumentService:
             message="Documento recibido. Procesando en segundo plano (extracción, análisis y embeddings).",
         )
 
-    async def process_document_background(self, document_id: UUID) -> None:
-        """Heavy ingestion pipeline, run outside the request/response cycle.
-
-        Opens its own AsyncSession — this coroutine runs in a detached asyncio
-        Task (see routers/documents.py), and SQLAlchemy async sessions are not
-        safe to share across tasks/greenlets.
+    async def process_document(
+        self,
+        document_id: UUID,
+        reindex: bool = False,
+        progress: Callable[[str, int], Awaitable[None]] | None = None,
+    ) -> IndexStats | None:
+        """Heavy ingestion pipeline, run by the ingestion worker pool
+        (services/ingestion_queue.py). Returns None if the document no
+        longer exists; raises on failure — retrying and marking the document
+        "failed" is the queue's call, not this method's.
+
+        Opens its own AsyncSession — it runs in a worker task, and SQLAlchemy
+        async sessions are not safe to share across tasks/greenlets.
+
+        Incremental and idempotent: the new chunk set is diffed against the
+        stored one (`_index_chunks`) and applied in a single transaction, so
+        a retry after a crash between that commit and the job's own
+        bookkeeping finds nothing left to do. `progress(stage, percent)` is
+        awaited at each stage boundary.
+
+        Any run that embedded new chunks — a new upload, a reindexed file
+        that gained sections, a retry of a document whose first ingestion
+        failed — may now be the answer to any question: the new content can
+        outrank what an unfiltered search cached, and those entries carry no
+        tag for this document, so both caches are flushed entirely. A reindex
+        that only dropped chunks can only hurt entries that used them, so
+        eviction by document/program tag is enough there.
         """
         from app.database import async_session
 
+        async def report(stage: str, percent: int) -> None:
+            if progress is not None:
+                await progress(stage, percent)
+
         async with async_session() as db:
             result = await db.execute(select(Document).where(Document.id == document_id))
             document = result.scalar_one_or_none()
             if not document:
-                logger.warning("Background processing skipped: document %s not found", document_id)
-                return
+                logger.warning("Ingestion skipped: document %s not found", document_id)
+                return None
 
             file_path = os.path.join(settings.upload_dir, document.file_name)
-            try:
-                cleaned_text = await self._build_enriched_text(file_path, document.file_type)
-                chunker = chunk_tabular_text if document.file_type in _TABULAR_FILE_TYPES else chunk_text
-                chunks = chunker(
-                    cleaned_text,
-                    chunk_size=settings.chunk_size,
-                    chunk_overlap=settings.chunk_overlap,
-                )
-                all_embeddings = await self._embed_chunks(chunks)
-
-                for idx, (chunk, embedding) in enumerate(zip(chunks, all_embeddings)):
-                    db.add(DocumentChunk(
-                        document_id=document.id,
-                        chunk_index=idx,
-                        content=chunk["content"],
-                        token_count=chunk.get("token_count"),
-                        embedding=embedding,
-                        metadata_=chunk.get("metadata", {}),
-                    ))
-
-                document.ingestion_status = "completed"
-                document.total_chunks = len(chunks)
-                await db.commit()
+            stats = IndexStats()
+            await report("extracting", 5)
+            await self._index_chunks(db, document.id, self._document_chunks(document, file_path, stats), report, stats)
+
+            document.ingestion_status = "completed"
+            document.total_chunks = stats.chunks
+            await db.commit()
+            corpus_stats.mark_stale()
+            # Cached answers may be missing newly embedded content, wherever
+            # they were filtered. A reindex that changed no chunk content
+            # leaves them all valid.
+            if not reindex or stats.embedded:
                 await rag_cache.invalidate_all()
-                # Answers cached before this document existed may now be stale
-                # or incomplete (missing this newly indexed content).
                 await answer_cache.invalidate_all()
-                logger.info(
-                    "Document %s ('%s') processed successfully — %d chunks",
-                    document.id, document.title, len(chunks),
-                )
+            elif stats.removed:
+                await _invalidate_document_caches(document.id, [document.program])
+            logger.info(
+                "Document %s ('%s') processed successfully — %d chunks "
+                "(%d reused, %d embedded, %d removed, %d collapsed, summary %s)",
+                document.id, document.title, stats.chunks, stats.reused, stats.embedded,
+                stats.removed, stats.collapsed, "reused" if stats.summary_reused else "generated",
+            )
+            return stats
 
-            except Exception as e:
-                logger.error("Background processing failed for document %s: %s", document.id, e, exc_info=True)
-                document.ingestion_status = "failed"
-                await db.commit()
+    async def _index_chunks(
+        self,
+        db: AsyncSession,
+        document_id: UUID,
+        batches: AsyncIterator[tuple[list[dict], float]],
+        report: Callable[[str, int], Awaitable[None]],
+        stats: IndexStats,
+    ) -> None:
+        """Bring the document's stored chunks in line with `batches`.
+
+        Stored rows are matched by `content_hash` (and `embedding_model`):
+        a match keeps its row and embedding, renumbered if it moved; only
+        unmatched chunks are embedded and inserted; stored rows nothing
+        matched are deleted at the end. Fixing a typo on one page of a long
+        PDF therefore re-embeds the chunk or two around it, not the document.
+
+        Extraction runs as a producer task `_PIPELINE_DEPTH` batches ahead, so
+        the parse pool works on the next pages while this embeds the current
+        ones. New rows go in with one binary COPY per batch (`copy_records`)
+        instead of an ORM INSERT per chunk, and get their weighted
+        `content_tsv` from one set-based UPDATE at the end (reused rows keep
+        theirs), their BM25 term frequencies and SimHash signature, and the
+        matching `corpus_terms` df deltas (`corpus_stats`). With
+        `ingestion_dedup_enabled`, a new chunk within
+        `ingestion_dedup_max_bits` of one already kept is dropped before
+        it is embedded. Changes are written (not
+        committed) batch by batch: they stay invisible, and the previous
+        chunks stay searchable, until the caller's single commit — a failure
+        anywhere rolls back to the previous index.
+        """
+        model = LLMService.embedding_model()
+        stored = (await db.execute(
+            select(
+                DocumentChunk.id, DocumentChunk.content_hash,
+                DocumentChunk.embedding_model, DocumentChunk.chunk_index,
+            ).where(DocumentChunk.document_id == document_id)
+        )).all()
+        # hash -> [(id, chunk_index)], in index order so repeated content
+        # (boilerplate pages) is matched first-to-first.
+        reusable: dict[str, list[tuple[UUID, int]]] = {}
+        for row_id, content_hash, row_model, chunk_index in sorted(stored, key=lambda r: r[3]):
+            if content_hash and row_model == model:
+                reusable.setdefault(content_hash, []).append((row_id, chunk_index))
+        unmatched = {row[0] for row in stored}
+
+        added: list[UUID] = []
+        # Signatures of the chunks kept so far, when near-duplicates (a
+        # footer differing only by page number, a slide repeated across a
+        # deck) are to be dropped before they cost an embedding.
+        near_dups = (
+            simhash.SignatureIndex(settings.ingestion_dedup_max_bits)
+            if settings.ingestion_dedup_enabled else None
+        )
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_PIPELINE_DEPTH)
+
+        async def produce() -> None:
+            try:
+                async for item in batches:
+                    await queue.put(item)
+            except Exception as e:  # handed to the consumer, raised there
+                await queue.put(e)
+            else:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce(), name=f"extract-{document_id}")
+        try:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                chunks, done = item
+                if not chunks:
+                    continue
+                await report("embedding", 10 + int(done * 75))
+
+                fresh: list[tuple[int, str, int | None, dict]] = []
+                moved: list[dict] = []
+                for chunk in chunks:
+                    index = stats.chunks
+                    content_hash = _chunk_hash(chunk["content"])
+                    signature = simhash.signature(chunk["content"]) if near_dups is not None else None
+                    if reusable.get(content_hash):
+                        row_id, old_index = reusable[content_hash].pop(0)
+                        unmatched.discard(row_id)
+                        stats.reused += 1
+                        if old_index != index:
+                            moved.append({
+                                "id": row_id, "chunk_index": index,
+                                "metadata_": {**chunk.get("metadata", {}), "chunk_index": index},
+                            })
+                    elif signature is not None and near_dups.near(signature):
+                        stats.collapsed += 1
+                        continue
+                    else:
+                        fresh.append((index, content_hash, signature, chunk))
+                    if signature is not None:
+                        near_dups.add(signature)
+                    stats.chunks += 1
+
+                if fresh:
+                    embeddings = await self._embed_chunks([chunk for *_, chunk in fresh])
+                    created_at = datetime.now(timezone.utc)
+                    records = []
+                    for (index, content_hash, signature, chunk), embedding in zip(fresh, embeddings):
+                        term_freqs, term_count = term_frequencies(chunk["content"])
+                        if signature is None:
+                            signature = simhash.signature(chunk["content"])
+                        records.append((
+                            uuid4(), document_id, index, chunk["content"], chunk.get("token_count"),
+                            embedding, content_hash, model,
+                            json.dumps({**chunk.get("metadata", {}), "chunk_index": index}),
+                            created_at, json.dumps(term_freqs), term_count, signature,
+                        ))
+                    await copy_records(db, "document_chunks", _CHUNK_COLUMNS, records)
+                    added.extend(r[0] for r in records)
+                    stats.embedded += len(fresh)
+                if moved:
+                    await db.execute(update(DocumentChunk), moved)
+        finally:
+            producer.cancel()
+
+        await report("storing", 90)
+        stale = list(unmatched)
+        await corpus_stats.remove_chunks(db, stale)
+        await corpus_stats.add_chunks(db, added)
+        for i in range(0, len(stale), 5000):
+            await db.execute(delete(DocumentChunk).where(DocumentChunk.id.in_(stale[i : i + 5000])))
+        stats.removed = len(stale)
+        if stats.embedded:
+            await db.execute(_FILL_CHUNK_TSV, {"document_id": document_id})
 
     @staticmethod
     def _apply_document_filters(query, status: str | None, program: str | None):
@@ -481,10 +808,12 @@ class DocumentService:
         doc = await self.get_document(document_id)
         if not doc:
             return False
+        await corpus_stats.remove_document(self.db, document_id)
         await self.db.delete(doc)
         await self.db.commit()
-        await rag_cache.invalidate_all()
-        await answer_cache.invalidate_all()
+        corpus_stats.mark_stale()
+        # Only entries built from this document's chunks can be affected.
+        await _invalidate_document_caches(document_id)
         return True
 
     async def update_metadata(
@@ -509,6 +838,7 @@ class DocumentService:
         doc = await self.get_document(document_id)
         if not doc:
             return None
+        old_program = doc.program
         if faculty is not ...:
             doc.faculty = faculty
         if program is not ...:
@@ -521,8 +851,9 @@ class DocumentService:
         # the old (often blank) metadata — e.g. ChatService._detect_ambiguity
         # groups sources by program/faculty, so a stale rag_cache entry built
         # before this document was tagged would still show it as unattributed.
-        await rag_cache.invalidate_all()
-        await answer_cache.invalidate_all()
+        # Entries scoped to the new program may also be missing this document
+        # entirely (a program-filtered search couldn't have matched it yet).
+        await _invalidate_document_caches(document_id, [old_program, doc.program])
         return doc
 
     async def get_chunks(
@@ -537,12 +868,19 @@ class DocumentService:
         )
         return list(result.scalars().all())
 
-    async def reindex(self, document_id: UUID) -> DocumentUploadResponse:
-        """Mark the document for reindexing and return immediately.
-
-        Deletes existing chunks synchronously (cheap) but defers the slow
-        extraction/embedding pipeline to `process_document_background`,
-        same as `upload_and_process` — for the same proxy-timeout reasons.
+    async def reindex(self, document_id: UUID, file: UploadFile | None = None) -> DocumentUploadResponse:
+        """Queue the document for reindexing and return immediately.
+
+        `file`, if given, replaces the stored original first (a corrected
+        version of the same document): it is written under a new name, and
+        the old original is only removed once the row pointing at the new
+        one is committed. Existing chunks are left in place:
+        `process_document` diffs the new chunk set against them, keeps the
+        unchanged ones and their embeddings, and swaps the rest in one
+        commit, so the document stays searchable throughout — with the same
+        proxy-timeout reasons as `upload_and_process` for deferring that
+        work to the ingestion queue. A document that already has a
+        queued/running job is left alone.
         """
         doc = await self.get_document(document_id)
         if not doc:
@@ -551,6 +889,34 @@ class DocumentService:
                 status="failed",
                 message="Document not found",
             )
+        if await ingestion_queue.has_active_job(self.db, document_id):
+            return DocumentUploadResponse(
+                document_id=doc.id,
+                status="processing",
+                message="El documento ya está en cola o procesándose.",
+            )
+
+        if file is not None:
+            spooled = await _spool_upload(file, settings.upload_dir, settings.max_upload_size_mb * 1024 * 1024)
+            if spooled is None:
+                return DocumentUploadResponse(
+                    document_id=doc.id,
+                    status="failed",
+                    message=f"Archivo demasiado grande. Máximo permitido: {settings.max_upload_size_mb} MB.",
+                )
+            part_path, size_bytes, content_hash = spooled
+            old_path = os.path.join(settings.upload_dir, doc.file_name)
+            raw_ext = (file.filename or "").rsplit(".", 1)[-1].lower() if "." in (file.filename or "") else ""
+            doc.file_type = normalize_extension(raw_ext) or doc.file_type
+            # Unique even when the corrected file keeps its filename: the old
+            # original has to survive until the commit below.
+            doc.file_name = f"{doc.id}_{uuid4().hex[:8]}_{file.filename or 'document.txt'}"
+            doc.file_size_bytes = size_bytes
+            doc.content_hash = content_hash
+            new_path = os.path.join(settings.upload_dir, doc.file_name)
+            os.replace(part_path, new_path)
+        else:
+            old_path = new_path = None
 
         file_path = os.path.join(settings.upload_dir, doc.file_name)
         if not os.path.exists(file_path):
@@ -560,13 +926,19 @@ class DocumentService:
                 message="Original file not found on disk",
             )
 
-        # Bulk delete existing chunks
-        await self.db.execute(
-            delete(DocumentChunk).where(DocumentChunk.document_id == document_id)
-        )
         doc.ingestion_status = "processing"
-        doc.total_chunks = 0
-        await self.db.commit()
+        self.db.add(new_job(doc.id, "reindex"))
+        try:
+            await self.db.commit()
+        except BaseException:
+            # The row still points at the old original; drop the new one.
+            if new_path is not None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(new_path)
+            raise
+        if old_path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(old_path)
 
         return DocumentUploadResponse(
             document_id=doc.id,
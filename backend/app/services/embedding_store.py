@@ -0,0 +1,230 @@
+"""
+Durable, content-addressed store of computed embeddings.
+
+`embedding_cache` (utils/cache.py) lives in one process and is gone after a
+deploy, so a restart, a schema migration that keeps the model, or
+re-uploading a deleted document used to mean re-embedding everything again
+— hours on CPU Ollama for the whole corpus. Every vector a provider computes
+is now also kept in the `embedding_store` table under (model, sha256(text)),
+and both providers' `embed()` resolve texts in this order:
+
+    embedding_cache (in memory) → embedding_store (Postgres) → provider call
+
+Only texts missing from both are sent to the model, deduplicated, and what
+comes back is written to both. Writes commit on their own, outside the
+caller's transaction: a failed ingestion attempt keeps the vectors it paid
+for, and the retry starts from them.
+
+The hash is the one `document_chunks.content_hash` holds (a chunk's embedded
+text is its content), so garbage collection is a single anti-join — `gc()`
+deletes entries no chunk references with the same `embedding_model` that
+also haven't been looked up in `embedding_store_gc_grace_hours`. Query
+embeddings and the chunks of a document deleted by mistake therefore last
+that long, not forever.
+
+The store is an optimization, never a dependency: a failed read or write is
+logged, the table is skipped for `_BACKOFF_SECONDS`, and embedding carries on
+against the provider.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import and_, delete, exists, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.database import async_session
+from app.models.document_chunk import DocumentChunk
+from app.models.embedding_store import StoredEmbedding
+from app.utils.cache import embedding_cache
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_BACKOFF_SECONDS = 60.0
+# A hit only rewrites last_used_at when it is older than this — GC needs
+# day-level precision, and a row version per lookup would bloat the table.
+_TOUCH_AFTER = timedelta(hours=1)
+# 3 bind parameters per row; asyncpg allows 32767 per statement.
+_WRITE_BATCH = 1000
+
+Fetch = Callable[[list[str], str], Awaitable[list[list[float]]]]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    def __init__(self):
+        self._skip_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.collected = 0
+
+    @property
+    def available(self) -> bool:
+        return settings.embedding_store_enabled and time.monotonic() >= self._skip_until
+
+    def _back_off(self, action: str, error: Exception) -> None:
+        logger.warning(
+            "Embedding store %s failed, skipping it for %.0fs: %s", action, _BACKOFF_SECONDS, error,
+        )
+        self._skip_until = time.monotonic() + _BACKOFF_SECONDS
+
+    async def embed(self, texts: list[str], model: str, fetch: Fetch) -> list[list[float]]:
+        """Vectors for `texts` in order. `fetch(texts, model)` is called once,
+        with the distinct texts neither cache has, and must return their
+        vectors in the same order."""
+        results: list[list[float] | None] = [None] * len(texts)
+        pending: dict[str, list[int]] = {}
+        for i, text_ in enumerate(texts):
+            cached = embedding_cache.get(embedding_cache.make_key(text=text_, model=model))
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(text_, []).append(i)
+        if not pending:
+            return results
+
+        hashes = {text_: text_hash(text_) for text_ in pending}
+        stored = await self._lookup(model, list(set(hashes.values())))
+        missing = [text_ for text_ in pending if hashes[text_] not in stored]
+        fetched = dict(zip(missing, await fetch(missing, model))) if missing else {}
+
+        for text_, indices in pending.items():
+            vector = stored.get(hashes[text_]) or fetched[text_]
+            embedding_cache.set(embedding_cache.make_key(text=text_, model=model), vector)
+            for i in indices:
+                results[i] = vector
+
+        if fetched:
+            await self._save(model, {hashes[text_]: vector for text_, vector in fetched.items()})
+        return results
+
+    async def _lookup(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        if not self.available:
+            return {}
+        try:
+            async with async_session() as db:
+                rows = (await db.execute(
+                    select(StoredEmbedding.text_hash, StoredEmbedding.embedding, StoredEmbedding.last_used_at)
+                    .where(StoredEmbedding.model == model)
+                    .where(StoredEmbedding.text_hash.in_(hashes))
+                )).all()
+                cutoff = datetime.now(timezone.utc) - _TOUCH_AFTER
+                stale = [row.text_hash for row in rows if row.last_used_at < cutoff]
+                if stale:
+                    await db.execute(
+                        update(StoredEmbedding)
+                        .where(StoredEmbedding.model == model)
+                        .where(StoredEmbedding.text_hash.in_(stale))
+                        .values(last_used_at=datetime.now(timezone.utc))
+                    )
+                    await db.commit()
+        except Exception as e:
+            self._back_off("lookup", e)
+            return {}
+        self.hits += len(rows)
+        self.misses += len(hashes) - len(rows)
+        # pgvector hands back float32 numpy arrays; providers return lists.
+        return {row.text_hash: row.embedding.tolist() for row in rows}
+
+    async def _save(self, model: str, vectors: dict[str, list[float]]) -> None:
+        if not self.available:
+            return
+        rows = [{"model": model, "text_hash": h, "embedding": v} for h, v in vectors.items()]
+        try:
+            async with async_session() as db:
+                for i in range(0, len(rows), _WRITE_BATCH):
+                    await db.execute(
+                        pg_insert(StoredEmbedding).values(rows[i : i + _WRITE_BATCH])
+                        .on_conflict_do_nothing(index_elements=["model", "text_hash"])
+                    )
+                await db.commit()
+        except Exception as e:
+            self._back_off("write", e)
+            return
+        self.writes += len(rows)
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
+
+    async def gc(self, grace_hours: float | None = None) -> int:
+        """Delete entries no chunk references that were last used more than
+        `grace_hours` (default `embedding_store_gc_grace_hours`) ago.
+        Returns how many were deleted."""
+        grace = settings.embedding_store_gc_grace_hours if grace_hours is None else grace_hours
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=grace)
+        referenced = exists().where(and_(
+            DocumentChunk.content_hash == StoredEmbedding.text_hash,
+            DocumentChunk.embedding_model == StoredEmbedding.model,
+        ))
+        async with async_session() as db:
+            result = await db.execute(
+                delete(StoredEmbedding)
+                .where(StoredEmbedding.last_used_at < cutoff)
+                .where(~referenced)
+            )
+            await db.commit()
+        self.collected += result.rowcount
+        if result.rowcount:
+            logger.info("Embedding store GC: %d unreferenced embedding(s) deleted", result.rowcount)
+        return result.rowcount
+
+    async def run_gc_loop(self) -> None:
+        """GC now and every `embedding_store_gc_interval_hours`. Every worker
+        runs it; the DELETE is idempotent, so they only duplicate a scan."""
+        while True:
+            if settings.embedding_store_enabled:
+                try:
+                    await self.gc()
+                except Exception as e:
+                    logger.warning("Embedding store GC failed: %s", e)
+            await asyncio.sleep(settings.embedding_store_gc_interval_hours * 3600)
+
+    async def stats(self, db) -> dict:
+        """Table size (planner row estimate + bytes on disk, indexes and
+        TOAST included) and this process's lookup/write counters."""
+        entries = size_bytes = None
+        try:
+            row = (await db.execute(text(
+                "SELECT c.reltuples::bigint AS n, pg_total_relation_size(c.oid) AS bytes "
+                "FROM pg_class c WHERE c.oid = to_regclass('embedding_store')"
+            ))).first()
+            if row is not None:
+                entries = int(row.n) if row.n >= 0 else None
+                size_bytes = int(row.bytes)
+        except Exception:
+            pass
+        return {
+            "enabled": settings.embedding_store_enabled,
+            "entries_estimated": entries,
+            "bytes": size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "gc_deleted": self.collected,
+        }
+
+
+embedding_store = EmbeddingStore()
+
+
+@REGISTRY.collector
+def _collect_embedding_store_metrics():
+    yield "embedding_store_lookups", "counter", "Embedding store lookups by outcome.", [
+        ({"result": "hit"}, embedding_store.hits),
+        ({"result": "miss"}, embedding_store.misses),
+    ]
+    yield "embedding_store_writes", "counter", "Embeddings written to the store.", [
+        ({}, embedding_store.writes),
+    ]
+    yield "embedding_store_gc_deleted", "counter", "Unreferenced embeddings deleted by GC.", [
+        ({}, embedding_store.collected),
+    ]
@@ -16,6 +16,12 @@ Two things are DELIBERATELY split apart:
   answer latency) ARE computed once per provider — those genuinely differ
   between Ollama and OpenAI as the generator.
 
+The one thing retrieval IS run more than once for is the retrieval path
+itself: `retrieval_modes` repeats the pass under other
+`rag_retrieval_mode`s (fused RRF vs. the legacy vector-then-FTS merge) so
+a change to how candidates are found and ranked can be A/B'd on the same
+query bank. Generation always uses the first (live) mode's pass.
+
 Hallucination detection uses an LLM-as-judge call rather than keyword
 matching — the query bank is real institutional content, not a fixed set of
 expected keywords like scripts/eval_rag.py's smoke-test cases. The judge is
@@ -142,7 +148,9 @@ class RetrievalCaseResult:
     error: str | None = None  # set when the search itself blew up (e.g. embedding timeout) — excluded from metrics, not counted as a miss
 
 
-async def _run_retrieval_case(rag_service: RAGService, q: GoldQuery, k: int) -> RetrievalCaseResult:
+async def _run_retrieval_case(
+    rag_service: RAGService, q: GoldQuery, k: int, mode: str | None = None,
+) -> RetrievalCaseResult:
     t0 = time.time()
     # Pin HyDE's provider explicitly instead of letting RAGService.search()
     # read the live runtime_config.default_llm_provider — that global can
@@ -158,7 +166,7 @@ async def _run_retrieval_case(rag_service: RAGService, q: GoldQuery, k: int) ->
     # it's always available here; pinning to it keeps retrieval numbers
     # reproducible across runs regardless of live admin state.
     search = await rag_service.search(
-        SearchRequest(query=q.query, top_k=k, hyde_provider_override="openai")
+        SearchRequest(query=q.query, top_k=k, hyde_provider_override="openai", retrieval_mode=mode)
     )
     retrieval_ms = int((time.time() - t0) * 1000)
     retrieved_titles = [_normalize_doc_ref(r.document_title or "") for r in search.results]
@@ -427,29 +435,47 @@ class GoldComparisonResult:
     k: int
     retrieval: RetrievalSummary
     generations: list[GenerationSummary]
+    retrieval_mode: str = ""
+    # Same pass under the other requested modes, keyed by mode — the A/B.
+    alternative_retrievals: dict[str, RetrievalSummary] = field(default_factory=dict)
+
+
+async def _run_retrieval_pass(
+    rag_service: RAGService, queries: list[GoldQuery], k: int, mode: str,
+) -> list[RetrievalCaseResult]:
+    cases: list[RetrievalCaseResult] = []
+    for q in queries:
+        try:
+            cases.append(await _run_retrieval_case(rag_service, q, k, mode))
+        except Exception as e:
+            logger.warning("Gold eval retrieval failed | query=%s | mode=%s | %s", q.id, mode, e)
+            cases.append(RetrievalCaseResult(
+                query=q, retrieved_titles=[], precision_at_k=None, recall_at_k=None,
+                reciprocal_rank=None, retrieval_ms=0, error=str(e) or repr(e),
+            ))
+    return cases
 
 
 async def run_gold_comparison(
     db: AsyncSession, file_bytes: bytes, k: int, providers: list[tuple[str, str]],
+    retrieval_modes: list[str] | None = None,
 ) -> GoldComparisonResult:
     """`providers` is a list of (provider_name, model) pairs to compare — the
     caller (router) resolves models from runtime_config so this stays testable
-    without depending on global state directly.
+    without depending on global state directly. `retrieval_modes` defaults to
+    just the configured `rag_retrieval_mode`; the first entry is the one
+    reported as `retrieval`, the rest land in `alternative_retrievals`.
     """
     queries = parse_gold_queries(file_bytes)
+    modes = retrieval_modes or [settings.rag_retrieval_mode]
 
     rag_service = RAGService(db)
-    retrieval_cases: list[RetrievalCaseResult] = []
-    for q in queries:
-        try:
-            retrieval_cases.append(await _run_retrieval_case(rag_service, q, k))
-        except Exception as e:
-            logger.warning("Gold eval retrieval failed | query=%s | %s", q.id, e)
-            retrieval_cases.append(RetrievalCaseResult(
-                query=q, retrieved_titles=[], precision_at_k=None, recall_at_k=None,
-                reciprocal_rank=None, retrieval_ms=0, error=str(e) or repr(e),
-            ))
+    retrieval_cases = await _run_retrieval_pass(rag_service, queries, k, modes[0])
     retrieval = _summarize_retrieval(retrieval_cases, k)
+    alternatives = {
+        mode: _summarize_retrieval(await _run_retrieval_pass(rag_service, queries, k, mode), k)
+        for mode in modes[1:]
+    }
 
     generations = []
     for provider_name, model in providers:
@@ -458,4 +484,5 @@ async def run_gold_comparison(
 
     return GoldComparisonResult(
         total_queries=len(queries), k=k, retrieval=retrieval, generations=generations,
+        retrieval_mode=modes[0], alternative_retrievals=alternatives,
     )
@@ -0,0 +1,351 @@
+"""
+Durable document-ingestion queue backed by the `ingestion_jobs` table.
+
+Uploads and reindexes used to fire `process_document_background` as an
+untracked asyncio task: twenty uploads meant twenty concurrent
+extraction/vision/enrichment/embedding pipelines fighting live chat for
+Ollama, and a restart left every in-progress document stuck in
+"processing" forever. Now DocumentService writes an IngestionJob row in the
+same transaction that marks the document "processing", and a small worker
+pool in every backend process drains the table:
+
+  * claim — `SELECT … FOR UPDATE SKIP LOCKED` ordered by (priority,
+    created_at), so several uvicorn workers can share the queue without
+    double-running a job;
+  * concurrency — `ingestion_workers` jobs at a time per process, and each
+    stage boundary first yields to in-flight chat replies
+    (utils/activity.py) for up to `ingestion_chat_yield_max_seconds`;
+  * retry — a failed attempt is re-queued with exponential backoff
+    (`ingestion_retry_backoff_seconds` × 2^(attempt-1)) until
+    `max_attempts`, then the job and the document are marked failed;
+  * resume — running jobs heartbeat every lease/4; a job whose heartbeat is
+    older than `ingestion_lease_seconds` (its process died) goes back to the
+    queue, keeping the attempt it burned so a document that crashes the
+    process can't loop forever. A graceful shutdown re-queues its running
+    jobs without charging an attempt.
+
+Progress (stage + percent) and, once done, the run's IndexStats (chunks
+reused vs. re-embedded) are written to the job row and served by
+GET /documents/{id}/job.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models.document import Document
+from app.models.ingestion_job import IngestionJob
+from app.utils.activity import chat_activity
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first. New uploads ahead of reindexes: a reindex replaces
+# content that is already searchable, an upload adds content that isn't.
+PRIORITY = {"upload": 50, "reindex": 100}
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def new_job(document_id: UUID, kind: str) -> IngestionJob:
+    """A queued job row for the caller to add to its own transaction."""
+    return IngestionJob(
+        document_id=document_id,
+        kind=kind,
+        status="queued",
+        priority=PRIORITY[kind],
+        attempts=0,
+        max_attempts=settings.ingestion_max_attempts,
+        progress=0,
+        run_after=datetime.now(timezone.utc),
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    return settings.ingestion_retry_backoff_seconds * (2 ** max(attempts - 1, 0))
+
+
+class IngestionQueue:
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup: asyncio.Event | None = None
+        self.running = 0
+        self.queued = 0   # last observed by the monitor loop
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        for n in range(max(1, settings.ingestion_workers)):
+            self._spawn(self._worker(), f"ingest-worker-{n}")
+        self._spawn(self._monitor(), "ingest-monitor")
+        logger.info(
+            "Ingestion queue started (%d worker(s), id=%s)",
+            max(1, settings.ingestion_workers), self.worker_id,
+        )
+
+    async def stop(self) -> None:
+        tasks, self._tasks = list(self._tasks), set()
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Wake an idle local worker now instead of at its next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ── Status ────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    async def latest_job(db, document_id: UUID) -> IngestionJob | None:
+        result = await db.execute(
+            select(IngestionJob)
+            .where(IngestionJob.document_id == document_id)
+            .order_by(IngestionJob.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def has_active_job(db, document_id: UUID) -> bool:
+        result = await db.execute(
+            select(IngestionJob.id)
+            .where(IngestionJob.document_id == document_id)
+            .where(IngestionJob.status.in_(ACTIVE_STATUSES))
+            .limit(1)
+        )
+        return result.first() is not None
+
+    # ── Workers ───────────────────────────────────────────────────────────────
+
+    def _spawn(self, coro, name: str) -> None:
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await chat_activity.wait_idle(settings.ingestion_chat_yield_max_seconds)
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Ingestion claim failed (retrying): %s", e)
+                job = None
+            if job is None:
+                await self._idle()
+                continue
+            self.running += 1
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bookkeeping (job/document row writes) failed: the job stays
+                # "running" until reclaim_stale re-queues it, but this worker
+                # must live on or ingestion stops until the next restart.
+                logger.exception("Ingestion job %s: worker error (job left to the lease reclaim)", job.id)
+            finally:
+                self.running -= 1
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=settings.ingestion_poll_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _claim(self) -> IngestionJob | None:
+        now = datetime.now(timezone.utc)
+        async with async_session() as db:
+            job = (await db.execute(
+                select(IngestionJob)
+                .where(IngestionJob.status == "queued")
+                .where(IngestionJob.run_after <= now)
+                .order_by(IngestionJob.priority, IngestionJob.created_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).scalar_one_or_none()
+            if job is None:
+                return None
+            job.status = "running"
+            job.attempts += 1
+            job.locked_by = self.worker_id
+            job.heartbeat_at = now
+            job.started_at = now
+            job.stage = "claimed"
+            await db.commit()
+            return job
+
+    async def _run(self, job: IngestionJob) -> None:
+        # Deferred: document_service imports this module for new_job().
+        from app.services.document_service import DocumentService
+
+        logger.info(
+            "Ingestion job %s: %s of document %s (attempt %d/%d)",
+            job.id, job.kind, job.document_id, job.attempts, job.max_attempts,
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(job.id), name=f"ingest-heartbeat-{job.id}")
+
+        async def progress(stage: str, percent: int) -> None:
+            await self._update(job.id, stage=stage, progress=percent)
+            waited = await chat_activity.wait_idle(settings.ingestion_chat_yield_max_seconds)
+            if waited >= 0.5:
+                logger.debug("Ingestion job %s yielded %.1fs to chat before %s", job.id, waited, stage)
+
+        try:
+            stats = await DocumentService(db=None).process_document(
+                job.document_id, reindex=(job.kind == "reindex"), progress=progress,
+            )
+        except asyncio.CancelledError:
+            # Graceful shutdown: hand the job back without charging the attempt.
+            await asyncio.shield(self._update(
+                job.id, status="queued", attempts=job.attempts - 1, locked_by=None,
+                stage=None, run_after=datetime.now(timezone.utc),
+            ))
+            raise
+        except Exception as e:
+            await self._fail(job, e)
+        else:
+            await self._update(
+                job.id,
+                status="completed" if stats else "failed",
+                stage="done" if stats else "document_missing",
+                progress=100 if stats else job.progress,
+                result=stats.as_dict() if stats else None,
+                locked_by=None,
+                finished_at=datetime.now(timezone.utc),
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _fail(self, job: IngestionJob, error: Exception) -> None:
+        message = f"{type(error).__name__}: {error}"[:2000]
+        try:
+            await self._record_failure(job, message, error)
+        except Exception:
+            # Don't let a DB hiccup here replace the pipeline error; the lease
+            # reclaim picks the job up again.
+            logger.exception("Ingestion job %s: could not record failure (%s)", job.id, message)
+
+    async def _record_failure(self, job: IngestionJob, message: str, error: Exception) -> None:
+        if job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            logger.warning(
+                "Ingestion job %s failed (attempt %d/%d), retrying in %.0fs: %s",
+                job.id, job.attempts, job.max_attempts, delay, message,
+            )
+            await self._update(
+                job.id, status="queued", locked_by=None, last_error=message,
+                run_after=datetime.now(timezone.utc) + timedelta(seconds=delay),
+            )
+            return
+        logger.error(
+            "Ingestion job %s failed permanently after %d attempts: %s",
+            job.id, job.attempts, message, exc_info=error,
+        )
+        await self._update(
+            job.id, status="failed", locked_by=None, last_error=message,
+            finished_at=datetime.now(timezone.utc),
+        )
+        await self._mark_document_failed([job.document_id])
+
+    async def _heartbeat(self, job_id: UUID) -> None:
+        interval = max(settings.ingestion_lease_seconds / 4, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._update(job_id, heartbeat_at=datetime.now(timezone.utc))
+            except Exception as e:
+                logger.warning("Ingestion heartbeat failed for job %s: %s", job_id, e)
+
+    async def _update(self, job_id: UUID, **values) -> None:
+        if "status" not in values:
+            values.setdefault("heartbeat_at", datetime.now(timezone.utc))
+        async with async_session() as db:
+            await db.execute(update(IngestionJob).where(IngestionJob.id == job_id).values(**values))
+            await db.commit()
+
+    @staticmethod
+    async def _mark_document_failed(document_ids: list[UUID]) -> None:
+        async with async_session() as db:
+            await db.execute(
+                update(Document)
+                .where(Document.id.in_(document_ids))
+                .values(ingestion_status="failed")
+            )
+            await db.commit()
+
+    # ── Maintenance ───────────────────────────────────────────────────────────
+
+    async def _monitor(self) -> None:
+        """Reclaim jobs from dead workers and refresh the queue-depth gauge."""
+        while True:
+            try:
+                await self.reclaim_stale()
+                async with async_session() as db:
+                    self.queued = (await db.execute(
+                        select(func.count()).select_from(IngestionJob)
+                        .where(IngestionJob.status == "queued")
+                    )).scalar_one()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Ingestion monitor pass failed: %s", e)
+            await asyncio.sleep(max(settings.ingestion_lease_seconds / 2, 1.0))
+
+    async def reclaim_stale(self) -> int:
+        """Re-queue running jobs whose heartbeat lapsed; fail those already
+        out of attempts. Returns how many jobs were touched."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.ingestion_lease_seconds)
+        async with async_session() as db:
+            stale = (await db.execute(
+                select(IngestionJob)
+                .where(IngestionJob.status == "running")
+                .where(IngestionJob.heartbeat_at < cutoff)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            exhausted = []
+            for job in stale:
+                job.last_error = f"Worker {job.locked_by or '?'} stopped heartbeating"
+                job.locked_by = None
+                if job.attempts >= job.max_attempts:
+                    job.status = "failed"
+                    job.finished_at = datetime.now(timezone.utc)
+                    exhausted.append(job.document_id)
+                else:
+                    job.status = "queued"
+                    job.stage = None
+                    job.run_after = datetime.now(timezone.utc)
+            await db.commit()
+        if exhausted:
+            await self._mark_document_failed(exhausted)
+        if stale:
+            logger.warning("Reclaimed %d stale ingestion job(s) (%d failed)", len(stale), len(exhausted))
+            self.notify()
+        return len(stale)
+
+
+ingestion_queue = IngestionQueue()
+
+
+@REGISTRY.collector
+def _collect_ingestion_metrics():
+    yield "ingestion_queue_depth", "gauge", "Queued ingestion jobs (all workers, as of the last monitor pass).", [
+        ({}, ingestion_queue.queued),
+    ]
+    yield "ingestion_jobs_running", "gauge", "Ingestion jobs running in this worker.", [
+        ({}, ingestion_queue.running),
+    ]
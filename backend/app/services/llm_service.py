@@ -53,6 +53,13 @@ class LLMService:
         except Exception as e:
             raise Exception(f"Error generating response with {provider_name}: {str(e)}")
 
+    @staticmethod
+    def embedding_model(provider_name: str | None = None) -> str:
+        """Model `embed` uses for `provider_name` (default: the embedding provider)."""
+        if (provider_name or runtime_config.embedding_provider) == "openai":
+            return runtime_config.openai_embedding_model
+        return runtime_config.ollama_embedding_model
+
     async def embed(self, request: EmbedRequest) -> EmbedResponse:
         # Use dedicated embedding_provider (separate from chat provider) to avoid
         # pgvector dimension mismatch when the chat provider is changed (e.g. ollama→openai)
@@ -63,10 +70,7 @@ class LLMService:
         except ValueError as e:
             raise ValueError(f"Cannot use embedding provider '{provider_name}': {str(e)}")
 
-        if provider_name == "openai":
-            model = runtime_config.openai_embedding_model
-        else:
-            model = runtime_config.ollama_embedding_model
+        model = self.embedding_model(provider_name)
 
         start_time = time.time()
         result = await provider.embed(texts=request.texts, model=model)
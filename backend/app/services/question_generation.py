@@ -0,0 +1,223 @@
+"""
+Doc2query: likely student questions per chunk, generated and embedded in
+the background, for the "questions" retrieval mode.
+
+HyDE (RAGService._generate_hyde_doc) closes the gap between how students
+ask and how regulations are written with an LLM call per search — skipped
+on Ollama, where that extra generate() roughly doubles the time to answer
+on CPU, so Ollama deployments searched with the raw query alone. This moves
+the LLM work to the other side of the index: each chunk gets
+`doc2query_questions_per_chunk` questions it answers, embedded with the
+chunk model into `chunk_questions`, and the search matches the raw query
+against them — question against question — with no LLM call.
+
+Generation only uses idle time. A loop in every backend process (started
+from main.py) takes up to `doc2query_batch_size` pending chunks
+(`questions_at IS NULL`, oldest first) while no chat reply is in flight
+(utils/activity.py) and no ingestion job is running or queued, stops
+mid-batch as soon as either shows up, and otherwise sleeps
+`doc2query_idle_seconds`. Each chunk is written in its own short
+transaction — questions plus `questions_at` — only if it still exists and
+nobody stored it first: a reindex that deletes the chunk mid-batch, or a
+second worker that picked the same one, costs at most a wasted generation.
+
+A chunk whose generation or embedding fails is skipped for
+`doc2query_retry_backoff_seconds` × 2^(attempt-1), so it stops coming back
+first, and after `doc2query_max_attempts` it is marked handled with no
+questions — one chunk the model always chokes on (too long for its
+context, say) must not stall the rest of the corpus. An attempt is only
+charged when another chunk went through in the same pass: when every
+chunk fails, the provider is down, not the chunk. Attempts are counted per
+process, in memory.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import async_session
+from app.models.chunk_question import ChunkQuestion
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+from app.providers.provider_factory import ProviderFactory
+from app.runtime_config import runtime_config
+from app.schemas.llm import EmbedRequest
+from app.services.ingestion_queue import ingestion_queue
+from app.services.llm_service import LLMService
+from app.utils.activity import chat_activity
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_MAX_QUESTION_CHARS = 300
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def parse_questions(reply: str, limit: int) -> list[str]:
+    """Questions from the model's reply: one per line, list markers and
+    quotes stripped, anything that isn't a question (preambles, notes) and
+    repeats dropped, at most `limit`."""
+    questions: list[str] = []
+    seen: set[str] = set()
+    for line in reply.splitlines():
+        question = _LIST_MARKER_RE.sub("", line).strip().strip('"“”').strip()
+        if not question.endswith("?") or len(question) > _MAX_QUESTION_CHARS:
+            continue
+        if question.lower() in seen:
+            continue
+        seen.add(question.lower())
+        questions.append(question)
+        if len(questions) >= limit:
+            break
+    return questions
+
+
+class QuestionGenerator:
+    def __init__(self):
+        self.chunks = 0      # chunks handled by this process
+        self.questions = 0   # questions stored by this process
+        self.failures = 0    # per-chunk generation/embedding failures
+        # chunk_id → (attempts charged, monotonic time before which it's skipped)
+        self._retries: dict[UUID, tuple[int, float]] = {}
+
+    @staticmethod
+    def busy() -> bool:
+        """Foreground or ingestion work this process knows of."""
+        return chat_activity.active > 0 or ingestion_queue.running > 0 or ingestion_queue.queued > 0
+
+    async def run_loop(self) -> None:
+        """Work through pending chunks whenever the process is idle."""
+        while True:
+            handled = 0
+            if settings.doc2query_enabled and not self.busy():
+                try:
+                    handled = await self.run_batch()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("Question generation pass failed: %s", e)
+            if not handled:
+                await asyncio.sleep(settings.doc2query_idle_seconds)
+
+    async def run_batch(self) -> int:
+        """Generate questions for up to `doc2query_batch_size` pending chunks.
+        Returns how many were handled (0 = nothing pending, or work arrived)."""
+        now = time.monotonic()
+        backing_off = [chunk_id for chunk_id, (_, until) in self._retries.items() if until > now]
+        handled = 0
+        failed: list[tuple[UUID, Exception]] = []
+        for chunk_id, title, content in await self._pending(settings.doc2query_batch_size, backing_off):
+            if self.busy():
+                break
+            try:
+                questions = await self._generate(title, content)
+                embeddings = (
+                    (await LLMService().embed(EmbedRequest(texts=questions))).embeddings
+                    if questions else []
+                )
+            except Exception as e:
+                failed.append((chunk_id, e))
+                continue
+            self._retries.pop(chunk_id, None)
+            if await self._store(chunk_id, questions, embeddings):
+                self.chunks += 1
+                self.questions += len(questions)
+            handled += 1
+        for chunk_id, error in failed:
+            await self._failed(chunk_id, error, charge=handled > 0)
+        return handled
+
+    async def _failed(self, chunk_id: UUID, error: Exception, charge: bool) -> None:
+        self.failures += 1
+        attempts = self._retries.get(chunk_id, (0, 0.0))[0] + (1 if charge else 0)
+        if attempts >= settings.doc2query_max_attempts:
+            logger.warning(
+                "Question generation gave up on chunk %s after %d attempts: %s", chunk_id, attempts, error,
+            )
+            self._retries.pop(chunk_id, None)
+            await self._store(chunk_id, [], [])
+            return
+        delay = settings.doc2query_retry_backoff_seconds * (2 ** max(attempts - 1, 0))
+        logger.warning(
+            "Question generation failed for chunk %s (attempt %d/%d), retrying in %.0fs: %s",
+            chunk_id, attempts, settings.doc2query_max_attempts, delay, error,
+        )
+        self._retries[chunk_id] = (attempts, time.monotonic() + delay)
+
+    async def _pending(self, limit: int, exclude: list[UUID]) -> list[tuple[UUID, str, str]]:
+        # Only chunks embedded with the current model: the questions are
+        # matched against the same query vector.
+        async with async_session() as db:
+            rows = (await db.execute(
+                select(DocumentChunk.id, Document.title, DocumentChunk.content)
+                .join(Document, DocumentChunk.document_id == Document.id)
+                .where(DocumentChunk.questions_at.is_(None))
+                .where(DocumentChunk.id.not_in(exclude))
+                .where(DocumentChunk.embedding.is_not(None))
+                .where(DocumentChunk.embedding_model == LLMService.embedding_model())
+                .order_by(DocumentChunk.created_at)
+                .limit(limit)
+            )).all()
+        return [tuple(row) for row in rows]
+
+    async def _generate(self, title: str, content: str) -> list[str]:
+        n = settings.doc2query_questions_per_chunk
+        provider_name = runtime_config.default_llm_provider
+        provider = ProviderFactory.get_provider(provider_name)
+        result = await provider.generate(
+            messages=[{
+                "role": "user",
+                "content": (
+                    "Eres un estudiante de Uniputumayo (Institución Universitaria del Putumayo). "
+                    f"Escribe {n} preguntas distintas, en español, que harías y que este "
+                    f"fragmento del documento «{title}» responde. Una pregunta por línea, "
+                    f"sin numerarlas ni agregar nada más.\n\n{content}"
+                ),
+            }],
+            model=runtime_config.resolve_model(provider_name),
+            temperature=0.3,
+            max_tokens=60 * n,
+        )
+        return parse_questions(result.get("content", ""), n)
+
+    async def _store(self, chunk_id: UUID, questions: list[str], embeddings: list) -> bool:
+        """Write one chunk's questions and mark it handled (even with none —
+        it isn't retried). False if the chunk is gone or already handled."""
+        async with async_session() as db:
+            claimed = (await db.execute(
+                update(DocumentChunk)
+                .where(DocumentChunk.id == chunk_id)
+                .where(DocumentChunk.questions_at.is_(None))
+                .values(questions_at=datetime.now(timezone.utc))
+                .returning(DocumentChunk.id)
+            )).first()
+            if claimed is None:
+                return False
+            db.add_all([
+                ChunkQuestion(chunk_id=chunk_id, question=q, embedding=e)
+                for q, e in zip(questions, embeddings)
+            ])
+            await db.commit()
+        return True
+
+
+question_generator = QuestionGenerator()
+
+
+@REGISTRY.collector
+def _collect_question_generation_metrics():
+    yield "doc2query_chunks", "counter", "Chunks given generated questions by this worker.", [
+        ({}, question_generator.chunks),
+    ]
+    yield "doc2query_questions", "counter", "Generated questions stored by this worker.", [
+        ({}, question_generator.questions),
+    ]
+    yield "doc2query_failures", "counter", "Per-chunk question generation failures in this worker.", [
+        ({}, question_generator.failures),
+    ]
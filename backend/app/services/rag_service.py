@@ -1,6 +1,8 @@
 import logging
 import time
+from typing import NamedTuple
 
+import numpy as np
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,13 +13,42 @@ from app.config import settings
 from app.models.retrieval_log import RetrievalLog
 from app.providers.provider_factory import ProviderFactory
 from app.runtime_config import runtime_config
-from app.utils.cache import rag_cache
-from app.utils.query_utils import keyword_score
+from app.utils.cache import rag_cache, cache_tags
+from app.utils.single_flight import coalesce_key, search_flight
+from app.utils.tracing import span
+from app.services.corpus_stats import corpus_stats
+from app.utils import bm25, simhash
 
 logger = logging.getLogger(__name__)
 
 _RERANK_WEIGHT_SEMANTIC = 0.80
 _RERANK_WEIGHT_KEYWORD = 0.20
+# SimHash bits two candidates may differ in and still count as the same
+# passage. ~10 of 64 is where term-set Jaccard sits around 0.75 on chunk-sized
+# texts; unrelated chunks land at 20-35.
+_DEDUP_MAX_BITS = 10
+
+
+class _ChunkSignals(NamedTuple):
+    """Per-chunk values computed at ingestion, selected with each candidate
+    and kept beside the results (not in the response) for `_rerank()`,
+    `_deduplicate()` and `_select_mmr()`. Fields a query didn't select are
+    None."""
+    term_freqs: dict | None
+    term_count: int | None
+    simhash: int | None
+    embedding: np.ndarray | None = None
+
+    @classmethod
+    def of(cls, row) -> "_ChunkSignals":
+        return cls(
+            getattr(row, "term_freqs", None), getattr(row, "term_count", None), row.simhash,
+            getattr(row, "embedding", None),
+        )
+
+
+def _retrieval_mode(request: SearchRequest) -> str:
+    return request.retrieval_mode or settings.rag_retrieval_mode
 
 
 class RAGService:
@@ -81,7 +112,8 @@ class RAGService:
         those lower-ranked-but-relevant chunks ever get in. Raising top_k
         (see settings.rag_top_k) alongside this is what actually fixed it —
         this alone is not a complete answer to "not enough of document X's
-        chunks are showing up".
+        chunks are showing up". `_select_mmr()` is the answer that doesn't
+        grow the prompt; this stays as its fallback.
         """
         seen: dict[str, int] = {}
         filtered: list[SearchResultItem] = []
@@ -95,6 +127,63 @@ class RAGService:
                 break
         return filtered
 
+    def _select_mmr(
+        self,
+        results: list[SearchResultItem],
+        signals: dict,
+        top_k: int,
+        max_per_doc: int = 10,
+        relevance: dict | None = None,
+    ) -> list[SearchResultItem]:
+        """Pick top_k by maximal marginal relevance over the candidates'
+        embeddings, still capped at max_per_doc per document.
+
+        Each step takes the candidate maximizing
+        λ·relevance − (1−λ)·max cosine to the ones already picked
+        (λ = rag_mmr_lambda). A curriculum's semester chunks share most of
+        their wording, so by similarity alone the top 5 are often three
+        tellings of one semester; the redundancy term spends those slots on
+        other semesters instead — coverage without raising rag_top_k.
+
+        Relevance is the upstream ranking score from `relevance` — `_rerank()`'s
+        hybrid of RRF (or cosine) and BM25, on [0, 1] — so a full-text-only
+        hit that RRF put first is still first here; its `score` is only the
+        threshold it was lifted to. Candidates missing from `relevance` use
+        their `score`. Embeddings come with the
+        candidates (`signals`, same query), so the whole selection is one
+        n×n similarity matrix plus k vector updates. Candidates without a
+        stored embedding fall back to `_apply_diversity()`.
+        """
+        if len(results) <= 1:
+            return results[:top_k]
+        vectors = [getattr(signals.get(item.chunk_id), "embedding", None) for item in results]
+        if any(v is None for v in vectors):
+            return self._apply_diversity(results, max_per_doc=max_per_doc, top_k=top_k)
+
+        emb = np.asarray(vectors, dtype=np.float32)
+        emb /= np.maximum(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12)
+        similarity = emb @ emb.T
+        ranking = relevance or {}
+        rel = np.array([ranking.get(item.chunk_id, item.score) for item in results], dtype=np.float32)
+        lam = settings.rag_mmr_lambda
+
+        titles: dict[str, int] = {}
+        doc = np.array([titles.setdefault(item.document_title or "", len(titles)) for item in results])
+        per_doc = np.zeros(len(titles), dtype=int)
+        redundancy = np.zeros(len(results), dtype=np.float32)
+        available = np.ones(len(results), dtype=bool)
+        picked: list[int] = []
+        while len(picked) < top_k and available.any():
+            mmr = np.where(available, lam * rel - (1 - lam) * redundancy, -np.inf)
+            best = int(np.argmax(mmr))  # first maximum: ties keep the upstream order
+            picked.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, similarity[best])
+            per_doc[doc[best]] += 1
+            if per_doc[doc[best]] >= max_per_doc:
+                available &= doc != doc[best]
+        return [results[i] for i in picked]
+
     # ── Keyword (full-text) search — recall widener ──────────────────────────
 
     async def _keyword_search(
@@ -104,6 +193,7 @@ class RAGService:
         base_params: dict,
         exclude_ids: set,
         limit: int,
+        signals: dict | None = None,
     ) -> list[SearchResultItem]:
         """Postgres full-text search over chunk content.
 
@@ -112,8 +202,13 @@ class RAGService:
         threshold — pure-vector search has no way to recover these. Results
         get a baseline score (the passing threshold) rather than ts_rank_cd
         directly, since that score isn't on the same scale as cosine
-        similarity; `_rerank()` differentiates them afterwards using the same
-        keyword-overlap function applied to vector-sourced candidates.
+        similarity; `_rerank()` differentiates them afterwards with BM25,
+        same as vector-sourced candidates — their stored term frequencies,
+        signatures and embeddings go into `signals` (chunk_id → _ChunkSignals).
+
+        Matches and ranks against the stored `content_tsv` (see
+        DocumentChunk) — ranking used to re-tokenize every matching chunk
+        per query.
         """
         params = {k: v for k, v in base_params.items() if k not in ("embedding", "top_k")}
         params["query_text"] = query
@@ -122,17 +217,22 @@ class RAGService:
         sql = text(f"""
             SELECT
                 dc.id          AS chunk_id,
+                dc.document_id,
                 dc.content,
                 d.title        AS document_title,
                 d.program,
                 d.faculty,
-                dc.metadata
+                dc.metadata,
+                dc.term_freqs,
+                dc.term_count,
+                dc.simhash,
+                dc.embedding
             FROM document_chunks dc
             JOIN documents d ON dc.document_id = d.id
             WHERE dc.embedding IS NOT NULL
               AND {where_clause}
-              AND to_tsvector('spanish', dc.content) @@ plainto_tsquery('spanish', :query_text)
-            ORDER BY ts_rank_cd(to_tsvector('spanish', dc.content), plainto_tsquery('spanish', :query_text)) DESC
+              AND dc.content_tsv @@ plainto_tsquery('spanish', :query_text)
+            ORDER BY ts_rank_cd(dc.content_tsv, plainto_tsquery('spanish', :query_text)) DESC
             LIMIT :limit
         """)
         result = await self.db.execute(sql, params)
@@ -141,6 +241,8 @@ class RAGService:
         for row in result.fetchall():
             if row.chunk_id in exclude_ids:
                 continue
+            if signals is not None:
+                signals[row.chunk_id] = _ChunkSignals.of(row)
             items.append(SearchResultItem(
                 chunk_id=row.chunk_id,
                 content=row.content,
@@ -149,30 +251,305 @@ class RAGService:
                 program=row.program,
                 faculty=row.faculty,
                 metadata=row.metadata,
+                document_id=row.document_id,
             ))
         return items
 
+    # ── Hybrid retrieval — one statement, reciprocal rank fusion ────────────
+
+    async def _fused_search(
+        self,
+        request: SearchRequest,
+        where_clause: str,
+        base_params: dict,
+        candidate_k: int,
+        signals: dict,
+        questions: bool = False,
+        relevance: dict | None = None,
+    ) -> list[SearchResultItem]:
+        """Vector and full-text candidates fused in a single SQL round trip.
+
+        `vec` is the HNSW nearest-neighbour set (the inner ORDER BY/LIMIT is
+        the shape the index serves), `fts` the GIN full-text set ranked by
+        ts_rank_cd over the stored, weighted `content_tsv` — both capped at `candidate_k`, same filters. They are
+        fused with reciprocal rank fusion, Σ 1/(rag_rrf_k + rank), which only
+        uses each list's ordering, so cosine and ts_rank_cd never have to be
+        put on one scale. Vector-only rows below the score threshold are
+        dropped in SQL (same gate as the legacy path); lexical matches always
+        survive, as they did there.
+
+        `score` stays cosine similarity — it's what the quality gate and the
+        retrieval log read — with lexical matches lifted to the threshold,
+        the same baseline the legacy path gave them. Order is by RRF, and
+        each row's RRF divided by the best one goes into `relevance`
+        (chunk_id → [0, 1]) — the first-stage score `_rerank()` blends BM25
+        into.
+
+        `questions=True` ("questions" mode) adds a third list, `qst`: chunks
+        ranked by their closest generated question (`chunk_questions`,
+        app/services/question_generation.py) to the raw query. A chunk it
+        finds passes the threshold on that question's cosine and reports the
+        better of the two.
+        """
+        params = dict(base_params)
+        params.update(
+            top_k=candidate_k,
+            query_text=request.query,
+            threshold=request.score_threshold,
+            rrf_k=settings.rag_rrf_k,
+        )
+
+        qst_cte = qst_join = qst_rrf = qst_gate = ""
+        qst_score = "fused.vec_score"
+        if questions:
+            # Several questions per chunk: over-fetch, keep each chunk's best.
+            params["question_k"] = candidate_k * settings.doc2query_questions_per_chunk
+            qst_cte = f"""
+            qst AS (
+                SELECT id, score, row_number() OVER (ORDER BY score DESC) AS rnk
+                FROM (
+                    SELECT chunk_id AS id, max(score) AS score
+                    FROM (
+                        SELECT
+                            cq.chunk_id,
+                            1 - (cq.embedding <=> CAST(:embedding AS vector)) AS score
+                        FROM chunk_questions cq
+                        JOIN document_chunks dc ON dc.id = cq.chunk_id
+                        JOIN documents d ON dc.document_id = d.id
+                        WHERE {where_clause}
+                        ORDER BY cq.embedding <=> CAST(:embedding AS vector)
+                        LIMIT :question_k
+                    ) hits
+                    GROUP BY chunk_id
+                    ORDER BY score DESC
+                    LIMIT :top_k
+                ) q
+            ),"""
+            qst_join = "FULL OUTER JOIN qst ON qst.id = COALESCE(vec.id, fts.id)"
+            qst_rrf = "+ COALESCE(1.0 / (:rrf_k + qst.rnk), 0)"
+            qst_gate = "OR qst.score >= :threshold"
+            qst_score = "GREATEST(fused.vec_score, fused.qst_score)"
+
+        sql = text(f"""
+            WITH vec AS (
+                SELECT id, score, row_number() OVER (ORDER BY distance) AS rnk
+                FROM (
+                    SELECT
+                        dc.id,
+                        dc.embedding <=> CAST(:embedding AS vector)       AS distance,
+                        1 - (dc.embedding <=> CAST(:embedding AS vector)) AS score
+                    FROM document_chunks dc
+                    JOIN documents d ON dc.document_id = d.id
+                    WHERE dc.embedding IS NOT NULL
+                      AND {where_clause}
+                    ORDER BY dc.embedding <=> CAST(:embedding AS vector)
+                    LIMIT :top_k
+                ) v
+            ),
+            fts AS (
+                SELECT id, row_number() OVER (ORDER BY rank DESC) AS rnk
+                FROM (
+                    SELECT
+                        dc.id,
+                        ts_rank_cd(dc.content_tsv, q.query) AS rank
+                    FROM document_chunks dc
+                    JOIN documents d ON dc.document_id = d.id
+                    CROSS JOIN plainto_tsquery('spanish', :query_text) AS q(query)
+                    WHERE dc.embedding IS NOT NULL
+                      AND {where_clause}
+                      AND dc.content_tsv @@ q.query
+                    ORDER BY rank DESC
+                    LIMIT :top_k
+                ) f
+            ),{qst_cte}
+            fused AS (
+                SELECT
+                    COALESCE(vec.id, fts.id{", qst.id" if questions else ""}) AS id,
+                    vec.score                AS vec_score,
+                    {"qst.score" if questions else "NULL::float8":<24} AS qst_score,
+                    fts.rnk IS NOT NULL      AS lexical,
+                    (COALESCE(1.0 / (:rrf_k + vec.rnk), 0)
+                     + COALESCE(1.0 / (:rrf_k + fts.rnk), 0)
+                     {qst_rrf})::float8 AS rrf
+                FROM vec
+                FULL OUTER JOIN fts ON vec.id = fts.id
+                {qst_join}
+                WHERE vec.score >= :threshold OR fts.id IS NOT NULL {qst_gate}
+            )
+            SELECT
+                dc.id          AS chunk_id,
+                dc.document_id,
+                dc.content,
+                COALESCE({qst_score},
+                         1 - (dc.embedding <=> CAST(:embedding AS vector))) AS score,
+                fused.lexical,
+                fused.rrf,
+                d.title        AS document_title,
+                d.program,
+                d.faculty,
+                dc.metadata,
+                dc.term_freqs,
+                dc.term_count,
+                dc.simhash,
+                dc.embedding
+            FROM fused
+            JOIN document_chunks dc ON dc.id = fused.id
+            JOIN documents d ON dc.document_id = d.id
+            ORDER BY fused.rrf DESC
+            LIMIT :top_k
+        """)
+        result = await self.db.execute(sql, params)
+
+        items: list[SearchResultItem] = []
+        rows = result.fetchall()
+        best_rrf = max((row.rrf for row in rows), default=0.0)
+        for row in rows:
+            score = row.score
+            if row.lexical:
+                score = max(score, request.score_threshold)
+            signals[row.chunk_id] = _ChunkSignals.of(row)
+            if relevance is not None:
+                relevance[row.chunk_id] = row.rrf / best_rrf if best_rrf > 0 else 0.0
+            items.append(SearchResultItem(
+                chunk_id=row.chunk_id,
+                content=row.content,
+                score=round(score, 4),
+                document_title=row.document_title,
+                program=row.program,
+                faculty=row.faculty,
+                metadata=row.metadata,
+                document_id=row.document_id,
+            ))
+        return items
+
+    async def _legacy_search(
+        self,
+        request: SearchRequest,
+        where_clause: str,
+        params: dict,
+        search_start: float,
+        signals: dict,
+    ) -> tuple[list[SearchResultItem], int]:
+        """The pre-fusion path: vector query, then `_keyword_search`, merged here.
+
+        Kept as `rag_retrieval_mode="legacy"` so the GoldStandard eval can
+        compare it against `_fused_search`. Returns the candidates (not yet
+        re-ranked) and the vector query's latency; their stored term
+        frequencies, signatures and embeddings go into `signals`.
+        """
+        sql = text(f"""
+            SELECT
+                dc.id          AS chunk_id,
+                dc.document_id,
+                dc.content,
+                1 - (dc.embedding <=> CAST(:embedding AS vector)) AS score,
+                d.title        AS document_title,
+                d.program,
+                d.faculty,
+                dc.metadata,
+                dc.term_freqs,
+                dc.term_count,
+                dc.simhash,
+                dc.embedding
+            FROM document_chunks dc
+            JOIN documents d ON dc.document_id = d.id
+            WHERE dc.embedding IS NOT NULL
+              AND {where_clause}
+            ORDER BY dc.embedding <=> CAST(:embedding AS vector)
+            LIMIT :top_k
+        """)
+
+        with span("rag_vector"):
+            result = await self.db.execute(sql, params)
+            rows = result.fetchall()
+        search_time = int((time.time() - search_start) * 1000)
+
+        # Apply score threshold
+        candidates: list[SearchResultItem] = []
+        seen_chunk_ids: set = set()
+        for row in rows:
+            if row.score >= request.score_threshold:
+                signals[row.chunk_id] = _ChunkSignals.of(row)
+                candidates.append(SearchResultItem(
+                    chunk_id=row.chunk_id,
+                    content=row.content,
+                    score=round(row.score, 4),
+                    document_title=row.document_title,
+                    program=row.program,
+                    faculty=row.faculty,
+                    metadata=row.metadata,
+                    document_id=row.document_id,
+                ))
+                seen_chunk_ids.add(row.chunk_id)
+
+        # Full-text keyword search — widens recall beyond what cosine
+        # similarity found. Pure-vector retrieval can miss chunks that share
+        # exact terms (program names, codes) with the query but whose overall
+        # embedding drifts below threshold. Candidates found here get a
+        # baseline score (the passing threshold) so they clear the quality
+        # gate; `_rerank()` then differentiates them by BM25 against the
+        # real query, same as vector-sourced candidates.
+        try:
+            with span("rag_fts"):
+                fts_candidates = await self._keyword_search(
+                    request.query, where_clause, params, exclude_ids=seen_chunk_ids,
+                    limit=request.top_k, signals=signals,
+                )
+            candidates.extend(fts_candidates)
+        except Exception as e:
+            logger.debug("Full-text keyword search skipped: %s", e)
+
+        return candidates, search_time
+
     # ── Re-ranking ───────────────────────────────────────────────────────────
 
     def _rerank(
         self,
         query: str,
         results: list[SearchResultItem],
+        signals: dict | None = None,
+        relevance: dict | None = None,
     ) -> list[SearchResultItem]:
-        """Re-rank results by combining semantic score with keyword overlap.
-
-        Uses a weighted hybrid: 80% semantic (cosine) + 20% keyword overlap.
-        This promotes chunks that both semantically and lexically match the query,
-        reducing false positives from pure-vector retrieval.
+        """Re-rank results by combining the first-stage score with BM25.
+
+        Uses a weighted hybrid: 80% first stage + 20% BM25, the latter
+        divided by the best BM25 among the candidates so both terms are on
+        [0, 1]. This promotes chunks that both semantically and lexically
+        match the query, reducing false positives from pure-vector retrieval.
+        The first stage is the chunk's entry in `relevance` when there is one
+        (fused modes: normalized RRF), its cosine `score` otherwise (legacy).
+        `relevance` is then overwritten with the hybrid — `score` stays the
+        cosine the quality gate reads — so `_select_mmr()` ranks by it.
+
+        Term frequencies come from `signals` (stored at ingestion), idf and
+        average length from
+        `corpus_stats` — one dict lookup per query term per chunk. A chunk
+        with nothing stored is tokenized on the spot.
         """
         if not results:
             return results
 
-        scored: list[tuple[float, SearchResultItem]] = []
+        signals = signals or {}
+        first_stage = relevance or {}
+        weights = corpus_stats.query_weights(query)
+        bm25_scores = []
         for item in results:
-            kw = keyword_score(query, item.content)
-            hybrid = _RERANK_WEIGHT_SEMANTIC * item.score + _RERANK_WEIGHT_KEYWORD * kw
+            stored = signals.get(item.chunk_id)
+            if stored is not None and stored.term_freqs is not None:
+                term_freqs, term_count = stored.term_freqs, stored.term_count
+            else:
+                term_freqs, term_count = bm25.term_frequencies(item.content)
+            bm25_scores.append(bm25.score(weights, term_freqs, term_count, corpus_stats.avgdl))
+        best = max(bm25_scores)
+
+        scored: list[tuple[float, SearchResultItem]] = []
+        for item, lexical_score in zip(results, bm25_scores):
+            kw = lexical_score / best if best > 0 else 0.0
+            base = first_stage.get(item.chunk_id, item.score)
+            hybrid = _RERANK_WEIGHT_SEMANTIC * base + _RERANK_WEIGHT_KEYWORD * kw
             scored.append((hybrid, item))
+            if relevance is not None:
+                relevance[item.chunk_id] = hybrid
 
         scored.sort(key=lambda x: x[0], reverse=True)
         reranked = [item for _, item in scored]
@@ -187,32 +564,33 @@ class RAGService:
     # ── Context deduplication ────────────────────────────────────────────────
 
     def _deduplicate(
-        self, results: list[SearchResultItem]
+        self, results: list[SearchResultItem], signals: dict | None = None
     ) -> list[SearchResultItem]:
-        """Remove near-duplicate chunks (>70% Jaccard word overlap on first 300 chars).
+        """Remove near-duplicate chunks (SimHash within `_DEDUP_MAX_BITS`).
 
         Duplicate chunks waste LLM context window tokens and degrade quality
-        by repeating the same information.
+        by repeating the same information. Signatures are stored per chunk
+        at ingestion (see utils/simhash.py) and arrive in `signals`, so a
+        comparison is an XOR and a popcount; a chunk without one is hashed
+        on the spot.
         """
+        signals = signals or {}
         unique: list[SearchResultItem] = []
-        seen_tokens: list[frozenset[str]] = []
+        seen: list[int] = []
 
         for item in results:
-            tokens = frozenset(item.content[:300].lower().split())
-            is_dup = False
-            for seen in seen_tokens:
-                intersection = tokens & seen
-                union = tokens | seen
-                if union and len(intersection) / len(union) > 0.70:
-                    is_dup = True
-                    logger.debug(
-                        "Deduplicated near-duplicate chunk from '%s'",
-                        item.document_title,
-                    )
-                    break
-            if not is_dup:
-                unique.append(item)
-                seen_tokens.append(tokens)
+            stored = signals.get(item.chunk_id)
+            sig = stored.simhash if stored is not None else None
+            if sig is None:
+                sig = simhash.signature(item.content)
+            if any(simhash.distance(sig, other) <= _DEDUP_MAX_BITS for other in seen):
+                logger.debug(
+                    "Deduplicated near-duplicate chunk from '%s'",
+                    item.document_title,
+                )
+                continue
+            unique.append(item)
+            seen.append(sig)
 
         return unique
 
@@ -253,38 +631,86 @@ class RAGService:
         # call is fast/cheap enough that the retrieval-quality gain is worth it.
         # `hyde_provider_override` lets a caller pin this decision instead of
         # reading the live admin-panel setting — see SearchRequest for why.
+        # The "questions" mode never uses it: it matches the raw query against
+        # questions generated at ingestion, which is HyDE's job done ahead.
+        mode = _retrieval_mode(request)
         hyde_provider = request.hyde_provider_override or runtime_config.default_llm_provider
-        hyde_active = settings.rag_hyde_enabled and hyde_provider != "ollama"
+        hyde_active = settings.rag_hyde_enabled and hyde_provider != "ollama" and mode != "questions"
 
         # Cache check (key = query + retrieval params). `hyde_active` (not the
-        # static setting) so entries built with/without HyDE never collide.
+        # static setting) so entries built with/without HyDE never collide;
+        # likewise `mode`, so an A/B run never reads the other path's results.
         cache_key = rag_cache.make_key(
             query=request.query,
             top_k=request.top_k,
             threshold=request.score_threshold,
             filters=request.filters.model_dump() if request.filters else None,
             hyde=hyde_active,
+            mode=mode,
         )
         cached = await rag_cache.get(cache_key)
         if cached is not None:
             logger.debug("RAG cache hit: %.60s…", request.query)
             return cached
 
+        # Identical concurrent searches (same normalized query + params) share
+        # one computation — see utils/single_flight.py. Cross-worker followers
+        # pick the leader's result up from rag_cache.
+        response, computed = await search_flight.do(
+            coalesce_key(
+                request.query,
+                top_k=request.top_k,
+                threshold=request.score_threshold,
+                filters=request.filters.model_dump() if request.filters else None,
+                hyde=hyde_active,
+                mode=mode,
+            ),
+            lambda: self._search_uncached(request, hyde_active, mode, cache_key, t0),
+            recheck=lambda: rag_cache.get(cache_key),
+        )
+        if not computed:
+            logger.debug("RAG search coalesced with an in-flight duplicate: %.60s…", request.query)
+
+        # Logged for every caller, coalesced or not — analytics counts queries
+        # asked, not searches executed.
+        final_results = response.results
+        try:
+            self.db.add(RetrievalLog(
+                query_text=request.query[:2000],
+                chunks_retrieved=[
+                    {"chunk_id": str(r.chunk_id), "score": r.score, "title": r.document_title}
+                    for r in final_results
+                ],
+                top_score=final_results[0].score if final_results else None,
+                retrieval_time_ms=int((time.time() - t0) * 1000),
+            ))
+            # flush without commit — caller's transaction boundary handles the commit
+            await self.db.flush()
+        except Exception as log_err:
+            logger.debug("Retrieval log write skipped: %s", log_err)
+
+        return response
+
+    async def _search_uncached(
+        self, request: SearchRequest, hyde_active: bool, mode: str, cache_key: str, t0: float
+    ) -> SearchResponse:
         llm_service = LLMService()
 
         embed_start = time.time()
         embed_query = request.query
         if hyde_active:
-            embed_query = await self._generate_hyde_doc(
-                request.query, provider_name=request.hyde_provider_override
-            )
+            with span("rag_hyde"):
+                embed_query = await self._generate_hyde_doc(
+                    request.query, provider_name=request.hyde_provider_override
+                )
             logger.debug("HyDE doc generated (%d chars)", len(embed_query))
 
-        embed_response = await llm_service.embed(EmbedRequest(texts=[embed_query]))
+        with span("rag_embed"):
+            embed_response = await llm_service.embed(EmbedRequest(texts=[embed_query]))
         query_embedding = embed_response.embeddings[0]
         embed_time = int((time.time() - embed_start) * 1000)
 
-        # 2. Vector search — fetch extra candidates for post-processing
+        # 2. Candidate retrieval — fetch extra for post-processing
         search_start = time.time()
         candidate_k = request.top_k * settings.rag_candidates_multiplier
 
@@ -305,84 +731,55 @@ class RAGService:
                 params["doc_type"] = request.filters.document_type
 
         where_clause = " AND ".join(filters) if filters else "1=1"
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
-        params["embedding"] = embedding_str
-
-        sql = text(f"""
-            SELECT
-                dc.id          AS chunk_id,
-                dc.content,
-                1 - (dc.embedding <=> CAST(:embedding AS vector)) AS score,
-                d.title        AS document_title,
-                d.program,
-                d.faculty,
-                dc.metadata
-            FROM document_chunks dc
-            JOIN documents d ON dc.document_id = d.id
-            WHERE dc.embedding IS NOT NULL
-              AND {where_clause}
-            ORDER BY dc.embedding <=> CAST(:embedding AS vector)
-            LIMIT :top_k
-        """)
-
-        result = await self.db.execute(sql, params)
-        rows = result.fetchall()
-        search_time = int((time.time() - search_start) * 1000)
-
-        # 3. Apply score threshold
-        candidates: list[SearchResultItem] = []
-        seen_chunk_ids: set = set()
-        for row in rows:
-            if row.score >= request.score_threshold:
-                candidates.append(SearchResultItem(
-                    chunk_id=row.chunk_id,
-                    content=row.content,
-                    score=round(row.score, 4),
-                    document_title=row.document_title,
-                    program=row.program,
-                    faculty=row.faculty,
-                    metadata=row.metadata,
-                ))
-                seen_chunk_ids.add(row.chunk_id)
-
-        # 3b. Full-text keyword search — widens recall beyond what cosine
-        # similarity found. Pure-vector retrieval can miss chunks that share
-        # exact terms (program names, codes) with the query but whose overall
-        # embedding drifts below threshold. Candidates found here get a
-        # baseline score (the passing threshold) so they clear the quality
-        # gate below; `_rerank()` then differentiates them by actual keyword
-        # overlap against the real query, same as vector-sourced candidates.
-        try:
-            fts_candidates = await self._keyword_search(
-                request.query, where_clause, params, exclude_ids=seen_chunk_ids,
-                limit=request.top_k,
-            )
-            for item in fts_candidates:
-                candidates.append(item)
-                seen_chunk_ids.add(item.chunk_id)
-        except Exception as e:
-            logger.debug("Full-text keyword search skipped: %s", e)
-
-        # 4. Re-rank with keyword overlap boost
-        candidates = self._rerank(request.query, candidates)
-
-        # 5. Deduplicate near-identical chunks
-        candidates = self._deduplicate(candidates)
-
-        # 6. Diversity filter (max N chunks per document)
-        if settings.rag_diversity_enabled and candidates:
-            final_results = self._apply_diversity(candidates, max_per_doc=10, top_k=request.top_k)
+        # Bound as-is: the connection's vector codec (app/database.py) sends
+        # it as binary float32s — no decimal formatting here, no parsing
+        # server-side.
+        params["embedding"] = query_embedding
+
+        signals: dict = {}
+        relevance: dict = {}   # chunk_id → ranking score in [0, 1]
+        if mode in ("fused", "questions"):
+            # 3. Vector + full-text (+ generated-question) candidates,
+            # RRF-ordered, in one round trip
+            with span("rag_hybrid"):
+                candidates = await self._fused_search(
+                    request, where_clause, params, candidate_k, signals,
+                    questions=(mode == "questions"), relevance=relevance,
+                )
+            search_time = int((time.time() - search_start) * 1000)
         else:
-            final_results = candidates[:request.top_k]
+            candidates, search_time = await self._legacy_search(
+                request, where_clause, params, search_start, signals
+            )
+        await corpus_stats.ensure_fresh()
+
+        with span("rag_rerank"):
+            # 4. Re-rank with a BM25 boost over the first-stage score (RRF
+            # in the fused modes, cosine in legacy)
+            candidates = self._rerank(request.query, candidates, signals, relevance)
+
+            # 5. Deduplicate near-identical chunks
+            candidates = self._deduplicate(candidates, signals)
+
+            # 6. Diversity: MMR over the candidates' embeddings, or just the
+            # per-document cap (max N chunks per document)
+            if settings.rag_diversity_enabled and settings.rag_mmr_enabled and candidates:
+                final_results = self._select_mmr(
+                    candidates, signals, request.top_k, max_per_doc=10, relevance=relevance,
+                )
+            elif settings.rag_diversity_enabled and candidates:
+                final_results = self._apply_diversity(candidates, max_per_doc=10, top_k=request.top_k)
+            else:
+                final_results = candidates[:request.top_k]
 
         total_ms = int((time.time() - t0) * 1000)
         top_score = final_results[0].score if final_results else 0.0
         quality = self.evaluate_context_quality(final_results)
 
         logger.info(
-            "RAG | query=%.50s… | results=%d | quality=%s | top_score=%.3f | "
+            "RAG | query=%.50s… | mode=%s | results=%d | quality=%s | top_score=%.3f | "
             "embed_ms=%d | search_ms=%d | total_ms=%d",
-            request.query, len(final_results), quality, top_score,
+            request.query, mode, len(final_results), quality, top_score,
             embed_time, search_time, total_ms,
         )
 
@@ -393,22 +790,12 @@ class RAGService:
         )
 
         if final_results:
-            await rag_cache.set(cache_key, response)
-
-        # Write retrieval log — enables analytics on query patterns and RAG quality over time
-        try:
-            self.db.add(RetrievalLog(
-                query_text=request.query[:2000],
-                chunks_retrieved=[
-                    {"chunk_id": str(r.chunk_id), "score": r.score, "title": r.document_title}
-                    for r in final_results
-                ],
-                top_score=top_score if final_results else None,
-                retrieval_time_ms=total_ms,
+            # Tagged so a document upload/edit only evicts results that drew
+            # from that document or its program (see DocumentService).
+            await rag_cache.set(cache_key, response, tags=cache_tags(
+                document_ids={r.document_id for r in final_results},
+                programs={r.program for r in final_results}
+                | {request.filters.program if request.filters else None},
             ))
-            # flush without commit — caller's transaction boundary handles the commit
-            await self.db.flush()
-        except Exception as log_err:
-            logger.debug("Retrieval log write skipped: %s", log_err)
 
         return response
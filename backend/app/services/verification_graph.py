@@ -23,6 +23,7 @@ from app.config import settings
 from app.providers.provider_factory import ProviderFactory
 from app.runtime_config import runtime_config
 from app.utils.prompts import REFUSAL_MARKER
+from app.utils.tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -165,12 +166,13 @@ async def _generate(state: VerificationState) -> dict:
     if state["attempts"] > 0:
         messages = messages + [{"role": "user", "content": _build_retry_feedback(state.get("grade_reason"))}]
 
-    result = await provider.generate(
-        messages=messages,
-        model=state["model"],
-        temperature=state["temperature"],
-        max_tokens=state["max_tokens"],
-    )
+    with span("verify_generate"):
+        result = await provider.generate(
+            messages=messages,
+            model=state["model"],
+            temperature=state["temperature"],
+            max_tokens=state["max_tokens"],
+        )
     return {
         "draft_answer": result["content"],
         "finish_reason": result.get("finish_reason"),
@@ -199,18 +201,19 @@ async def _grade(state: VerificationState) -> dict:
         graded_context = _context_for_grading(
             state["context_text"], state["draft_answer"], max_context_chars
         )
-        result = await provider.generate(
-            messages=[{
-                "role": "user",
-                "content": _GRADE_PROMPT.format(
-                    context=graded_context,
-                    answer=state["draft_answer"],
-                ),
-            }],
-            model=grader_model,
-            temperature=0.0,
-            max_tokens=60,
-        )
+        with span("verify_grade"):
+            result = await provider.generate(
+                messages=[{
+                    "role": "user",
+                    "content": _GRADE_PROMPT.format(
+                        context=graded_context,
+                        answer=state["draft_answer"],
+                    ),
+                }],
+                model=grader_model,
+                temperature=0.0,
+                max_tokens=60,
+            )
         # Approve unless the grader's LAST line clearly says "NO" — not the
         # other way around. The prompt now allows a short reason before the
         # verdict (a bare one-word answer under the old max_tokens=5 gave a
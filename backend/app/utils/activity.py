@@ -0,0 +1,64 @@
+"""
+Foreground-activity gate: lets background work yield to live chat.
+
+Chat replies and document ingestion share one Ollama instance — on CPU a
+single vision/enrichment/embedding burst from an upload can add seconds to
+every chat turn running at the same moment. The chat routes wrap each reply
+in `chat_activity.track()`; the ingestion worker pool awaits
+`chat_activity.wait_idle(max_wait)` before claiming a job and between
+pipeline stages, so a student's question runs first and ingestion fills the
+gaps. `max_wait` bounds the deferral so a busy afternoon can't starve
+ingestion entirely.
+
+Per process: a reply being served by another uvicorn worker isn't visible
+here. That is the common case the gate still covers well — ingestion and the
+chat it competes with for this worker's Ollama connections.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class ForegroundActivity:
+    def __init__(self):
+        self._active = 0
+        self._idle: asyncio.Event | None = None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _event(self) -> asyncio.Event:
+        if self._idle is None:
+            self._idle = asyncio.Event()
+            if self._active == 0:
+                self._idle.set()
+        return self._idle
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self._active += 1
+        self._event().clear()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._event().set()
+
+    async def wait_idle(self, max_wait: float) -> float:
+        """Wait until no foreground work is running, at most `max_wait`
+        seconds. Returns how long it actually waited."""
+        if self._active == 0 or max_wait <= 0:
+            return 0.0
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._event().wait(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            pass
+        return time.monotonic() - start
+
+
+chat_activity = ForegroundActivity()
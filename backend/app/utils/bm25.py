@@ -0,0 +1,66 @@
+"""Okapi BM25 — tokenizer, per-chunk term frequencies and the scoring formula.
+
+Term frequencies are computed once per chunk at ingestion and stored on the
+row (`document_chunks.term_freqs` / `term_count`); the corpus side (document
+frequency per term, chunk count, average length) is kept by
+app/services/corpus_stats.py. Scoring a candidate at query time is then one
+dict lookup per query term — no re-tokenizing chunk text.
+"""
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+# Standard Okapi parameters: k1 saturates repeated terms, b scales the
+# length normalization (0 = none, 1 = full).
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def terms(text: str) -> list[str]:
+    """Lowercased, accent-folded alphanumeric tokens.
+
+    Folded the same way as query_utils' matching helpers, so "créditos" in a
+    voice-transcribed query still finds "creditos" in a scanned PDF and vice
+    versa. Single letters are dropped — "y", "a", "o" and list markers
+    carry no signal and would dominate `term_count` — single digits are
+    not: "semestre 7" has to tell the seventh semester from the others.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return [t for t in _TOKEN_RE.findall(folded) if len(t) > 1 or t.isdigit()]
+
+
+def term_frequencies(text: str) -> tuple[dict[str, int], int]:
+    """(term -> count, total term count) for one chunk — what ingestion stores."""
+    tokens = terms(text)
+    return dict(Counter(tokens)), len(tokens)
+
+
+def idf(df: int, n: int) -> float:
+    """BM25 idf with the +1 inside the log, so it never goes negative for
+    terms that appear in more than half the corpus."""
+    return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+
+def score(
+    query_terms: dict[str, float],
+    term_freqs: dict[str, int],
+    length: int,
+    avgdl: float,
+) -> float:
+    """BM25 of one chunk. `query_terms` maps each distinct query term to its
+    idf (see CorpusStats.query_weights)."""
+    if not term_freqs:
+        return 0.0
+    norm = K1 * (1 - B + B * length / avgdl) if avgdl else K1
+    total = 0.0
+    for term, weight in query_terms.items():
+        tf = term_freqs.get(term)
+        if tf:
+            total += weight * tf * (K1 + 1) / (tf + norm)
+    return total
@@ -5,19 +5,32 @@
   dict otherwise.  Callers must await get() / set() / invalidate_all().
 
 - AsyncAnswerCache: semantic cache for full chat answers, keyed by embedding
-  similarity rather than exact text — see class docstring below.
+  similarity rather than exact text — see class docstring below.  Lookups go
+  through _EmbeddingIndex (one NumPy matrix-vector product per query); with
+  Redis, each worker keeps a local mirror of the shared list and only
+  re-downloads it when the shared generation counter moves.
+
+- _LRUStore: the O(1) OrderedDict-backed LRU/TTL store behind both TTLCache
+  and AsyncRAGCache's in-memory fallback, with hit/miss/eviction counters
+  (surfaced by /api/v1/metrics).
 
 - TTLCache: sync in-memory cache for embedding vectors.  Redis is NOT used here
   because each embedding call is cheap and session-local; making it async would
   require changes to all provider code for minimal benefit.
 """
 
+import asyncio
 import hashlib
 import json
 import logging
 import re
+import struct
 import time
+from collections import OrderedDict
+
+import numpy as np
 
+from app.utils.metrics import ANSWER_CACHE_GUARD_REJECTIONS, ANSWER_CACHE_LOOKUPS, REGISTRY
 from app.utils.query_utils import _normalize, _significant_words
 
 logger = logging.getLogger(__name__)
@@ -65,44 +78,140 @@ def _semester_reference(text: str) -> str | None:
     return None
 
 
-# ── Sync in-memory cache (embeddings) ────────────────────────────────────────
+# ── In-memory LRU/TTL store (shared by TTLCache and AsyncRAGCache) ──────────
 
-class TTLCache:
-    """Dict-backed sync cache with per-entry TTL and LRU eviction."""
+class _LRUStore:
+    """OrderedDict-backed store with O(1) get/set, true LRU on read hits and
+    lazy per-entry TTL expiry (no background sweeper).
 
-    def __init__(self, ttl_seconds: int = 1800, max_size: int = 512):
+    The previous dict-based caches evicted with `min(store, key=ts)` — a full
+    O(n) scan on every insert once full, which the 2048-entry embedding cache
+    paid once per chunk during ingestion. Here the dict's order *is* the LRU
+    order: a hit moves the key to the end, eviction pops the front.
+
+    TTL is measured from insertion (a read doesn't extend it), checked when a
+    key is read, and also opportunistically trimmed from the LRU end on every
+    insert so entries nobody reads again don't sit around until evicted.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int, on_evict=None):
         self._ttl = ttl_seconds
         self._max = max_size
-        self._store: dict[str, tuple] = {}
-
-    def make_key(self, **kwargs) -> str:
-        raw = json.dumps(kwargs, sort_keys=True, default=str)
-        return hashlib.sha256(raw.encode()).hexdigest()
+        self._data: OrderedDict[str, tuple] = OrderedDict()
+        # Called with the key of every entry dropped by eviction, expiry or
+        # pop() — lets an owner keep side indexes (AsyncRAGCache's tag sets)
+        # in step without scanning.
+        self._on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
 
     def get(self, key: str):
-        entry = self._store.get(key, _SENTINEL)
+        entry = self._data.get(key, _SENTINEL)
         if entry is _SENTINEL:
+            self.misses += 1
             return None
         value, ts = entry
         if time.monotonic() - ts > self._ttl:
-            del self._store[key]
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
             return None
+        self._data.move_to_end(key)
+        self.hits += 1
         return value
 
     def set(self, key: str, value) -> None:
-        if len(self._store) >= self._max:
-            self._evict_oldest()
-        self._store[key] = (value, time.monotonic())
+        now = time.monotonic()
+        if key in self._data:
+            self._data.move_to_end(key)
+        else:
+            self._expire_front(now)
+            if len(self._data) >= self._max:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        self._data[key] = (value, now)
+
+    def pop(self, key: str) -> None:
+        if key in self._data:
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self._max,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _expire_front(self, now: float) -> None:
+        # Bounded: stops at the first live entry, so amortized O(1) per insert.
+        while self._data:
+            key, (_, ts) = next(iter(self._data.items()))
+            if now - ts <= self._ttl:
+                return
+            self._drop(key)
+            self.expirations += 1
+
+    def _drop(self, key: str) -> None:
+        del self._data[key]
+        if self._on_evict is not None:
+            self._on_evict(key)
+
+
+# ── Invalidation tags ─────────────────────────────────────────────────────────
+
+def cache_tags(document_ids=(), programs=()) -> set[str]:
+    """Invalidation tags for a cached RAG result / answer: one per source
+    document and one per program it was scoped to or drew from. A document
+    upload/edit/delete then only evicts entries carrying that document's or
+    program's tag (see invalidate_tags) instead of flushing every answer for
+    every program. Program names are case/whitespace-normalized so a tag
+    written from `documents.program` matches one built from a search filter.
+    """
+    tags = {f"doc:{d}" for d in document_ids if d}
+    tags |= {f"program:{p.strip().lower()}" for p in programs if p and p.strip()}
+    return tags
+
+
+# ── Sync in-memory cache (embeddings) ────────────────────────────────────────
+
+class TTLCache:
+    """Sync cache with per-entry TTL and LRU eviction (see _LRUStore)."""
+
+    def __init__(self, ttl_seconds: int = 1800, max_size: int = 512):
+        self._store = _LRUStore(ttl_seconds, max_size)
+
+    def make_key(self, **kwargs) -> str:
+        raw = json.dumps(kwargs, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str):
+        return self._store.get(key)
+
+    def set(self, key: str, value) -> None:
+        self._store.set(key, value)
 
     def invalidate_all(self) -> None:
         self._store.clear()
         logger.info("Embedding cache invalidated")
 
-    def _evict_oldest(self) -> None:
-        if not self._store:
-            return
-        oldest = min(self._store, key=lambda k: self._store[k][1])
-        del self._store[oldest]
+    def size(self) -> int:
+        return len(self._store)
+
+    def stats(self) -> dict:
+        return self._store.stats()
 
 
 # ── Async RAG cache (Redis-backed or in-memory) ───────────────────────────────
@@ -113,13 +222,39 @@ class AsyncRAGCache:
     Call `await connect_redis(url)` from the app lifespan to enable Redis.
     If Redis is not configured or unreachable, falls back to in-memory TTL dict.
     Callers must await all public methods.
+
+    Entries can carry invalidation tags (see cache_tags). Tag membership is
+    kept as a key set per tag — `rag:tag:<tag>` Redis SETs, or an in-memory
+    dict kept in step with evictions — so invalidate_tags() touches only the
+    affected keys instead of scanning the whole keyspace.
+
+    Keys from make_key() start with the cache's current generation
+    (`<gen>:<hash>`, stored as `rag:<gen>:<hash>`). invalidate_all() just
+    INCRs the shared `rag:generation` counter — one round trip no matter how
+    full the cache is — and every entry written under an older generation
+    becomes unreachable at once. get() reads the counter in the same pipeline
+    as the entry, so a worker notices another worker's bump on its very next
+    lookup. The dead keys are reclaimed by sweep_stale(), a background task
+    that UNLINKs them in pipelined batches (Redis TTL would get them
+    eventually anyway).
     """
 
+    _TAG_PREFIX = "rag:tag:"
+    _GENERATION_KEY = "rag:generation"
+    _SWEEP_BATCH = 500
+
     def __init__(self, ttl_seconds: int = 1800, max_size: int = 512):
         self._ttl = ttl_seconds
-        self._max = max_size
-        self._store: dict[str, tuple] = {}  # in-memory fallback
+        # In-memory fallback
+        self._store = _LRUStore(ttl_seconds, max_size, on_evict=self._untag)
+        self._tags: dict[str, set[str]] = {}   # tag -> keys
+        self._key_tags: dict[str, set[str]] = {}  # key -> tags
         self._redis = None
+        self._generation = 0
+        self._sweep_task: asyncio.Task | None = None
+        # Only meaningful on the Redis path — the in-memory path counts in _store.
+        self._redis_hits = 0
+        self._redis_misses = 0
 
     # ── Setup ─────────────────────────────────────────────────────────────────
 
@@ -129,6 +264,7 @@ class AsyncRAGCache:
             import redis.asyncio as aioredis
             client = aioredis.from_url(url, socket_connect_timeout=3, decode_responses=False)
             await client.ping()
+            self._generation = int(await client.get(self._GENERATION_KEY) or 0)
             self._redis = client
             logger.info("RAG cache: connected to Redis at %s", url)
             return True
@@ -140,43 +276,86 @@ class AsyncRAGCache:
 
     def make_key(self, **kwargs) -> str:
         raw = json.dumps(kwargs, sort_keys=True, default=str)
-        return hashlib.sha256(raw.encode()).hexdigest()
+        return f"{self._generation}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+    @staticmethod
+    def _key_generation(key: str) -> int | None:
+        gen, sep, _ = key.partition(":")
+        return int(gen) if sep and gen.isdigit() else None
 
     # ── Core operations ───────────────────────────────────────────────────────
 
     async def get(self, key: str):
         if self._redis is not None:
             try:
-                data = await self._redis.get(f"rag:{key}")
-                if data:
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.get(self._GENERATION_KEY)
+                pipe.get(f"rag:{key}")
+                generation, data = await pipe.execute()
+                self._generation = int(generation or 0)
+                if data and self._key_generation(key) in (None, self._generation):
                     from app.schemas.rag import SearchResponse
+                    self._redis_hits += 1
                     return SearchResponse.model_validate_json(data)
             except Exception as e:
                 logger.debug("Redis get error (falling through): %s", e)
+            self._redis_misses += 1
             return None
 
-        # In-memory path
-        entry = self._store.get(key, _SENTINEL)
-        if entry is _SENTINEL:
-            return None
-        value, ts = entry
-        if time.monotonic() - ts > self._ttl:
-            del self._store[key]
-            return None
-        return value
+        return self._store.get(key)
 
-    async def set(self, key: str, value) -> None:
+    async def set(self, key: str, value, tags=()) -> None:
+        if self._key_generation(key) not in (None, self._generation):
+            # Computed before an invalidate_all() this worker has since seen —
+            # storing it under a dead generation would only create garbage.
+            return
         if self._redis is not None:
             try:
-                await self._redis.setex(f"rag:{key}", self._ttl, value.model_dump_json())
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.setex(f"rag:{key}", self._ttl, value.model_dump_json())
+                for tag in tags:
+                    pipe.sadd(f"{self._TAG_PREFIX}{tag}", key)
+                    # Outlives any member by at most one TTL; stale members
+                    # only cost a no-op UNLINK at invalidation time.
+                    pipe.expire(f"{self._TAG_PREFIX}{tag}", self._ttl)
+                await pipe.execute()
             except Exception as e:
                 logger.debug("Redis set error: %s", e)
             return
 
-        # In-memory path
-        if len(self._store) >= self._max:
-            self._evict_oldest()
-        self._store[key] = (value, time.monotonic())
+        self._untag(key)
+        self._store.set(key, value)
+        if tags:
+            self._key_tags[key] = set(tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    async def invalidate_tags(self, tags) -> None:
+        """Evict only entries carrying any of `tags`. Same failure-logging
+        contract as invalidate_all()."""
+        tags = set(tags)
+        if not tags:
+            return
+        if self._redis is not None:
+            try:
+                tag_keys = [f"{self._TAG_PREFIX}{t}" for t in tags]
+                members = await self._redis.sunion(*tag_keys)
+                pipe = self._redis.pipeline(transaction=False)
+                for k in members:
+                    k = k.decode() if isinstance(k, bytes) else k
+                    pipe.unlink(f"rag:{k}")
+                pipe.unlink(*tag_keys)
+                await pipe.execute()
+                evicted = len(members)
+            except Exception as e:
+                logger.warning("RAG cache tag invalidate FAILED (stale entries may remain): %s", e)
+                return
+        else:
+            keys = set().union(*(self._tags.get(t, set()) for t in tags))
+            for k in keys:
+                self._store.pop(k)
+            evicted = len(keys)
+        logger.info("RAG cache invalidated %d entries for tags %s", evicted, sorted(tags))
 
     async def invalidate_all(self) -> None:
         """Clear all entries. Logs a warning (not "invalidated") on Redis
@@ -187,14 +366,46 @@ class AsyncRAGCache:
         "invalidated" unconditionally, even inside the except branch)."""
         if self._redis is not None:
             try:
-                async for k in self._redis.scan_iter("rag:*"):
-                    await self._redis.delete(k)
+                self._generation = int(await self._redis.incr(self._GENERATION_KEY))
             except Exception as e:
                 logger.warning("RAG cache invalidate FAILED (stale entries may remain): %s", e)
                 return
+            if self._sweep_task is None or self._sweep_task.done():
+                self._sweep_task = asyncio.create_task(self.sweep_stale(), name="rag-cache-sweep")
         else:
+            self._generation += 1
             self._store.clear()
-        logger.info("RAG cache invalidated")
+            self._tags.clear()
+            self._key_tags.clear()
+        logger.info("RAG cache invalidated (generation=%d)", self._generation)
+
+    async def sweep_stale(self) -> int:
+        """UNLINK every entry key not under the current generation, in
+        pipelined batches of _SWEEP_BATCH. Runs in the background after
+        invalidate_all(); safe to run concurrently with traffic since live
+        keys are never touched. Returns how many keys were removed."""
+        if self._redis is None:
+            return 0
+        live_prefix = f"rag:{self._generation}:".encode()
+        keep = (self._GENERATION_KEY.encode(), self._TAG_PREFIX.encode())
+        removed = 0
+        batch: list[bytes] = []
+        try:
+            async for k in self._redis.scan_iter(match="rag:*", count=self._SWEEP_BATCH):
+                k = k if isinstance(k, bytes) else k.encode()
+                if k.startswith(live_prefix) or k.startswith(keep):
+                    continue
+                batch.append(k)
+                if len(batch) >= self._SWEEP_BATCH:
+                    removed += await self._unlink_batch(batch)
+                    batch = []
+            if batch:
+                removed += await self._unlink_batch(batch)
+        except Exception as e:
+            logger.warning("RAG cache sweep stopped early (%d keys removed): %s", removed, e)
+            return removed
+        logger.info("RAG cache sweep removed %d stale keys", removed)
+        return removed
 
     def size(self) -> int:
         """Entry count. Returns -1 for Redis (unknown without SCAN)."""
@@ -202,13 +413,183 @@ class AsyncRAGCache:
             return -1
         return len(self._store)
 
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters for /api/v1/metrics. On Redis only
+        hits/misses are tracked (eviction there is Redis's own TTL)."""
+        if self._redis is not None:
+            lookups = self._redis_hits + self._redis_misses
+            return {
+                "backend": "redis",
+                "hits": self._redis_hits,
+                "misses": self._redis_misses,
+                "hit_rate": round(self._redis_hits / lookups, 4) if lookups else None,
+            }
+        return {"backend": "memory", **self._store.stats()}
+
     # ── Internals ─────────────────────────────────────────────────────────────
 
-    def _evict_oldest(self) -> None:
-        if not self._store:
-            return
-        oldest = min(self._store, key=lambda k: self._store[k][1])
-        del self._store[oldest]
+    async def _unlink_batch(self, keys: list[bytes]) -> int:
+        pipe = self._redis.pipeline(transaction=False)
+        for k in keys:
+            pipe.unlink(k)
+        return sum(await pipe.execute())
+
+    def _untag(self, key: str) -> None:
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# ── Vectorized similarity index (answer cache) ───────────────────────────────
+
+class _EmbeddingIndex:
+    """Pre-normalized, contiguous float32 matrix of answer-cache embeddings,
+    with parallel `ts`/entry arrays, so a lookup is one matrix-vector product
+    plus an argmax instead of a pure-Python cosine loop per entry.
+
+    Rows are written ring-buffer style: once `capacity` is reached, each new
+    entry overwrites the oldest slot, which is the same "drop the oldest"
+    eviction the previous most-recent-first list did with `pop()`. The matrix
+    grows by doubling up to `capacity` rather than being preallocated, so a
+    cache configured for 10k entries doesn't reserve ~30 MB before its first
+    store.
+
+    Embeddings are L2-normalized once at insert time — the dot product against
+    a normalized query vector is then exactly the cosine similarity. A
+    zero-norm vector stays all-zeros and scores 0.0 against anything, same as
+    the old `_cosine` special case.
+    """
+
+    _INITIAL_ROWS = 64
+
+    def __init__(self, capacity: int):
+        self._capacity = max(1, capacity)
+        self._matrix: np.ndarray | None = None  # allocated on first add (dim unknown until then)
+        self._ts = np.zeros(0, dtype=np.float64)
+        self._entries: list[dict | None] = []
+        self._count = 0
+        self._next = 0  # next slot to write (ring position once full)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def _grow(self, dim: int) -> None:
+        rows = self._INITIAL_ROWS if self._matrix is None else len(self._ts) * 2
+        rows = min(rows, self._capacity)
+        matrix = np.zeros((rows, dim), dtype=np.float32)
+        ts = np.zeros(rows, dtype=np.float64)
+        if self._matrix is not None:
+            matrix[: self._count] = self._matrix[: self._count]
+            ts[: self._count] = self._ts[: self._count]
+        self._matrix, self._ts = matrix, ts
+        self._entries.extend([None] * (rows - len(self._entries)))
+
+    def add(self, embedding, ts: float, entry: dict) -> None:
+        vec = self._normalize(embedding)
+        if self._matrix is not None and self._matrix.shape[1] != vec.shape[0]:
+            # Embedding model changed dimension (e.g. admin swapped
+            # answer_cache_embedding_model) — old vectors can't be compared
+            # against new ones at all, so start over rather than mix them.
+            logger.info(
+                "Answer cache index: embedding dimension changed %d → %d, resetting",
+                self._matrix.shape[1], vec.shape[0],
+            )
+            self.clear()
+        if self._matrix is None or (self._next >= len(self._ts) and len(self._ts) < self._capacity):
+            self._grow(vec.shape[0])
+
+        slot = self._next
+        self._matrix[slot] = vec
+        self._ts[slot] = ts
+        self._entries[slot] = entry
+        self._count = min(self._count + 1, self._capacity)
+        self._next = (slot + 1) % self._capacity
+
+    def best_match(self, embedding, min_ts: float) -> tuple[float, dict] | None:
+        """Highest-cosine entry with `ts >= min_ts`, as (score, entry). Ties go
+        to the most recently stored entry, matching the old most-recent-first
+        linear scan. None when empty or every entry is expired."""
+        if self._count == 0 or self._matrix is None:
+            return None
+        query = self._normalize(embedding)
+        if query.shape[0] != self._matrix.shape[1]:
+            return None
+        scores = self._matrix[: self._count] @ query
+        ts = self._ts[: self._count]
+        scores[ts < min_ts] = -np.inf
+        best = float(scores.max())
+        if best == -np.inf:
+            return None
+        tied = np.flatnonzero(scores == best)
+        slot = int(tied[np.argmax(ts[tied])]) if len(tied) > 1 else int(tied[0])
+        return best, self._entries[slot]
+
+    def discard(self, predicate) -> int:
+        """Drop every entry for which `predicate(entry)` is true; returns how
+        many. Dropped slots are marked expired (ts = -inf) rather than
+        compacted — they can never match again and get overwritten by the
+        ring as new entries arrive."""
+        dropped = 0
+        for slot in range(self._count):
+            entry = self._entries[slot]
+            if entry is not None and predicate(entry):
+                self._ts[slot] = -np.inf
+                self._entries[slot] = None
+                dropped += 1
+        return dropped
+
+    def clear(self) -> None:
+        self._matrix = None
+        self._ts = np.zeros(0, dtype=np.float64)
+        self._entries = []
+        self._count = 0
+        self._next = 0
+
+    @classmethod
+    def from_entries(cls, entries: list[tuple], capacity: int) -> "_EmbeddingIndex":
+        """Build an index from (embedding, entry) pairs, most-recent-first as
+        stored in the Redis list."""
+        index = cls(max(capacity, len(entries)))
+        for embedding, entry in reversed(entries):
+            index.add(embedding, entry.get("ts", 0), entry)
+        return index
+
+
+# Redis wire format for one answer-cache entry: a 1-byte format tag, a
+# 4-byte little-endian length, the entry's JSON metadata (everything but the
+# embedding), then the embedding as packed little-endian float32. A 768-dim
+# vector is 3 KB this way versus ~15 KB as JSON float text, and decoding it is
+# a single np.frombuffer instead of json.loads over 768 numbers.
+_PACKED_ENTRY_TAG = b"\x01"
+_PACKED_HEADER = struct.Struct("<I")
+
+
+def _pack_entry(embedding, entry: dict) -> bytes:
+    meta = json.dumps(entry).encode()
+    vector = np.asarray(embedding, dtype="<f4").tobytes()
+    return _PACKED_ENTRY_TAG + _PACKED_HEADER.pack(len(meta)) + meta + vector
+
+
+def _unpack_entry(raw: bytes) -> tuple[np.ndarray, dict]:
+    if not raw.startswith(_PACKED_ENTRY_TAG):
+        # Pre-packing format: the whole entry, embedding included, as JSON.
+        entry = json.loads(raw)
+        return np.asarray(entry.pop("embedding"), dtype=np.float32), entry
+    offset = len(_PACKED_ENTRY_TAG)
+    (meta_len,) = _PACKED_HEADER.unpack_from(raw, offset)
+    offset += _PACKED_HEADER.size
+    entry = json.loads(raw[offset : offset + meta_len])
+    embedding = np.frombuffer(raw, dtype="<f4", offset=offset + meta_len)
+    return embedding, entry
 
 
 # ── Async semantic answer cache (Redis-backed or in-memory) ───────────────────
@@ -227,12 +608,19 @@ class AsyncAnswerCache:
     roughly the time of one embedding call (~1-2s) instead of minutes.
 
     Entries are stored as a bounded, most-recent-first list (Redis LIST, or an
-    in-memory list as fallback) — small enough (a few hundred entries) that a
-    linear cosine-similarity scan on every lookup is negligible next to LLM
-    latency, without needing a vector-search-capable Redis build.
+    in-memory _EmbeddingIndex as fallback). With Redis, every worker keeps its
+    own _EmbeddingIndex mirror of that list, tagged with the value of a shared
+    generation counter (`_REDIS_GENERATION_KEY`) that every store/invalidate
+    bumps; a lookup costs one small GET of that counter and only re-downloads
+    the list (packed float32, see _pack_entry) when another worker changed it. Similarity is computed as one
+    vectorized matrix-vector product over pre-normalized float32 embeddings —
+    a pure-Python cosine loop over answer_cache_max_entries (1000) × 768 dims
+    was millions of interpreter-level float ops on the event loop before any
+    answer got served, and doesn't need a vector-search-capable Redis build.
     """
 
     _REDIS_KEY = "answer_cache:entries"
+    _REDIS_GENERATION_KEY = "answer_cache:generation"
 
     def __init__(
         self,
@@ -243,7 +631,10 @@ class AsyncAnswerCache:
         self._ttl = ttl_seconds
         self._max = max_size
         self._threshold = similarity_threshold
-        self._store: list[dict] = []  # in-memory fallback, most-recent-first
+        # In-memory store — or, with Redis, the local mirror of the shared list
+        # as of `_mirror_generation` (-1 = never loaded).
+        self._index = _EmbeddingIndex(max_size)
+        self._mirror_generation = -1
         self._redis = None
         self._enabled = True
 
@@ -263,24 +654,28 @@ class AsyncAnswerCache:
 
     # ── Similarity ────────────────────────────────────────────────────────────
 
-    @staticmethod
-    def _cosine(a: list[float], b: list[float]) -> float:
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(y * y for y in b) ** 0.5
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot / (norm_a * norm_b)
-
-    async def _load_entries(self) -> list[dict]:
-        if self._redis is not None:
-            try:
+    async def _load_index(self) -> _EmbeddingIndex:
+        """The index to search. With Redis, refreshes the local mirror first
+        if the shared generation counter moved since it was last loaded —
+        otherwise this is a single GET round trip."""
+        if self._redis is None:
+            return self._index
+        try:
+            generation = int(await self._redis.get(self._REDIS_GENERATION_KEY) or 0)
+            if generation != self._mirror_generation:
                 raw = await self._redis.lrange(self._REDIS_KEY, 0, -1)
-                return [json.loads(r) for r in raw]
-            except Exception as e:
-                logger.debug("Answer cache load error (falling through): %s", e)
-                return []
-        return list(self._store)
+                self._index = _EmbeddingIndex.from_entries(
+                    [_unpack_entry(r) for r in raw], self._max
+                )
+                self._mirror_generation = generation
+                logger.debug(
+                    "Answer cache mirror reloaded (generation=%d, entries=%d)",
+                    generation, len(self._index),
+                )
+        except Exception as e:
+            logger.debug("Answer cache load error (falling through): %s", e)
+            return _EmbeddingIndex(1)
+        return self._index
 
     # ── Core operations ───────────────────────────────────────────────────────
 
@@ -388,34 +783,32 @@ class AsyncAnswerCache:
         dict has: question, answer, sources, llm_provider, llm_model."""
         if not self._enabled:
             return None
-        entries = await self._load_entries()
-        now = time.time()
+        index = await self._load_index()
+        match = index.best_match(embedding, min_ts=time.time() - self._ttl)
         best: dict | None = None
         best_score = 0.0
-        for entry in entries:
-            if now - entry.get("ts", 0) > self._ttl:
-                continue
-            score = self._cosine(embedding, entry["embedding"])
-            if score > best_score:
-                best_score = score
-                best = entry
+        if match is not None and match[0] > 0:
+            best_score, best = match
         if best is not None and best_score >= self._threshold:
             if query_text and not self._semester_guard_passes(best, query_text):
                 logger.info(
                     "Answer cache guard rejected hit (similarity=%.3f, semester mismatch): '%.60s…'",
                     best_score, query_text,
                 )
+                self._count_rejection("semester")
                 return None
             if query_text and not self._entity_guard_passes(best, query_text):
                 logger.info(
                     "Answer cache guard rejected hit (similarity=%.3f, entity mismatch): '%.60s…'",
                     best_score, query_text,
                 )
+                self._count_rejection("entity")
                 return None
             logger.info(
                 "Answer cache HIT (similarity=%.3f): '%.60s…'",
                 best_score, best.get("question", ""),
             )
+            ANSWER_CACHE_LOOKUPS.inc(result="hit")
             return best
         if best is not None:
             # Below threshold — logged even on a miss (unlike the guard-rejection
@@ -426,8 +819,14 @@ class AsyncAnswerCache:
                 "Answer cache MISS (best similarity=%.3f, threshold=%.2f): '%.60s…' vs '%.60s…'",
                 best_score, self._threshold, query_text, best.get("question", ""),
             )
+        ANSWER_CACHE_LOOKUPS.inc(result="miss")
         return None
 
+    @staticmethod
+    def _count_rejection(guard: str) -> None:
+        ANSWER_CACHE_LOOKUPS.inc(result="guard_rejected")
+        ANSWER_CACHE_GUARD_REJECTIONS.inc(guard=guard)
+
     async def store(
         self,
         embedding: list[float],
@@ -436,46 +835,110 @@ class AsyncAnswerCache:
         sources: list[dict],
         llm_provider: str,
         llm_model: str,
+        tags=None,
     ) -> None:
+        """`tags` (see cache_tags) should name every document the answer was
+        generated from — the whole RAG context, not just the cited `sources`
+        — so invalidate_tags() catches it; defaults to tags derived from
+        `sources`."""
         if not self._enabled:
             return
         entry = {
-            "embedding": embedding,
             "question": question,
             "answer": answer,
             "sources": sources,
             "llm_provider": llm_provider,
             "llm_model": llm_model,
             "ts": time.time(),
+            "tags": sorted(tags if tags is not None else self._source_tags(sources)),
         }
         if self._redis is not None:
             try:
-                await self._redis.lpush(self._REDIS_KEY, json.dumps(entry))
-                await self._redis.ltrim(self._REDIS_KEY, 0, self._max - 1)
+                pipe = self._redis.pipeline(transaction=True)
+                pipe.lpush(self._REDIS_KEY, _pack_entry(embedding, entry))
+                pipe.ltrim(self._REDIS_KEY, 0, self._max - 1)
                 # Safety-net expiry on the whole list; find_similar() already
                 # filters individually-stale entries by `ts` on every read.
-                await self._redis.expire(self._REDIS_KEY, self._ttl)
+                pipe.expire(self._REDIS_KEY, self._ttl)
+                pipe.incr(self._REDIS_GENERATION_KEY)
+                generation = (await pipe.execute())[-1]
             except Exception as e:
                 logger.debug("Answer cache store error: %s", e)
-            return
+                return
+            if generation != self._mirror_generation + 1:
+                # Another worker wrote in between — the mirror is missing
+                # that entry too, so let the next lookup reload everything.
+                return
+            self._mirror_generation = generation
 
-        self._store.insert(0, entry)
-        if len(self._store) > self._max:
-            self._store.pop()
+        self._index.add(embedding, entry["ts"], entry)
 
     async def invalidate_all(self) -> None:
         """Clear all entries. See AsyncRAGCache.invalidate_all — same fix,
         same reason: a failed Redis delete must not be logged as success."""
         if self._redis is not None:
             try:
-                await self._redis.delete(self._REDIS_KEY)
+                pipe = self._redis.pipeline(transaction=True)
+                pipe.delete(self._REDIS_KEY)
+                pipe.incr(self._REDIS_GENERATION_KEY)
+                await pipe.execute()
             except Exception as e:
                 logger.warning("Answer cache invalidate FAILED (stale entries may remain): %s", e)
                 return
-        else:
-            self._store.clear()
+            # Force a reload on the next lookup rather than trusting the
+            # counter value we just got — same as any other worker would.
+            self._mirror_generation = -1
+        self._index.clear()
         logger.info("Answer cache invalidated")
 
+    async def invalidate_tags(self, tags) -> None:
+        """Drop only entries tagged with any of `tags` (see cache_tags). Same
+        failure-logging contract as invalidate_all().
+
+        On Redis this removes the exact matching list elements with LREM, so
+        an entry another worker pushes concurrently is never lost, then bumps
+        the generation so every worker's mirror reloads.
+        """
+        tags = set(tags)
+        if not tags:
+            return
+
+        def matches(entry: dict) -> bool:
+            return bool(tags & self._entry_tags(entry))
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.lrange(self._REDIS_KEY, 0, -1)
+                stale = [r for r in raw if matches(_unpack_entry(r)[1])]
+                if stale:
+                    pipe = self._redis.pipeline(transaction=True)
+                    for r in stale:
+                        pipe.lrem(self._REDIS_KEY, 0, r)
+                    pipe.incr(self._REDIS_GENERATION_KEY)
+                    await pipe.execute()
+                    self._mirror_generation = -1
+                dropped = len(stale)
+            except Exception as e:
+                logger.warning("Answer cache tag invalidate FAILED (stale entries may remain): %s", e)
+                return
+        else:
+            dropped = self._index.discard(matches)
+        logger.info("Answer cache invalidated %d entries for tags %s", dropped, sorted(tags))
+
+    @staticmethod
+    def _source_tags(sources: list[dict]) -> set[str]:
+        return cache_tags(
+            document_ids={s.get("document_id") for s in sources},
+            programs={s.get("program") for s in sources},
+        )
+
+    @classmethod
+    def _entry_tags(cls, entry: dict) -> set[str]:
+        # Entries cached before tagging existed only have their sources.
+        if "tags" in entry:
+            return set(entry["tags"])
+        return cls._source_tags(entry.get("sources") or [])
+
 
 # ── Module-level singletons ───────────────────────────────────────────────────
 
@@ -491,7 +954,9 @@ answer_cache = AsyncAnswerCache(
     similarity_threshold=settings.answer_cache_similarity_threshold,
 )
 
-# Embedding cache: sync in-memory only (deterministic, no cross-session benefit from Redis)
+# Embedding cache: sync in-memory only — the hot tier in front of the durable
+# embedding_store table (services/embedding_store.py), which is what survives
+# restarts; a Redis copy would only add a third tier.
 embedding_cache = TTLCache(ttl_seconds=21600, max_size=2048)
 
 # Suggested-questions cache (welcome screen): stable for a few minutes so the
@@ -513,3 +978,20 @@ program_list_cache = TTLCache(ttl_seconds=600, max_size=1)
 # de sistemas"), parsed from each document's own intro text. Same caching
 # rationale as program_list_cache.
 program_alias_cache = TTLCache(ttl_seconds=600, max_size=1)
+
+
+@REGISTRY.collector
+def _collect_cache_metrics():
+    """Hit/miss counters already kept by the caches themselves (see stats())."""
+    caches = {"rag": rag_cache, "embedding": embedding_cache}
+    stats = {name: c.stats() for name, c in caches.items()}
+    yield "cache_lookups", "counter", "Cache lookups by cache and outcome.", [
+        ({"cache": name, "result": result}, st[field])
+        for name, st in stats.items() for result, field in (("hit", "hits"), ("miss", "misses"))
+    ]
+    yield "cache_evictions", "counter", "In-memory cache LRU evictions.", [
+        ({"cache": name}, st.get("evictions")) for name, st in stats.items()
+    ]
+    yield "cache_entries", "gauge", "In-memory cache entry count.", [
+        ({"cache": name}, st.get("entries")) for name, st in stats.items()
+    ]
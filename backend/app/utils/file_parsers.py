@@ -1,5 +1,6 @@
 import logging
 import re
+from typing import Iterator
 from xml.etree import ElementTree as ET
 
 logger = logging.getLogger(__name__)
@@ -51,47 +52,67 @@ def _extract_pdf(file_path: str) -> str:
     Standard PyMuPDF get_text("text") scrambles columns and rotated grids (e.g.
     curriculum pensum tables).  This approach rebuilds rows from (x, y) spans.
     """
+    return "\n\n".join(page for page in iter_pdf_pages(file_path) if page)
+
+
+def pdf_page_count(file_path: str) -> int:
     import fitz  # PyMuPDF
 
-    all_pages = []
     with fitz.open(file_path) as doc:
-        for page in doc:
-            page_dict = page.get_text("dict")
-            words: list[tuple[float, float, str]] = []
+        return len(doc)
 
-            for block in page_dict.get("blocks", []):
-                if block.get("type") != 0:  # skip image blocks
-                    continue
-                for line in block.get("lines", []):
-                    for span in line.get("spans", []):
-                        text = span.get("text", "").strip()
-                        if not text:
-                            continue
-                        if len(text) == 1 and not text.isalpha():
-                            continue
-                        words.append((span["bbox"][0], span["bbox"][1], text))
-
-            if not words:
-                continue
 
-            ROW_BUCKET = 6
-            rows: dict[int, list[tuple[float, str]]] = {}
-            for x0, y0, text in words:
-                key = round(y0 / ROW_BUCKET) * ROW_BUCKET
-                rows.setdefault(key, []).append((x0, text))
+def iter_pdf_pages(file_path: str, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    """Yield the reconstructed text of pages [start, stop) one at a time.
 
-            page_lines = []
-            for y_key in sorted(rows):
-                row_words = sorted(rows[y_key], key=lambda w: w[0])
-                line = " ".join(w for _, w in row_words).strip()
-                meaningful = sum(1 for c in line if c.isalpha())
-                if len(line) > 3 and meaningful >= 2:
-                    page_lines.append(line)
+    Yields "" for a page with no usable text (scanned, image-only) so callers
+    can count pages; `_extract_pdf` drops those. Only the current page's spans
+    are held in memory — the ingestion pipeline streams large PDFs through
+    this in page batches (see parse_pool.stream_pdf_chunks) instead of
+    materializing the whole document's text.
+    """
+    import fitz  # PyMuPDF
+
+    with fitz.open(file_path) as doc:
+        stop = len(doc) if stop is None else min(stop, len(doc))
+        for page_num in range(start, stop):
+            yield _pdf_page_text(doc[page_num])
 
-            if page_lines:
-                all_pages.append("\n".join(page_lines))
 
-    return "\n\n".join(all_pages)
+def _pdf_page_text(page) -> str:
+    page_dict = page.get_text("dict")
+    words: list[tuple[float, float, str]] = []
+
+    for block in page_dict.get("blocks", []):
+        if block.get("type") != 0:  # skip image blocks
+            continue
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                text = span.get("text", "").strip()
+                if not text:
+                    continue
+                if len(text) == 1 and not text.isalpha():
+                    continue
+                words.append((span["bbox"][0], span["bbox"][1], text))
+
+    if not words:
+        return ""
+
+    ROW_BUCKET = 6
+    rows: dict[int, list[tuple[float, str]]] = {}
+    for x0, y0, text in words:
+        key = round(y0 / ROW_BUCKET) * ROW_BUCKET
+        rows.setdefault(key, []).append((x0, text))
+
+    page_lines = []
+    for y_key in sorted(rows):
+        row_words = sorted(rows[y_key], key=lambda w: w[0])
+        line = " ".join(w for _, w in row_words).strip()
+        meaningful = sum(1 for c in line if c.isalpha())
+        if len(line) > 3 and meaningful >= 2:
+            page_lines.append(line)
+
+    return "\n".join(page_lines)
 
 
 # ── DOCX ─────────────────────────────────────────────────────────────────────
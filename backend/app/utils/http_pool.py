@@ -0,0 +1,137 @@
+"""
+Shared, long-lived HTTP connection pool for talking to Ollama.
+
+Every Ollama call used to open its own `httpx.AsyncClient` — a fresh TCP
+connection (and pool) per chat turn, HyDE doc, verification grade, embedding
+batch and health probe. OllamaHTTPPool owns ONE client for the whole process:
+created in the app lifespan (main.py), closed on shutdown, with connection
+limits from settings so keep-alive connections are reused across calls.
+
+The client carries no meaningful default timeout — each call passes its own
+(600s for generation, 5s for /api/tags, ...) because those budgets differ by
+two orders of magnitude and used to be the only reason for separate clients.
+
+Saturation metrics: httpx doesn't expose how many requests are queued for a
+connection, so the pool counts in-flight requests itself. A request that
+starts while `in_flight >= max_connections` had to wait for a free
+connection — `saturated_requests` counts those, and `peak_in_flight` shows
+how close the pool has come to its limit. Exposed under /metrics.
+"""
+
+import logging
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from app.config import settings
+from app.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaHTTPPool:
+    def __init__(self):
+        self._client: httpx.AsyncClient | None = None
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._requests = 0
+        self._saturated = 0
+
+    @property
+    def max_connections(self) -> int:
+        return settings.ollama_pool_max_connections
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.ollama_pool_max_connections,
+                max_keepalive_connections=settings.ollama_pool_max_keepalive,
+                keepalive_expiry=settings.ollama_pool_keepalive_expiry_seconds,
+            ),
+            timeout=httpx.Timeout(None),
+        )
+        logger.info(
+            "Ollama HTTP pool started (max_connections=%d, keepalive=%d)",
+            settings.ollama_pool_max_connections, settings.ollama_pool_max_keepalive,
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+            logger.info("Ollama HTTP pool closed")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazy start for code paths that never run the app lifespan (scripts,
+        # eval harnesses, tests) — same pool semantics, just created on demand.
+        if self._client is None:
+            self.start()
+        return self._client
+
+    # ── Requests ──────────────────────────────────────────────────────────────
+
+    async def post(self, url: str, *, timeout: float, **kwargs) -> httpx.Response:
+        with self._track():
+            return await self.client.post(url, timeout=timeout, **kwargs)
+
+    async def get(self, url: str, *, timeout: float, **kwargs) -> httpx.Response:
+        with self._track():
+            return await self.client.get(url, timeout=timeout, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, url: str, *, timeout: float, **kwargs
+    ) -> AsyncIterator[httpx.Response]:
+        with self._track():
+            async with self.client.stream(method, url, timeout=timeout, **kwargs) as response:
+                yield response
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        return {
+            "active": self._client is not None,
+            "max_connections": self.max_connections,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "requests": self._requests,
+            "saturated_requests": self._saturated,
+            "saturation": round(self._in_flight / self.max_connections, 3)
+            if self.max_connections else 0.0,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _track(self):
+        self._requests += 1
+        if self._in_flight >= self.max_connections:
+            self._saturated += 1
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+
+
+ollama_http_pool = OllamaHTTPPool()
+
+
+@REGISTRY.collector
+def _collect_pool_metrics():
+    st = ollama_http_pool.stats()
+    yield "ollama_pool_in_flight", "gauge", "Ollama HTTP requests in flight.", [({}, st["in_flight"])]
+    yield "ollama_pool_max_connections", "gauge", "Ollama HTTP pool connection limit.", [
+        ({}, st["max_connections"]),
+    ]
+    yield "ollama_pool_requests", "counter", "Ollama HTTP requests issued.", [({}, st["requests"])]
+    yield "ollama_pool_saturated_requests", "counter", "Ollama HTTP requests that started with the pool full.", [
+        ({}, st["saturated_requests"]),
+    ]
@@ -0,0 +1,263 @@
+"""
+Process metrics in Prometheus text exposition format (version 0.0.4).
+
+    ANSWER_CACHE_LOOKUPS.inc(result="hit")
+    with LLM_REQUEST_SECONDS.time(provider="ollama", op="generate"):
+        ...
+
+Served by GET /api/v1/metrics/prometheus (routers/health.py). Deliberately
+tiny instead of pulling in prometheus_client: counters, gauges and
+histograms with labels, in one process-wide REGISTRY, are all this app needs.
+Each uvicorn worker exposes its own numbers — scrape every worker, or
+aggregate with sum() by job in PromQL, same as prometheus_client's default
+(non-multiprocess) mode.
+
+Two kinds of series:
+  * instrumented — Counter/Histogram/Gauge objects updated on the hot path
+    (cache lookups, provider calls, pool checkouts);
+  * collected — `collector(fn)` callbacks run at scrape time for values
+    that already live somewhere else (cache hit counters kept by
+    _LRUStore, the Ollama pool's stats(), the SQLAlchemy pool size). A
+    collector yields (name, type, help, [(labels, value), ...]) tuples.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+
+_PREFIX = "guaca_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds. Spans the answer-cache lookup (~ms) up to CPU-only Ollama
+# generations that take minutes.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+Sample = tuple[dict, float]
+Family = tuple[str, str, str, list[Sample]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = _PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Counters are bumped from worker threads too (SQLAlchemy's sync pool
+        # code, asyncio.to_thread parsing), so updates take a lock.
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _as_labels(self, key: tuple) -> dict:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for key, value in list(self._values.items()):
+            yield self.name + "_total", self._as_labels(key), value
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for key, value in list(self._values.items()):
+            yield self.name, self._as_labels(key), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> ([per-bucket counts..., +Inf count], sum)
+        self._values: dict[tuple, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall-clock duration of the block, failures included."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for key, (counts, total) in list(self._values.items()):
+            labels = self._as_labels(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                yield self.name + "_bucket", {**labels, "le": _number(bound)}, cumulative
+            yield self.name + "_count", labels, cumulative
+            yield self.name + "_sum", labels, total
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn: Callable[[], Iterable[Family]]) -> Callable[[], Iterable[Family]]:
+        """Register a scrape-time callback (usable as a decorator). Names it
+        yields get the same prefix as instrumented metrics."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self, extra: Iterable[Family] = ()) -> str:
+        """Exposition text. `extra` families are for values the caller had to
+        await (collectors are sync), e.g. the DB row estimates."""
+        lines: list[str] = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.type}")
+            for name, labels, value in m.samples():
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        families = [f for fn in self._collectors for f in fn()] + list(extra)
+        for name, type_, help, samples in families:
+            name = _PREFIX + name
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            suffix = "_total" if type_ == "counter" else ""
+            for labels, value in samples:
+                if value is None:
+                    continue
+                lines.append(f"{name}{suffix}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ── Instrumented series ───────────────────────────────────────────────────────
+
+ANSWER_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "answer_cache_lookups", "Answer-cache lookups by outcome (hit, miss, guard_rejected).",
+    ["result"],
+))
+ANSWER_CACHE_GUARD_REJECTIONS = REGISTRY.register(Counter(
+    "answer_cache_guard_rejections", "Similarity hits discarded by an answer-cache guard.",
+    ["guard"],
+))
+LLM_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "llm_request_seconds", "Provider call latency (stream: until the last token).",
+    ["provider", "op"],
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "llm_tokens", "Tokens reported by the provider.", ["provider", "kind"],
+))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "llm_errors", "Provider calls that raised.", ["provider", "op"],
+))
+OPENAI_RATE_LIMIT_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "openai_rate_limit_wait_seconds", "Time spent in _TokenRateLimiter.reserve().",
+    buckets=(0.001, 0.01, 0.1, 0.5, 1, 5, 10, 30, 60),
+))
+DB_POOL_CHECKOUT_SECONDS = REGISTRY.register(Histogram(
+    "db_pool_checkout_seconds", "Wait for a SQLAlchemy pool connection (incl. connect on overflow).",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+))
+
+
+def count_tokens(provider: str, tokens_used: dict | None) -> None:
+    """Feed a provider's `tokens_used` dict ({prompt, completion, total}) into LLM_TOKENS."""
+    if not tokens_used:
+        return
+    for kind in ("prompt", "completion"):
+        if tokens_used.get(kind):
+            LLM_TOKENS.inc(tokens_used[kind], provider=provider, kind=kind)
+
+
+@contextmanager
+def llm_call(provider: str, op: str) -> Iterator[None]:
+    """Latency histogram + error counter around one provider call."""
+    with LLM_REQUEST_SECONDS.time(provider=provider, op=op):
+        try:
+            yield
+        except Exception:
+            LLM_ERRORS.inc(provider=provider, op=op)
+            raise
@@ -0,0 +1,221 @@
+"""
+Process pool for CPU-bound document parsing and chunking.
+
+PyMuPDF span reconstruction (`_extract_pdf`), openpyxl's semester-grid
+detection (`_extract_xlsx`), python-pptx, page rendering for the vision model
+and tiktoken-counted chunking are pure CPU with the GIL held — run on the
+event loop, a 200-page PDF froze every streaming chat connection on that
+worker for seconds; run in a thread, they still starve it through the GIL.
+Here they run in a bounded ProcessPoolExecutor instead:
+
+    text = await parse_pool.extract_clean_text(path, "docx")
+    chunks = await parse_pool.chunk(text, tabular=False)
+
+Same functions, same output — the workers call file_parsers / chunking /
+text_processing unchanged; only where they run differs. PDFs can also be
+streamed in page batches (`stream_pdf_chunks`), so a long one never has its
+whole text in memory at once.
+
+Limits, per task:
+  * timeout (`parse_timeout_seconds`) — a parse that overruns is abandoned
+    AND its worker killed (a stuck PyMuPDF call can't be interrupted any
+    other way), after which the pool is rebuilt for the next file;
+  * memory (`parse_memory_limit_mb`) — RLIMIT_AS set in each worker, so a
+    pathological file raises MemoryError in the worker instead of pushing
+    the web process into the OOM killer. Linux/macOS only; ignored elsewhere.
+
+Workers are started with "spawn" (forking a process that runs an event loop
+and DB driver threads is unsafe) and recycled every `_MAX_TASKS_PER_CHILD`
+tasks so fragmentation from large files doesn't accumulate.
+`parse_pool_workers = 0` disables the pool and runs the same functions in a
+thread (tests, debugging).
+"""
+
+import asyncio
+import base64
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import AsyncIterator
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_TASKS_PER_CHILD = 50
+
+
+class ParseTimeout(Exception):
+    pass
+
+
+# ── Worker-side functions (must be importable top-level callables) ──────────
+
+def _init_worker(memory_limit_mb: int) -> None:
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:  # non-POSIX, or hard limit lower
+        logger.warning("Parse worker memory limit not applied: %s", e)
+
+
+def _extract_clean_text(file_path: str, file_type: str) -> str:
+    from app.utils.file_parsers import extract_text
+    from app.utils.text_processing import clean_text
+    return clean_text(extract_text(file_path, file_type))
+
+
+def _chunk(text: str, tabular: bool, chunk_size: int, chunk_overlap: int) -> list[dict]:
+    from app.utils.chunking import chunk_tabular_text, chunk_text
+    chunker = chunk_tabular_text if tabular else chunk_text
+    return chunker(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _pdf_prefix(file_path: str, min_pages: int, min_chars: int) -> tuple[list[str], int]:
+    """Cleaned text of the first pages — at least `min_pages`, and onward
+    until `min_chars` of text — plus the document's page count."""
+    from app.utils.file_parsers import iter_pdf_pages, pdf_page_count
+    from app.utils.text_processing import clean_text
+
+    pages: list[str] = []
+    chars = 0
+    for text in iter_pdf_pages(file_path):
+        pages.append(clean_text(text))
+        chars += len(pages[-1])
+        if len(pages) >= min_pages and chars >= min_chars:
+            break
+    return pages, pdf_page_count(file_path)
+
+
+def _chunk_pdf_pages(
+    file_path: str, start: int, stop: int, lead: str, chunk_size: int, chunk_overlap: int,
+) -> list[dict]:
+    from app.utils.chunking import chunk_text
+    from app.utils.file_parsers import iter_pdf_pages
+    from app.utils.text_processing import clean_text
+
+    pages = (clean_text(text) for text in iter_pdf_pages(file_path, start, stop))
+    text = "\n\n".join(part for part in (lead, *pages) if part)
+    return chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _render_pdf_pages(file_path: str, max_pages: int, zoom: float) -> list[str]:
+    """First `max_pages` pages as base64 PNGs (input for the vision model)."""
+    import fitz  # PyMuPDF
+
+    images: list[str] = []
+    with fitz.open(file_path) as doc:
+        for page_num in range(min(max_pages, len(doc))):
+            pix = doc[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            images.append(base64.b64encode(pix.tobytes("png")).decode())
+    return images
+
+
+# ── Pool ──────────────────────────────────────────────────────────────────────
+
+class ParsePool:
+    def __init__(self):
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.parse_pool_workers > 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.parse_pool_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(settings.parse_memory_limit_mb,),
+                max_tasks_per_child=_MAX_TASKS_PER_CHILD,
+            )
+        return self._executor
+
+    async def run(self, fn, *args, timeout: float | None = None):
+        """Run `fn(*args)` in a worker process, bounded by `timeout`
+        (default `parse_timeout_seconds`)."""
+        timeout = settings.parse_timeout_seconds if timeout is None else timeout
+        if not self.enabled:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout)
+
+        executor = self._pool()
+        future = asyncio.get_running_loop().run_in_executor(executor, partial(fn, *args))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.error("%s exceeded %.0fs — killing parse workers", fn.__name__, timeout)
+            await self._reset(executor)
+            raise ParseTimeout(f"{fn.__name__} exceeded {timeout:.0f}s") from None
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault in a C extension) — every
+            # task in flight fails with this; rebuild for the next caller.
+            logger.error("Parse worker died during %s — rebuilding pool", fn.__name__)
+            await self._reset(executor)
+            raise
+
+    async def extract_clean_text(self, file_path: str, file_type: str) -> str:
+        return await self.run(_extract_clean_text, file_path, file_type)
+
+    async def chunk(self, text: str, tabular: bool) -> list[dict]:
+        return await self.run(_chunk, text, tabular, settings.chunk_size, settings.chunk_overlap)
+
+    async def pdf_prefix(self, file_path: str, min_pages: int, min_chars: int) -> tuple[list[str], int]:
+        return await self.run(_pdf_prefix, file_path, min_pages, min_chars)
+
+    async def stream_pdf_chunks(
+        self, file_path: str, start: int, page_count: int, lead: str = "",
+    ) -> AsyncIterator[tuple[list[dict], int]]:
+        """Chunks of pages [start, page_count), `pdf_stream_batch_pages` pages
+        per worker task, as (chunks, pages done). `lead` is text chunked
+        ahead of page `start` (the summary and the pages already read for
+        it). Peak memory is one batch of pages plus its chunks, whatever the
+        document's length, and the caller can embed a batch while the next
+        one is being extracted.
+
+        Batches are chunked independently — a chunk never spans a batch
+        boundary. Pages are joined with the same "\n\n" `chunk_text` splits
+        on first, so output matches chunking the whole text except that
+        small pages on either side of a boundary aren't merged into one chunk.
+        """
+        batch = max(1, settings.pdf_stream_batch_pages)
+        if start >= page_count:
+            if lead:
+                yield await self.chunk(lead, tabular=False), page_count
+            return
+        for page in range(start, page_count, batch):
+            stop = min(page + batch, page_count)
+            yield await self.run(
+                _chunk_pdf_pages, file_path, page, stop, lead,
+                settings.chunk_size, settings.chunk_overlap,
+            ), stop
+            lead = ""
+
+    async def render_pdf_pages(self, file_path: str, max_pages: int = 4, zoom: float = 2.0) -> list[str]:
+        return await self.run(_render_pdf_pages, file_path, max_pages, zoom)
+
+    async def _reset(self, executor: ProcessPoolExecutor) -> None:
+        # Only the pool the failure came from: the other tasks that fail
+        # alongside it must not tear down the replacement.
+        if self._executor is not executor:
+            return
+        self._executor = None
+        # ProcessPoolExecutor can't cancel a running task; terminating its
+        # workers is the only way to stop a runaway parse. Other files in
+        # flight fail with BrokenProcessPool — the ingestion queue retries them.
+        for proc in list((getattr(executor, "_processes", None) or {}).values()):
+            proc.terminate()
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,83 @@
+"""64-bit SimHash signatures for near-duplicate chunk detection.
+
+A chunk's signature is computed once at ingestion from its set of terms
+(app/utils/bm25.py's tokenizer) and stored as `document_chunks.simhash`.
+Two chunks are near-duplicates when their signatures differ in few bits:
+for random-hyperplane SimHash the expected Hamming distance is 64·θ/π, θ
+being the angle between the two term-set vectors — so comparing a pair is
+one XOR and a popcount instead of rebuilding and intersecting word sets.
+
+Stored signed (Postgres BIGINT); `distance()` masks, so signed and unsigned
+forms of the same signature compare equal.
+"""
+from __future__ import annotations
+
+import hashlib
+
+import numpy as np
+
+from app.utils.bm25 import terms
+
+BITS = 64
+_MASK = (1 << BITS) - 1
+
+
+def _feature_hash(term: str) -> int:
+    # blake2b, not hash(): Python's string hash is salted per process, and
+    # signatures are compared across workers and stored.
+    return int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "big")
+
+
+def signature(text: str) -> int:
+    """Signed 64-bit SimHash of `text`'s distinct terms (0 for no terms)."""
+    features = set(terms(text))
+    if not features:
+        return 0
+    hashes = np.fromiter((_feature_hash(f) for f in features), dtype=">u8", count=len(features))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)
+    # Each bit of the signature is the majority vote of that bit across features.
+    majority = np.packbits(bits.sum(axis=0) * 2 > len(features))
+    value = int.from_bytes(majority.tobytes(), "big")
+    return value - (1 << BITS) if value >> (BITS - 1) else value
+
+
+def distance(a: int, b: int) -> int:
+    """Hamming distance between two signatures."""
+    return ((a ^ b) & _MASK).bit_count()
+
+
+class SignatureIndex:
+    """Signatures seen so far, answering "is there one within `max_bits`?"
+    without a scan.
+
+    Split into `max_bits + 1` bands: two signatures within `max_bits` of each
+    other must agree exactly on at least one band (pigeonhole), so only
+    signatures sharing a band value are compared. Used by ingestion to
+    collapse near-identical chunks of one document; keep `max_bits` small
+    (a handful) or the bands get too narrow to discriminate.
+    """
+
+    def __init__(self, max_bits: int):
+        self.max_bits = max_bits
+        bands = max_bits + 1
+        width, extra = divmod(BITS, bands)
+        self._bands: list[tuple[int, int]] = []  # (shift, mask)
+        shift = 0
+        for i in range(bands):
+            w = width + (1 if i < extra else 0)
+            self._bands.append((shift, (1 << w) - 1))
+            shift += w
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in self._bands]
+
+    def add(self, sig: int) -> None:
+        sig &= _MASK
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            buckets.setdefault((sig >> shift) & mask, []).append(sig)
+
+    def near(self, sig: int) -> bool:
+        sig &= _MASK
+        for (shift, mask), buckets in zip(self._bands, self._buckets):
+            for other in buckets.get((sig >> shift) & mask, ()):
+                if distance(sig, other) <= self.max_bits:
+                    return True
+        return False
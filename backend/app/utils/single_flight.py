@@ -0,0 +1,198 @@
+"""
+Single-flight request coalescing.
+
+When a whole class asks "¿Cuáles son los requisitos de admisión?" at the same
+moment, every request misses the caches (nothing is stored until the first
+one finishes) and independently runs HyDE, embedding, pgvector search,
+generation and verification — N times the Ollama work for one answer.
+
+SingleFlight.do(key, fn) runs `fn` once per key at a time: the first caller
+(the leader) computes, concurrent callers with the same key (followers) await
+the leader's result instead of starting their own. Keys come from
+coalesce_key(): the normalized query (lowercase, accent/punctuation-stripped,
+whitespace-collapsed) plus whatever else changes the result (filters, model…).
+
+Cross-worker (optional): with Redis connected, the leader also takes a
+`SET NX PX` lock. A leader in ANOTHER worker that finds the lock taken polls
+`recheck` — normally a lookup in the Redis-backed cache the real leader will
+write to — until it returns a value or the lock goes away, and only then
+computes itself. Without `recheck` (results that never reach a shared
+cache), coalescing stays in-process.
+
+Failure policy: if the leader fails — including being cancelled because its
+client disconnected — followers don't inherit that failure; each falls back
+to computing on its own, exactly as it would have without coalescing.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Awaitable, Callable, TypeVar
+
+from app.config import settings
+from app.utils.metrics import REGISTRY
+from app.utils.text_processing import normalize_for_match
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+# Compare-and-delete so a leader whose lock already expired (and was taken by
+# someone else) never releases the new holder's lock.
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def normalize_query(query: str) -> str:
+    """"¿Cuáles son los requisitos de admisión?" → "cuales son los requisitos de admision"."""
+    text = _PUNCT_RE.sub(" ", normalize_for_match(query))
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def coalesce_key(query: str, **params) -> str:
+    raw = json.dumps({"q": normalize_query(query), **params}, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class SingleFlight:
+    def __init__(self, name: str, poll_interval: float = 0.25):
+        self.name = name
+        self._poll_interval = poll_interval
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._redis = None
+        self.leaders = 0
+        self.coalesced = 0
+
+    def use_redis(self, client) -> None:
+        """Enable cross-worker coalescing with an already-connected client."""
+        self._redis = client
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        recheck: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> tuple[T, bool]:
+        """Run `fn` once for all concurrent callers of `key`.
+
+        Returns (result, computed) — `computed` is False when the result came
+        from another caller's computation, so callers can skip side effects
+        (cache stores, logs) the leader already performed.
+        """
+        if not settings.single_flight_enabled:
+            return await fn(), True
+
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                result = await asyncio.shield(future)
+                self.coalesced += 1
+                return result, False
+            except BaseException:
+                if not future.done():  # we were cancelled, not the leader
+                    raise
+                logger.debug("single-flight %s: leader failed, computing independently", self.name)
+                return await fn(), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result, computed = await self._lead(key, fn, recheck)
+        except BaseException as e:
+            future.set_exception(e if isinstance(e, Exception) else RuntimeError("leader cancelled"))
+            future.exception()  # mark retrieved — followers may all be gone
+            raise
+        else:
+            future.set_result(result)
+            return result, computed
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    async def _lead(self, key, fn, recheck) -> tuple:
+        if self._redis is None or recheck is None:
+            return await fn(), True
+
+        lock_key = f"singleflight:{self.name}:{key}"
+        token = uuid.uuid4().hex
+        lock_ttl = settings.single_flight_lock_ttl_seconds
+        try:
+            acquired = await self._redis.set(lock_key, token, nx=True, px=int(lock_ttl * 1000))
+        except Exception as e:
+            logger.debug("single-flight %s: Redis lock unavailable (%s)", self.name, e)
+            return await fn(), True
+
+        if acquired:
+            try:
+                return await fn(), True
+            finally:
+                try:
+                    await self._redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.debug("single-flight %s: lock release failed: %s", self.name, e)
+
+        # Another worker is computing this — wait for its result to land in
+        # the shared cache, bounded by the lock TTL.
+        deadline = time.monotonic() + lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self._poll_interval)
+            result = await recheck()
+            if result is not None:
+                self.coalesced += 1
+                return result, False
+            try:
+                if not await self._redis.exists(lock_key):
+                    break
+            except Exception:
+                break
+        return await fn(), True
+
+
+# ── Singletons ────────────────────────────────────────────────────────────────
+
+search_flight = SingleFlight("rag_search")
+embed_flight = SingleFlight("answer_embed")   # in-process only: no shared cache to recheck
+answer_flight = SingleFlight("answer")
+
+
+@REGISTRY.collector
+def _collect_flight_metrics():
+    flights = (search_flight, embed_flight, answer_flight)
+    yield "single_flight_coalesced", "counter", "Callers served by another caller's computation.", [
+        ({"flight": f.name}, f.coalesced) for f in flights
+    ]
+    yield "single_flight_leaders", "counter", "Computations started.", [
+        ({"flight": f.name}, f.leaders) for f in flights
+    ]
+
+
+async def connect_redis(url: str) -> bool:
+    """Share one Redis client across the flights that have a Redis-backed
+    cache to recheck (search → rag_cache, answer → answer_cache)."""
+    try:
+        import redis.asyncio as aioredis
+        client = aioredis.from_url(url, socket_connect_timeout=3, decode_responses=False)
+        await client.ping()
+    except Exception as e:
+        logger.warning("Redis unavailable — single-flight coalescing stays in-process: %s", e)
+        return False
+    search_flight.use_redis(client)
+    answer_flight.use_redis(client)
+    logger.info("Single-flight: cross-worker locks via Redis at %s", url)
+    return True
@@ -0,0 +1,89 @@
+"""
+Per-request stage timing — a minimal span API for finding where latency goes.
+
+    trace = start_trace()            # once per chat message (ChatService)
+    with span("rag_hyde"):           # anywhere below it, any module
+        ...
+    trace.as_dict()                  # {"rag_hyde_ms": 812, ...}
+
+The active trace lives in a ContextVar, so spans in RAGService, the
+verification graph or the providers need no plumbing: they attach to whatever
+message is being processed, including from tasks spawned with
+asyncio.create_task (which copy the context). With no active trace — eval
+harnesses, ingestion, tests — span() is a no-op apart from reading a clock.
+
+A span that runs more than once per message (one provider call per
+verification attempt, say) accumulates into the same `<name>_ms` and bumps
+`<name>_n`. A cancelled span is not recorded — the caller flags the
+cancellation itself (see ChatService._prepare_context's `rag_cancelled`).
+
+ChatService persists as_dict() in messages.stage_timings; the analytics
+router aggregates p50/p95 per `*_ms` key.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+_current: ContextVar["StageTrace | None"] = ContextVar("stage_trace", default=None)
+
+
+class StageTrace:
+    def __init__(self):
+        self._ms: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        self._flags: dict = {}
+
+    def record(self, name: str, ms: float) -> None:
+        self._ms[name] = self._ms.get(name, 0.0) + ms
+        self._counts[name] = self._counts.get(name, 0) + 1
+
+    def flag(self, name: str, value) -> None:
+        self._flags[name] = value
+
+    def ms(self, name: str) -> int | None:
+        value = self._ms.get(name)
+        return int(value) if value is not None else None
+
+    def as_dict(self) -> dict:
+        out: dict = dict(self._flags)
+        for name, ms in self._ms.items():
+            out[f"{name}_ms"] = int(ms)
+            if self._counts[name] > 1:
+                out[f"{name}_n"] = self._counts[name]
+        return out
+
+
+def start_trace() -> StageTrace:
+    """Begin a fresh trace for the current task (replacing any previous one)."""
+    trace = StageTrace()
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> StageTrace | None:
+    return _current.get()
+
+
+def record(name: str, ms: float) -> None:
+    """Record an externally measured duration (e.g. time to first token)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(name, ms)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    trace = _current.get()
+    start = time.perf_counter()
+    cancelled = False
+    try:
+        yield
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        if trace is not None and not cancelled:
+            trace.record(name, (time.perf_counter() - start) * 1000)
@@ -0,0 +1,70 @@
+"""Micro-benchmark: answer-cache lookup latency, pure-Python scan vs. NumPy index.
+
+Not collected by pytest (no `test_` prefix) — run manually from backend/:
+
+    python -m tests.bench_answer_cache
+
+"before" reimplements the linear `_cosine` scan AsyncAnswerCache.find_similar
+used to run over every entry; "after" is `_EmbeddingIndex.best_match`. Both
+use 768-dim vectors (embeddinggemma's size) at the entry counts that matter
+for this deployment: 300 (old default), 1000 (answer_cache_max_entries) and
+10000 (headroom).
+"""
+
+import random
+import statistics
+import time
+
+from app.utils.cache import _EmbeddingIndex
+
+DIM = 768
+SIZES = (300, 1000, 10000)
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def _linear_scan(entries: list[dict], query: list[float]) -> tuple[float, dict | None]:
+    best, best_score = None, 0.0
+    for entry in entries:
+        score = _cosine(query, entry["embedding"])
+        if score > best_score:
+            best_score, best = score, entry
+    return best_score, best
+
+
+def _time_ms(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    rng = random.Random(42)
+    print(f"{'entries':>8} | {'before (ms)':>12} | {'after (ms)':>11} | {'speedup':>8}")
+    for n in SIZES:
+        entries = [
+            {"embedding": [rng.gauss(0, 1) for _ in range(DIM)], "ts": float(i)}
+            for i in range(n)
+        ]
+        index = _EmbeddingIndex.from_entries(
+            [(e["embedding"], e) for e in entries], capacity=n
+        )
+        query = [rng.gauss(0, 1) for _ in range(DIM)]
+
+        before = _time_ms(lambda: _linear_scan(entries, query), repeats=3 if n >= 10000 else 5)
+        after = _time_ms(lambda: index.best_match(query, min_ts=0), repeats=50)
+        print(f"{n:>8} | {before:>12.2f} | {after:>11.3f} | {before / after:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Chunk write benchmark: ORM unit-of-work INSERT vs. binary COPY.
+
+Not collected by pytest (no `test_` prefix) — needs the Postgres from
+docker-compose (or DATABASE_URL) with migrations applied. Run from backend/:
+
+    python -m tests.bench_chunk_insert
+
+Writes 10,000 chunks with 768-float embeddings for a scratch document, the
+way `_index_chunks` does, and reports rows/sec. Every run happens inside a
+transaction that is rolled back, so nothing is left in the database.
+
+"before" is the old path: DocumentChunk objects via session.add_all() +
+flush() on an engine without the vector codec, each embedding formatted as
+a '[0.1,...]' text parameter (what pgvector.sqlalchemy's type did) and
+parsed server-side. "after" is `copy_records` on the app engine: one
+binary COPY per batch.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from pgvector.utils import Vector
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import async_session, copy_records, engine
+from app.models.document import Document
+from app.models.document_chunk import DocumentChunk
+from app.services.document_service import _CHUNK_COLUMNS, _chunk_hash
+from app.utils import simhash
+from app.utils.bm25 import term_frequencies
+
+ROWS = 10_000
+BATCH = 256   # _embed_chunks window: one write per embedded window
+DIM = settings.embedding_dimensions
+
+
+def _chunks() -> list[tuple[str, list[float]]]:
+    rng = random.Random(7)
+    return [
+        (f"Fragmento {i}: el estudiante deberá cumplir los requisitos del programa. " * 6,
+         [rng.uniform(-1, 1) for _ in range(DIM)])
+        for i in range(ROWS)
+    ]
+
+
+async def _scratch_document(db: AsyncSession) -> uuid.UUID:
+    doc = Document(title="bench", file_name="bench.pdf", file_type="pdf", ingestion_status="processing")
+    db.add(doc)
+    await db.flush()
+    return doc.id
+
+
+async def _before(db: AsyncSession, document_id: uuid.UUID, chunks) -> None:
+    for start in range(0, len(chunks), BATCH):
+        db.add_all([
+            DocumentChunk(
+                document_id=document_id, chunk_index=start + i, content=content,
+                content_hash=_chunk_hash(content), token_count=len(content) // 4,
+                embedding=Vector._to_db(embedding), embedding_model="bench",
+                metadata_={"chunk_index": start + i},
+            )
+            for i, (content, embedding) in enumerate(chunks[start : start + BATCH])
+        ])
+        await db.flush()
+
+
+async def _after(db: AsyncSession, document_id: uuid.UUID, chunks) -> None:
+    created_at = datetime.now(timezone.utc)
+    for start in range(0, len(chunks), BATCH):
+        records = []
+        for i, (content, embedding) in enumerate(chunks[start : start + BATCH]):
+            term_freqs, term_count = term_frequencies(content)
+            records.append((
+                uuid.uuid4(), document_id, start + i, content, len(content) // 4, embedding,
+                _chunk_hash(content), "bench", json.dumps({"chunk_index": start + i}), created_at,
+                json.dumps(term_freqs), term_count, simhash.signature(content),
+            ))
+        await copy_records(db, "document_chunks", _CHUNK_COLUMNS, records)
+
+
+async def _measure(sessionmaker, fn, chunks) -> float:
+    async with sessionmaker() as db:
+        try:
+            document_id = await _scratch_document(db)
+            start = time.perf_counter()
+            await fn(db, document_id, chunks)
+            return time.perf_counter() - start
+        finally:
+            await db.rollback()
+
+
+async def main() -> None:
+    chunks = _chunks()
+    plain_engine = create_async_engine(settings.database_url)
+    plain_session = async_sessionmaker(plain_engine, class_=AsyncSession, expire_on_commit=False)
+    print(f"{ROWS} chunks × {DIM} dims, writes of {BATCH}")
+    try:
+        for label, sessionmaker, fn in (("before", plain_session, _before), ("after", async_session, _after)):
+            elapsed = await _measure(sessionmaker, fn, chunks)
+            print(f"{label:>7}: {elapsed:6.2f}s  {ROWS / elapsed:9.0f} rows/sec")
+    finally:
+        await plain_engine.dispose()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
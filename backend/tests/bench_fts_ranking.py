@@ -0,0 +1,112 @@
+"""Full-text ranking benchmark: per-query to_tsvector() vs. stored content_tsv.
+
+Not collected by pytest (no `test_` prefix) — needs the Postgres from
+docker-compose (or DATABASE_URL). Run from backend/:
+
+    python -m tests.bench_fts_ranking
+
+For 10k and 100k synthetic Spanish chunks in a TEMP table (gone at
+disconnect, nothing touches the real corpus), builds both GIN indexes —
+the old expression index (idx_dc_content_fts) and one on a stored,
+weighted tsvector column (idx_dc_content_tsv) — and runs the keyword
+search's match + ts_rank_cd ORDER BY shape against each under
+EXPLAIN (ANALYZE, BUFFERS). Reports median server-side execution time over
+the query set and prints one plan per mode: both use the bitmap index
+scan; "before" re-tokenizes every matching row to rank it.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+
+from sqlalchemy import text
+
+from app.database import engine
+
+SIZES = (10_000, 100_000)
+WORDS_PER_CHUNK = 120
+QUERIES = (
+    "requisitos de grado", "créditos del programa", "matrícula semestre",
+    "plan de estudios ingeniería", "prácticas profesionales", "homologación de asignaturas",
+)
+# Domain words common enough that most queries match thousands of chunks —
+# the case where ranking cost dominates — diluted by filler vocabulary.
+_DOMAIN = (
+    "requisitos grado créditos programa matrícula semestre plan estudios ingeniería "
+    "prácticas profesionales homologación asignaturas estudiante docente facultad "
+    "reglamento inscripción calificación evaluación investigación extensión bienestar"
+).split()
+VOCABULARY = _DOMAIN + [f"término{i}" for i in range(1500)]
+
+_BEFORE = """
+    SELECT id FROM bench_chunks
+    WHERE to_tsvector('spanish', content) @@ plainto_tsquery('spanish', :q)
+    ORDER BY ts_rank_cd(to_tsvector('spanish', content), plainto_tsquery('spanish', :q)) DESC
+    LIMIT 30
+"""
+_AFTER = """
+    SELECT id FROM bench_chunks
+    WHERE content_tsv @@ plainto_tsquery('spanish', :q)
+    ORDER BY ts_rank_cd(content_tsv, plainto_tsquery('spanish', :q)) DESC
+    LIMIT 30
+"""
+
+
+async def _build(conn, rows: int) -> None:
+    await conn.execute(text("DROP TABLE IF EXISTS bench_chunks"))
+    await conn.execute(text("""
+        CREATE TEMP TABLE bench_chunks AS
+        SELECT g AS id,
+               'Documento ' || (g % 200) AS title,
+               (SELECT string_agg((CAST(:words AS text[]))[1 + floor(random() * :n_words)::int], ' ')
+                FROM generate_series(1, :per_chunk) WHERE g > 0) AS content
+        FROM generate_series(1, :rows) g
+    """), {"words": VOCABULARY, "n_words": len(VOCABULARY), "per_chunk": WORDS_PER_CHUNK, "rows": rows})
+    await conn.execute(text("ALTER TABLE bench_chunks ADD COLUMN content_tsv tsvector"))
+    await conn.execute(text("""
+        UPDATE bench_chunks SET content_tsv =
+            setweight(to_tsvector('spanish', title), 'A')
+            || setweight(to_tsvector('spanish', content), 'D')
+    """))
+    await conn.execute(text("CREATE INDEX ON bench_chunks USING gin (to_tsvector('spanish', content))"))
+    await conn.execute(text("CREATE INDEX ON bench_chunks USING gin (content_tsv)"))
+    await conn.execute(text("ANALYZE bench_chunks"))
+
+
+async def _execution_ms(conn, sql: str, query: str) -> float:
+    plan = (await conn.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), {"q": query}
+    )).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+
+async def _plan(conn, sql: str, query: str) -> str:
+    rows = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), {"q": query})).scalars()
+    return "\n".join(f"    {line}" for line in rows)
+
+
+async def main() -> None:
+    queries = list(QUERIES)
+    random.Random(3).shuffle(queries)
+    try:
+        async with engine.connect() as conn:
+            for rows in SIZES:
+                print(f"\n{rows} chunks × {WORDS_PER_CHUNK} words — building…")
+                await _build(conn, rows)
+                for label, sql in (("before", _BEFORE), ("after", _AFTER)):
+                    await _execution_ms(conn, sql, queries[0])  # warm the cache
+                    times = [await _execution_ms(conn, sql, q) for q in queries]
+                    print(f"{label:>7}: median {statistics.median(times):8.2f}ms  max {max(times):8.2f}ms")
+                    print(await _plan(conn, sql, queries[0]))
+            await conn.rollback()
+    except OSError as e:
+        print(f"skipped — database unreachable ({e})")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
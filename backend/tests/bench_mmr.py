@@ -0,0 +1,70 @@
+"""Diversity selection benchmark: per-document cap vs. embedding MMR.
+
+Not collected by pytest (no `test_` prefix) — needs nothing. Run from
+backend/:
+
+    python -m tests.bench_mmr
+
+Simulates the candidates of an aggregate question against one curriculum
+document: SEMESTERS semesters, each chunked into a few near-identical
+pieces (same clustered embedding plus noise), scored by cosine to a query
+that sits between all of them. Reports how many distinct semesters each
+selector puts into the top_k and what the selection costs per search.
+"before" is `_apply_diversity` (one document, so the cap never bites),
+"after" is `_select_mmr` at the configured rag_mmr_lambda.
+"""
+
+import time
+import uuid
+
+import numpy as np
+
+from app.config import settings
+from app.schemas.rag import SearchResultItem
+from app.services.rag_service import RAGService, _ChunkSignals
+
+SEMESTERS = 10
+CHUNKS_PER_SEMESTER = 3
+TOP_K = 5
+ROUNDS = 2000
+DIM = settings.embedding_dimensions
+
+
+def _candidates(rng: np.random.Generator):
+    centroids = rng.normal(size=(SEMESTERS, DIM))
+    query = centroids.mean(axis=0) + rng.normal(scale=0.5, size=DIM)
+    items, signals, semester_of = [], {}, {}
+    for s in range(SEMESTERS):
+        for _ in range(CHUNKS_PER_SEMESTER):
+            vec = (centroids[s] + rng.normal(scale=0.15, size=DIM)).astype(np.float32)
+            score = float(vec @ query / (np.linalg.norm(vec) * np.linalg.norm(query)))
+            item = SearchResultItem(
+                chunk_id=uuid.uuid4(), content=f"semestre {s + 1}", score=score,
+                document_title="Plan de estudios", program=None, faculty=None, metadata=None,
+            )
+            items.append(item)
+            signals[item.chunk_id] = _ChunkSignals(None, None, None, vec)
+            semester_of[item.chunk_id] = s
+    items.sort(key=lambda i: i.score, reverse=True)
+    return items, signals, semester_of
+
+
+def main() -> None:
+    items, signals, semester_of = _candidates(np.random.default_rng(3))
+    service = RAGService(db=None)
+    print(f"{len(items)} candidates × {DIM} dims, {SEMESTERS} semesters, top_k={TOP_K}")
+
+    for label, select in (
+        ("before", lambda: service._apply_diversity(items, max_per_doc=10, top_k=TOP_K)),
+        ("after", lambda: service._select_mmr(items, signals, TOP_K, max_per_doc=10)),
+    ):
+        covered = len({semester_of[i.chunk_id] for i in select()})
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            select()
+        per_search = (time.perf_counter() - start) / ROUNDS
+        print(f"{label:>7}: {covered:2d}/{TOP_K} semesters  {per_search * 1e6:8.1f}µs per search")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Ingestion benchmark: chunks/sec embedding through a local Ollama stub.
+
+Not collected by pytest (no `test_` prefix) — run manually from backend/:
+
+    python -m tests.bench_ollama_embed
+
+Starts a uvicorn stub on 127.0.0.1 that imitates Ollama's cost model: a
+fixed per-request overhead plus a per-text cost, with model passes serialized
+behind one lock (Ollama runs one forward pass at a time per model). Numbers
+are therefore about request shape, not about the real model's speed.
+
+"before" is the old ingestion path: _embed_chunks windows of 20, each fired
+as one /api/embeddings POST per text via an unbounded gather. "after" is the
+current path: windows of 256 through OllamaProvider.embed, i.e. /api/embed
+batches of ollama_embed_batch_size with ollama_embed_max_concurrency in flight.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.providers.ollama_provider import OllamaProvider
+from app.utils.cache import embedding_cache
+
+DIM = 768
+CHUNKS = 600
+REQUEST_OVERHEAD_S = 0.004   # tokenize + schedule + JSON per request
+PER_TEXT_S = 0.001           # forward pass per input text
+
+_model_lock = threading.Lock()
+
+
+def _vector() -> list[float]:
+    return [0.01] * DIM
+
+
+def _run_model(n_texts: int) -> None:
+    with _model_lock:
+        time.sleep(REQUEST_OVERHEAD_S + PER_TEXT_S * n_texts)
+
+
+async def _embed(request):
+    body = await request.json()
+    await asyncio.to_thread(_run_model, len(body["input"]))
+    return JSONResponse({"embeddings": [_vector() for _ in body["input"]]})
+
+
+async def _embeddings(request):
+    await asyncio.to_thread(_run_model, 1)
+    return JSONResponse({"embedding": _vector()})
+
+
+def _start_stub() -> tuple[uvicorn.Server, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    app = Starlette(routes=[
+        Route("/api/embed", _embed, methods=["POST"]),
+        Route("/api/embeddings", _embeddings, methods=["POST"]),
+    ])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def _before(base_url: str, texts: list[str]) -> None:
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        async def one(text):
+            r = await client.post(f"{base_url}/api/embeddings", json={"model": "m", "prompt": text})
+            r.raise_for_status()
+            return r.json()["embedding"]
+
+        for i in range(0, len(texts), 20):
+            await asyncio.gather(*[one(t) for t in texts[i : i + 20]])
+
+
+async def _after(base_url: str, texts: list[str]) -> None:
+    provider = OllamaProvider()
+    provider.base_url = base_url
+    for i in range(0, len(texts), 256):
+        await provider.embed(texts[i : i + 256], model="m")
+
+
+async def main() -> None:
+    # Measures request shape only — no persistent store lookups in between.
+    settings.embedding_store_enabled = False
+    server, base_url = _start_stub()
+    try:
+        texts = [f"fragmento {i} del plan de estudios" for i in range(CHUNKS)]
+        print(
+            f"{CHUNKS} chunks, batch_size={settings.ollama_embed_batch_size}, "
+            f"max_concurrency={settings.ollama_embed_max_concurrency}"
+        )
+        for label, fn in (("before", _before), ("after", _after)):
+            embedding_cache.invalidate_all()
+            start = time.perf_counter()
+            await fn(base_url, texts)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>7}: {elapsed:6.2f}s  {CHUNKS / elapsed:8.1f} chunks/sec")
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
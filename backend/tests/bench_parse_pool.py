@@ -0,0 +1,123 @@
+"""Event-loop stall benchmark: document parsing inline vs. in the parse pool.
+
+Not collected by pytest (no `test_` prefix) — run manually from backend/:
+
+    python -m tests.bench_parse_pool
+
+Builds fixtures like the ones in test_file_parsers.py, scaled up (a 200-page
+two-column PDF, a 2000-row pensum XLSX, a 300-paragraph DOCX, a 60-slide
+PPTX), then extracts, cleans and chunks each one while a probe coroutine
+ticks every 5 ms. Stall = how late the probe woke up; max stall is what a
+streaming chat connection on the same worker would have felt as a freeze.
+
+"before" runs extract_text → clean_text → chunk_* on the event loop, as
+DocumentService did; "after" goes through parse_pool (process pool). The
+first "after" file includes the one-off cost of spawning the workers.
+"""
+
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import fitz
+import openpyxl
+from docx import Document
+from pptx import Presentation
+from pptx.util import Inches
+
+from app.config import settings
+from app.utils.chunking import chunk_tabular_text, chunk_text
+from app.utils.file_parsers import extract_text
+from app.utils.parse_pool import parse_pool
+from app.utils.text_processing import clean_text
+
+TICK_S = 0.005
+LOREM = "El estudiante deberá cumplir los requisitos académicos del programa y del reglamento. "
+
+
+def _make_fixtures(root: Path) -> list[tuple[str, str, bool]]:
+    pdf = root / "reglamento.pdf"
+    with fitz.open() as doc:
+        for p in range(200):
+            page = doc.new_page()
+            for col, x in enumerate((40, 320)):
+                for line in range(45):
+                    page.insert_text((x, 50 + line * 16), f"p{p} c{col} l{line} {LOREM[:40]}", fontsize=8)
+        doc.save(pdf)
+
+    xlsx = root / "pensum.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for s in range(10):
+        ws.append([f"SEMESTRE {s + 1}"])
+        for i in range(200):
+            ws.append([f"TD{s}{i:03}", f"Materia {s}-{i}", 3, 48, f"TD{s}{i:03}"])
+    wb.save(xlsx)
+
+    docx = root / "acuerdo.docx"
+    d = Document()
+    for i in range(300):
+        d.add_paragraph(f"Artículo {i}. " + LOREM * 4)
+    d.save(docx)
+
+    pptx = root / "induccion.pptx"
+    prs = Presentation()
+    for i in range(60):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = f"Diapositiva {i}"
+        box = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(8), Inches(4))
+        box.text_frame.text = LOREM * 3
+    prs.save(pptx)
+
+    return [(str(pdf), "pdf", False), (str(xlsx), "xlsx", True), (str(docx), "docx", False), (str(pptx), "pptx", True)]
+
+
+async def _inline(path: str, file_type: str, tabular: bool) -> int:
+    text = clean_text(extract_text(path, file_type))
+    chunker = chunk_tabular_text if tabular else chunk_text
+    return len(chunker(text, chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap))
+
+
+async def _pooled(path: str, file_type: str, tabular: bool) -> int:
+    text = await parse_pool.extract_clean_text(path, file_type)
+    return len(await parse_pool.chunk(text, tabular=tabular))
+
+
+async def _measure(fn, fixture) -> tuple[float, float, float, int]:
+    lags: list[float] = []
+    done = False
+
+    async def probe():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_S)
+            lags.append(time.perf_counter() - start - TICK_S)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(TICK_S * 2)
+    start = time.perf_counter()
+    chunks = await fn(*fixture)
+    elapsed = time.perf_counter() - start
+    done = True
+    await probe_task
+    return elapsed, max(lags, default=0.0), sum(lags), chunks
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = _make_fixtures(Path(tmp))
+        print(f"parse_pool_workers={settings.parse_pool_workers}, probe tick={TICK_S * 1000:.0f}ms")
+        print(f"{'file':>6} {'mode':>7} {'wall':>8} {'max stall':>10} {'total stall':>12} {'chunks':>7}")
+        for fixture in fixtures:
+            for label, fn in (("before", _inline), ("after", _pooled)):
+                elapsed, worst, total, chunks = await _measure(fn, fixture)
+                print(
+                    f"{fixture[1]:>6} {label:>7} {elapsed * 1000:7.0f}ms {worst * 1000:9.1f}ms "
+                    f"{total * 1000:11.1f}ms {chunks:7d}"
+                )
+    parse_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
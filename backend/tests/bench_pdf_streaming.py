@@ -0,0 +1,88 @@
+"""Peak-memory benchmark: whole-document vs. page-batch PDF chunking.
+
+Not collected by pytest (no `test_` prefix) — run manually from backend/:
+
+    python -m tests.bench_pdf_streaming
+
+Builds two-column PDFs like bench_parse_pool's (200 and 1000 pages) and
+chunks each one both ways with `parse_pool_workers = 0`, so the work runs
+in this process where tracemalloc can see it. "whole" is extract_text →
+clean_text → chunk_text over the full text, as process_document did;
+"stream" is pdf_prefix + stream_pdf_chunks, what it does now. Peak counts
+Python allocations only (PyMuPDF's own C buffers are per page either way).
+"first" is time until the first batch of chunks is ready to embed.
+"""
+
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import fitz
+
+from app.config import settings
+from app.utils.chunking import chunk_text
+from app.utils.file_parsers import extract_text
+from app.utils.parse_pool import ParsePool
+from app.utils.text_processing import clean_text
+
+LOREM = "El estudiante deberá cumplir los requisitos académicos del programa y del reglamento. "
+
+
+def _make_pdf(path: Path, pages: int) -> str:
+    with fitz.open() as doc:
+        for p in range(pages):
+            page = doc.new_page()
+            for col, x in enumerate((40, 320)):
+                for line in range(45):
+                    page.insert_text((x, 50 + line * 16), f"p{p} c{col} l{line} {LOREM[:40]}", fontsize=8)
+        doc.save(path)
+    return str(path)
+
+
+async def _whole(path: str) -> tuple[int, float]:
+    start = time.perf_counter()
+    chunks = await asyncio.to_thread(lambda: chunk_text(clean_text(extract_text(path, "pdf"))))
+    return len(chunks), time.perf_counter() - start
+
+
+async def _stream(path: str) -> tuple[int, float]:
+    pool = ParsePool()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    prefix, page_count = await pool.pdf_prefix(path, min_pages=4, min_chars=20000)
+    async for chunks, _ in pool.stream_pdf_chunks(path, len(prefix), page_count, "\n\n".join(prefix)):
+        first = first or time.perf_counter() - start
+        count += len(chunks)
+    return count, first
+
+
+async def _measure(fn, path: str) -> tuple[float, float, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks, first = await fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024**2, first, elapsed, chunks
+
+
+async def main() -> None:
+    settings.parse_pool_workers = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"pdf_stream_batch_pages={settings.pdf_stream_batch_pages}")
+        print(f"{'pages':>6} {'mode':>7} {'peak':>9} {'first':>8} {'wall':>8} {'chunks':>7}")
+        for pages in (200, 1000):
+            path = _make_pdf(Path(tmp) / f"doc{pages}.pdf", pages)
+            for label, fn in (("whole", _whole), ("stream", _stream)):
+                peak, first, elapsed, chunks = await _measure(fn, path)
+                print(
+                    f"{pages:>6} {label:>7} {peak:7.1f}MB {first * 1000:6.0f}ms "
+                    f"{elapsed * 1000:6.0f}ms {chunks:7d}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""Rerank lexical-signal benchmark: regex keyword overlap vs. stored BM25.
+
+Not collected by pytest (no `test_` prefix) — needs nothing. Run from
+backend/:
+
+    python -m tests.bench_rerank_lexical
+
+Scores CANDIDATES chunk-sized texts against one query ROUNDS times, the way
+RAGService._rerank does per search: "before" is query_utils.keyword_score
+(two regex findall passes over the full content per candidate), "after" is
+bm25.score over term frequencies computed once up front, as ingestion now
+stores them.
+"""
+
+import random
+import time
+
+from app.utils import bm25
+from app.utils.query_utils import keyword_score
+
+CANDIDATES = 30   # rag_top_k × rag_candidates_multiplier
+ROUNDS = 2000
+QUERY = "¿Cuántos créditos tiene el plan de estudios de ingeniería de sistemas?"
+_WORDS = (
+    "el la de los programa créditos semestre asignatura plan estudios ingeniería sistemas "
+    "requisitos matrícula estudiante facultad reglamento evaluación prácticas grado"
+).split()
+
+
+def main() -> None:
+    rng = random.Random(5)
+    chunks = [" ".join(rng.choice(_WORDS) for _ in range(350)) for _ in range(CANDIDATES)]
+    stored = [bm25.term_frequencies(c) for c in chunks]
+    weights = {t: bm25.idf(rng.randint(1, 500), 5000) for t in set(bm25.terms(QUERY))}
+    avgdl = sum(n for _, n in stored) / len(stored)
+
+    for label, score_all in (
+        ("before", lambda: [keyword_score(QUERY, c) for c in chunks]),
+        ("after", lambda: [bm25.score(weights, tf, n, avgdl) for tf, n in stored]),
+    ):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            score_all()
+        per_search = (time.perf_counter() - start) / ROUNDS
+        print(f"{label:>7}: {per_search * 1e6:8.1f}µs per search ({CANDIDATES} candidates)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Query-embedding binding benchmark: decimal text + CAST vs. binary codec.
+
+Not collected by pytest (no `test_` prefix) — run manually from backend/:
+
+    python -m tests.bench_vector_binding
+
+Part 1 needs nothing: client-side cost of turning one 768-float query
+embedding into a parameter — the old `"[" + ",".join(map(str, v)) + "]"`
+string vs. the binary encoding the connection codec produces.
+
+Part 2 needs the docker-compose Postgres (or DATABASE_URL) with an indexed
+corpus: the RAG vector query (same SQL as RAGService._search_uncached) run
+QUERIES times per mode, p50/p95 latency. "before" binds the text form on an
+engine without the codec; "after" binds the list on the app engine.
+"""
+
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import _encode_vector, engine
+
+DIM = settings.embedding_dimensions
+ENCODE_ROUNDS = 5000
+QUERIES = 300
+
+SQL = text("""
+    SELECT dc.id, 1 - (dc.embedding <=> CAST(:embedding AS vector)) AS score
+    FROM document_chunks dc
+    JOIN documents d ON dc.document_id = d.id
+    WHERE dc.embedding IS NOT NULL
+    ORDER BY dc.embedding <=> CAST(:embedding AS vector)
+    LIMIT :top_k
+""")
+
+
+def _vectors(n: int) -> list[list[float]]:
+    rng = random.Random(11)
+    return [[rng.uniform(-1, 1) for _ in range(DIM)] for _ in range(n)]
+
+
+def _encode_bench() -> None:
+    vector = _vectors(1)[0]
+    for label, fn in (
+        ("text", lambda v: "[" + ",".join(map(str, v)) + "]"),
+        ("binary", _encode_vector),
+    ):
+        start = time.perf_counter()
+        for _ in range(ENCODE_ROUNDS):
+            payload = fn(vector)
+        per_call = (time.perf_counter() - start) / ENCODE_ROUNDS
+        print(f"{label:>7}: {per_call * 1e6:7.1f}µs/encode  {len(payload):6d} bytes on the wire")
+
+
+async def _query_bench(db_engine, to_param, vectors) -> list[float]:
+    latencies = []
+    async with db_engine.connect() as conn:
+        await conn.execute(SQL, {"embedding": to_param(vectors[0]), "top_k": 15})  # warm-up / prepare
+        for vector in vectors:
+            start = time.perf_counter()
+            (await conn.execute(SQL, {"embedding": to_param(vector), "top_k": 15})).fetchall()
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main() -> None:
+    print(f"Encoding one {DIM}-dim query embedding ({ENCODE_ROUNDS} rounds)")
+    _encode_bench()
+
+    vectors = _vectors(QUERIES)
+    plain_engine = create_async_engine(settings.database_url)
+    print(f"\nRAG vector query, {QUERIES} queries per mode")
+    try:
+        for label, db_engine, to_param in (
+            ("before", plain_engine, lambda v: "[" + ",".join(map(str, v)) + "]"),
+            ("after", engine, lambda v: v),
+        ):
+            latencies = sorted(await _query_bench(db_engine, to_param, vectors))
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            print(
+                f"{label:>7}: p50 {statistics.median(latencies) * 1000:6.2f}ms  "
+                f"p95 {p95 * 1000:6.2f}ms"
+            )
+    except OSError as e:
+        print(f"  skipped — database unreachable ({e})")
+    finally:
+        await plain_engine.dispose()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
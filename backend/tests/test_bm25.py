@@ -0,0 +1,101 @@
+import math
+from types import SimpleNamespace
+
+from app.services import corpus_stats as mod
+from app.services.corpus_stats import CorpusStats
+from app.utils import bm25
+
+
+class TestTerms:
+    def test_folds_case_and_accents(self):
+        assert bm25.terms("Créditos del PROGRAMA de Enfermería") == ["creditos", "del", "programa", "de", "enfermeria"]
+
+    def test_drops_single_letters_but_keeps_single_digits(self):
+        assert bm25.terms("Semestre 7 y a") == ["semestre", "7"]
+
+    def test_term_frequencies_counts_repeats(self):
+        assert bm25.term_frequencies("plan plan estudios") == ({"plan": 2, "estudios": 1}, 3)
+
+
+class TestScore:
+    def test_rare_terms_weigh_more(self):
+        assert bm25.idf(df=1, n=1000) > bm25.idf(df=500, n=1000) > 0
+
+    def test_repeated_terms_saturate(self):
+        weights = {"creditos": 1.0}
+        once = bm25.score(weights, {"creditos": 1}, 10, avgdl=10)
+        ten = bm25.score(weights, {"creditos": 10}, 10, avgdl=10)
+        assert once < ten < once * (bm25.K1 + 1)
+
+    def test_longer_chunks_score_lower_for_the_same_matches(self):
+        weights = {"matricula": 1.0}
+        assert bm25.score(weights, {"matricula": 2}, 20, avgdl=50) > bm25.score(weights, {"matricula": 2}, 200, avgdl=50)
+
+    def test_no_stored_frequencies_scores_zero(self):
+        assert bm25.score({"x": 1.0}, {}, 0, avgdl=10) == 0.0
+
+
+class FakeSession:
+    def __init__(self, error=None):
+        self.error = error
+        self.statements: list = []
+
+    async def __aenter__(self):
+        if self.error:
+            raise self.error
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((stmt, params))
+        if len(self.statements) == 1:
+            return SimpleNamespace(all=lambda: [("creditos", 3), ("programa", 40)])
+        return SimpleNamespace(one=lambda: (50, 120.0))
+
+
+class TestCorpusStats:
+    async def test_reload_feeds_query_weights(self, monkeypatch):
+        monkeypatch.setattr(mod, "async_session", lambda: FakeSession())
+        stats = CorpusStats()
+        await stats.ensure_fresh()
+
+        weights = stats.query_weights("¿Cuántos créditos tiene el programa?")
+        assert (stats.chunks, stats.avgdl) == (50, 120.0)
+        assert weights["creditos"] == bm25.idf(3, 50) > weights["programa"]
+        assert weights["cuantos"] == bm25.idf(0, 50)
+
+    async def test_reloads_once_per_interval_until_marked_stale(self, monkeypatch):
+        sessions = []
+        monkeypatch.setattr(mod, "async_session", lambda: sessions.append(1) or FakeSession())
+        stats = CorpusStats()
+
+        await stats.ensure_fresh()
+        await stats.ensure_fresh()
+        assert len(sessions) == 1
+        stats.mark_stale()
+        await stats.ensure_fresh()
+        assert len(sessions) == 2
+
+    async def test_failed_reload_keeps_scoring_and_waits_for_the_interval(self, monkeypatch):
+        sessions = []
+        monkeypatch.setattr(
+            mod, "async_session", lambda: sessions.append(1) or FakeSession(error=ConnectionRefusedError())
+        )
+        stats = CorpusStats()
+
+        await stats.ensure_fresh()
+        await stats.ensure_fresh()
+        assert len(sessions) == 1
+        assert stats.query_weights("plan") == {"plan": math.log(2)}
+
+    async def test_df_deltas_are_one_ordered_upsert(self):
+        db = FakeSession()
+        await CorpusStats().remove_chunks(db, ["id-1", "id-2"])
+        await CorpusStats().add_chunks(db, [])
+
+        (stmt, params), = db.statements
+        assert params == {"ids": ["id-1", "id-2"], "sign": -1}
+        assert "ON CONFLICT (term) DO UPDATE" in stmt.text
+        assert "ORDER BY t.term" in stmt.text
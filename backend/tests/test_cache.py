@@ -2,7 +2,10 @@ import time
 
 import pytest
 
-from app.utils.cache import AsyncAnswerCache, AsyncRAGCache, TTLCache
+from app.utils.cache import (
+    AsyncAnswerCache, AsyncRAGCache, TTLCache, _EmbeddingIndex, _pack_entry, _unpack_entry,
+    cache_tags,
+)
 
 
 class TestTTLCache:
@@ -34,6 +37,44 @@ class TestTTLCache:
         assert cache.get("b") == 2
         assert cache.get("c") == 3
 
+    def test_read_hit_refreshes_lru_position(self):
+        cache = TTLCache(ttl_seconds=100, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # "a" is now most recently used
+        cache.set("c", 3)  # should evict "b", not "a"
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_overwriting_existing_key_does_not_evict(self):
+        cache = TTLCache(ttl_seconds=100, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 10)
+        assert cache.get("a") == 10
+        assert cache.get("b") == 2
+
+    def test_insert_drops_expired_entries_before_evicting_live_ones(self):
+        cache = TTLCache(ttl_seconds=0, max_size=10)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        assert cache.size() == 1
+
+    def test_stats_count_hits_misses_and_evictions(self):
+        cache = TTLCache(ttl_seconds=100, max_size=1)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        cache.set("b", 2)  # evicts "a"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+
     def test_invalidate_all_clears_store(self):
         cache = TTLCache()
         cache.set("a", 1)
@@ -59,6 +100,17 @@ class TestAsyncRAGCache:
         await cache.set(key, "cached-value")
         assert await cache.get(key) == "cached-value"
 
+    @pytest.mark.asyncio
+    async def test_in_memory_eviction_is_lru(self):
+        cache = AsyncRAGCache(ttl_seconds=10, max_size=2)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
     @pytest.mark.asyncio
     async def test_invalidate_all_clears_in_memory_store(self):
         cache = AsyncRAGCache()
@@ -77,7 +129,7 @@ class TestAsyncRAGCache:
         cache = AsyncRAGCache()
 
         class FailingRedis:
-            def scan_iter(self, _pattern):
+            async def incr(self, _key):
                 raise RuntimeError("redis unavailable")
 
         cache._redis = FailingRedis()
@@ -88,6 +140,143 @@ class TestAsyncRAGCache:
         assert "RAG cache invalidated" not in caplog.text
 
 
+class TestRAGCacheGenerations:
+    def _response(self):
+        from app.schemas.rag import SearchResponse
+        return SearchResponse(results=[], query_embedding_time_ms=1, search_time_ms=2)
+
+    async def test_invalidate_all_orphans_keys_made_before_it(self):
+        cache = AsyncRAGCache()
+        key = cache.make_key(query="creditos")
+        await cache.set(key, "old")
+        await cache.invalidate_all()
+
+        assert cache.make_key(query="creditos") != key
+        # A search that started before the invalidation must not repopulate it.
+        await cache.set(key, "computed-before-invalidation")
+        assert cache.size() == 0
+
+    async def test_redis_invalidate_all_is_a_single_incr(self):
+        redis = FakeRedis()
+        cache = AsyncRAGCache()
+        cache._redis = redis
+        key = cache.make_key(query="creditos")
+        await cache.set(key, self._response())
+        assert await cache.get(key) is not None
+
+        await cache.invalidate_all()
+        await cache._sweep_task
+
+        assert redis.calls["incr"] == 1
+        assert await cache.get(key) is None
+        assert await cache.get(cache.make_key(query="creditos")) is None
+
+    async def test_other_worker_sees_bump_on_next_get(self):
+        redis = FakeRedis()
+        worker_a, worker_b = AsyncRAGCache(), AsyncRAGCache()
+        worker_a._redis = worker_b._redis = redis
+        key = worker_b.make_key(query="creditos")
+        await worker_b.set(key, self._response())
+
+        await worker_a.invalidate_all()
+
+        assert await worker_b.get(key) is None
+        assert worker_b.make_key(query="creditos") != key
+
+    async def test_sweep_unlinks_only_stale_entry_keys_in_batches(self):
+        redis = FakeRedis()
+        cache = AsyncRAGCache()
+        cache._redis = redis
+        cache._SWEEP_BATCH = 2
+        for i in range(5):
+            await cache.set(cache.make_key(q=i), self._response())
+        redis.data["rag:legacyhash"] = "{}"
+        redis.data["rag:tag:doc:d1"] = set()
+        redis.data[AsyncRAGCache._GENERATION_KEY] = 1
+        cache._generation = 1
+        live = cache.make_key(q="live")
+        await cache.set(live, self._response())
+
+        removed = await cache.sweep_stale()
+
+        assert removed == 6
+        assert redis.calls["unlink"] == 6
+        assert set(redis.data) == {f"rag:{live}", "rag:tag:doc:d1", AsyncRAGCache._GENERATION_KEY}
+
+
+class TestCacheTags:
+    def test_builds_document_and_normalized_program_tags(self):
+        assert cache_tags(document_ids=["abc", None], programs=[" Medicina ", "", None]) == {
+            "doc:abc", "program:medicina",
+        }
+
+
+class TestRAGCacheTagInvalidation:
+    async def test_only_entries_with_matching_tag_are_evicted(self):
+        cache = AsyncRAGCache()
+        await cache.set("k1", "medicina", tags=cache_tags(document_ids=["d1"], programs=["Medicina"]))
+        await cache.set("k2", "enfermeria", tags=cache_tags(document_ids=["d2"], programs=["Enfermería"]))
+        await cache.set("k3", "untagged")
+
+        await cache.invalidate_tags(cache_tags(document_ids=["d1"]))
+
+        assert await cache.get("k1") is None
+        assert await cache.get("k2") == "enfermeria"
+        assert await cache.get("k3") == "untagged"
+
+    async def test_program_tag_evicts_every_entry_for_that_program(self):
+        cache = AsyncRAGCache()
+        await cache.set("k1", 1, tags=cache_tags(document_ids=["d1"], programs=["Medicina"]))
+        await cache.set("k2", 2, tags=cache_tags(document_ids=["d2"], programs=["medicina"]))
+        await cache.invalidate_tags(cache_tags(programs=["MEDICINA"]))
+        assert await cache.get("k1") is None
+        assert await cache.get("k2") is None
+
+    async def test_lru_eviction_drops_tag_membership(self):
+        cache = AsyncRAGCache(max_size=1)
+        await cache.set("k1", 1, tags={"doc:d1"})
+        await cache.set("k2", 2, tags={"doc:d2"})  # evicts k1
+        assert "doc:d1" not in cache._tags
+
+
+class TestAnswerCacheTagInvalidation:
+    async def _store(self, cache, embedding, question, sources, tags=None):
+        await cache.store(
+            embedding=embedding, question=question, answer=question, sources=sources,
+            llm_provider="ollama", llm_model="qwen3:8b", tags=tags,
+        )
+
+    async def test_in_memory_drops_only_matching_entries(self):
+        cache = AsyncAnswerCache(similarity_threshold=0.9)
+        await self._store(cache, [1.0, 0.0], "q1", [], tags={"doc:d1"})
+        await self._store(cache, [0.0, 1.0], "q2", [], tags={"doc:d2"})
+
+        await cache.invalidate_tags({"doc:d1"})
+
+        assert await cache.find_similar([1.0, 0.0], query_text="q1") is None
+        assert await cache.find_similar([0.0, 1.0], query_text="q2") is not None
+
+    async def test_tags_default_to_cited_sources(self):
+        cache = AsyncAnswerCache(similarity_threshold=0.9)
+        await self._store(cache, [1.0, 0.0], "q1", [{"document_id": "d1", "program": None}])
+        await cache.invalidate_tags({"doc:d1"})
+        assert await cache.find_similar([1.0, 0.0], query_text="q1") is None
+
+    async def test_redis_removes_matching_entries_for_every_worker(self):
+        redis = FakeRedis()
+        worker_a, worker_b = AsyncAnswerCache(similarity_threshold=0.9), AsyncAnswerCache(similarity_threshold=0.9)
+        worker_a._redis = worker_b._redis = redis
+        await self._store(worker_a, [1.0, 0.0], "q1", [], tags={"program:medicina"})
+        await self._store(worker_a, [0.0, 1.0], "q2", [], tags={"program:enfermeria"})
+        assert await worker_b.find_similar([1.0, 0.0], query_text="q1") is not None
+
+        await worker_a.invalidate_tags({"program:medicina"})
+
+        assert len(redis.data[AsyncAnswerCache._REDIS_KEY]) == 1
+        assert await worker_b.find_similar([1.0, 0.0], query_text="q1") is None
+        assert await worker_b.find_similar([0.0, 1.0], query_text="q2") is not None
+
+
 class TestAnswerCacheEntityGuard:
     def _entry(self, sources, question="q"):
         return {"sources": sources, "question": question, "embedding": []}
@@ -294,6 +483,192 @@ class TestAnswerCacheFindSimilar:
         assert result is None
 
 
+class TestEmbeddingIndex:
+    def test_best_match_is_cosine_not_raw_dot_product(self):
+        index = _EmbeddingIndex(capacity=10)
+        index.add([10.0, 0.0], ts=1.0, entry={"id": "long"})
+        index.add([0.6, 0.8], ts=2.0, entry={"id": "diagonal"})
+        score, entry = index.best_match([1.0, 0.0], min_ts=0)
+        assert entry["id"] == "long"
+        assert score == pytest.approx(1.0)
+
+    def test_expired_entries_are_skipped(self):
+        index = _EmbeddingIndex(capacity=10)
+        index.add([1.0, 0.0], ts=1.0, entry={"id": "old"})
+        index.add([0.6, 0.8], ts=5.0, entry={"id": "fresh"})
+        _, entry = index.best_match([1.0, 0.0], min_ts=2.0)
+        assert entry["id"] == "fresh"
+        assert index.best_match([1.0, 0.0], min_ts=10.0) is None
+
+    def test_ties_go_to_most_recent_entry(self):
+        # Same tie-break the old most-recent-first linear scan had.
+        index = _EmbeddingIndex(capacity=10)
+        index.add([1.0, 0.0], ts=1.0, entry={"id": "older"})
+        index.add([1.0, 0.0], ts=2.0, entry={"id": "newer"})
+        _, entry = index.best_match([1.0, 0.0], min_ts=0)
+        assert entry["id"] == "newer"
+
+    def test_capacity_overwrites_oldest_entry(self):
+        index = _EmbeddingIndex(capacity=2)
+        index.add([1.0, 0.0], ts=1.0, entry={"id": "a"})
+        index.add([0.0, 1.0], ts=2.0, entry={"id": "b"})
+        index.add([0.0, 1.0], ts=3.0, entry={"id": "c"})  # evicts "a"
+        assert len(index) == 2
+        score, entry = index.best_match([1.0, 0.0], min_ts=0)
+        assert entry["id"] != "a"
+        assert score == pytest.approx(0.0)
+
+    def test_grows_past_initial_allocation(self):
+        index = _EmbeddingIndex(capacity=500)
+        for i in range(200):
+            index.add([float(i), 1.0], ts=float(i), entry={"id": i})
+        assert len(index) == 200
+        _, entry = index.best_match([199.0, 1.0], min_ts=0)
+        assert entry["id"] == 199
+
+    def test_dimension_change_resets_index(self):
+        index = _EmbeddingIndex(capacity=10)
+        index.add([1.0, 0.0], ts=1.0, entry={"id": "2d"})
+        index.add([1.0, 0.0, 0.0], ts=2.0, entry={"id": "3d"})
+        assert len(index) == 1
+        assert index.best_match([1.0, 0.0], min_ts=0) is None
+
+    def test_zero_vector_scores_zero(self):
+        index = _EmbeddingIndex(capacity=10)
+        index.add([0.0, 0.0], ts=1.0, entry={"id": "zero"})
+        score, _ = index.best_match([1.0, 0.0], min_ts=0)
+        assert score == 0.0
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the answer cache's list + counter
+    usage, with per-command call counts so tests can assert round trips."""
+
+    def __init__(self):
+        self.data: dict = {}
+        self.calls: dict[str, int] = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    async def get(self, key):
+        self._count("get")
+        value = self.data.get(key)
+        return str(value).encode() if value is not None else None
+
+    async def lrange(self, key, start, end):
+        self._count("lrange")
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start : end + 1]
+
+    async def incr(self, key):
+        self._count("incr")
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+    async def scan_iter(self, match="*", count=None):
+        self._count("scan_iter")
+        prefix = match.rstrip("*")
+        for key in list(self.data):
+            if key.startswith(prefix):
+                yield key.encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    def __getattr__(self, name):
+        return lambda *args: self._ops.append((name, args))
+
+    async def execute(self):
+        data, results = self._redis.data, []
+        for name, args in self._ops:
+            self._redis._count(name)
+            if name == "lpush":
+                data.setdefault(args[0], []).insert(0, args[1])
+            elif name == "ltrim":
+                data[args[0]] = data.get(args[0], [])[args[1] : args[2] + 1]
+            elif name == "incr":
+                data[args[0]] = data.get(args[0], 0) + 1
+            elif name == "delete":
+                data.pop(args[0], None)
+            elif name == "lrem":
+                data[args[0]] = [v for v in data.get(args[0], []) if v != args[2]]
+            elif name == "setex":
+                data[args[0]] = args[2]
+            elif name == "unlink":
+                key = args[0].decode() if isinstance(args[0], bytes) else args[0]
+                results.append(int(data.pop(key, None) is not None))
+                continue
+            results.append(data.get(args[0]))
+        return results
+
+
+class TestAnswerCacheRedisMirror:
+    async def _store(self, cache, embedding, question, answer):
+        await cache.store(
+            embedding=embedding, question=question, answer=answer, sources=[],
+            llm_provider="ollama", llm_model="qwen3:8b",
+        )
+
+    def test_packed_entry_roundtrip(self):
+        embedding, entry = _unpack_entry(_pack_entry([0.5, -1.25], {"question": "q", "ts": 1.0}))
+        assert embedding.tolist() == [0.5, -1.25]
+        assert entry == {"question": "q", "ts": 1.0}
+
+    def test_unpack_reads_legacy_json_entries(self):
+        import json
+        embedding, entry = _unpack_entry(json.dumps({"embedding": [1.0, 0.0], "question": "q"}).encode())
+        assert embedding.tolist() == [1.0, 0.0]
+        assert entry == {"question": "q"}
+
+    async def test_entry_stored_by_another_worker_is_visible(self):
+        redis = FakeRedis()
+        worker_a, worker_b = AsyncAnswerCache(similarity_threshold=0.9), AsyncAnswerCache(similarity_threshold=0.9)
+        worker_a._redis = worker_b._redis = redis
+
+        assert await worker_b.find_similar([1.0, 0.0], query_text="q") is None
+        await self._store(worker_a, [1.0, 0.0], "q", "a")
+        result = await worker_b.find_similar([1.0, 0.0], query_text="q")
+        assert result is not None and result["answer"] == "a"
+
+    async def test_steady_state_lookup_only_checks_the_generation(self):
+        redis = FakeRedis()
+        cache = AsyncAnswerCache(similarity_threshold=0.9)
+        cache._redis = redis
+        await self._store(cache, [1.0, 0.0], "q", "a")
+        await cache.find_similar([1.0, 0.0], query_text="q")
+        lranges = redis.calls.get("lrange", 0)
+
+        for _ in range(5):
+            assert await cache.find_similar([1.0, 0.0], query_text="q") is not None
+        assert redis.calls["lrange"] == lranges
+
+    async def test_own_store_updates_mirror_without_reload(self):
+        redis = FakeRedis()
+        cache = AsyncAnswerCache(similarity_threshold=0.9)
+        cache._redis = redis
+        await cache.find_similar([1.0, 0.0], query_text="q")  # initial load
+        await self._store(cache, [1.0, 0.0], "q", "a")
+        assert await cache.find_similar([1.0, 0.0], query_text="q") is not None
+        assert redis.calls["lrange"] == 1
+
+    async def test_invalidate_by_another_worker_clears_mirror(self):
+        redis = FakeRedis()
+        worker_a, worker_b = AsyncAnswerCache(similarity_threshold=0.9), AsyncAnswerCache(similarity_threshold=0.9)
+        worker_a._redis = worker_b._redis = redis
+        await self._store(worker_a, [1.0, 0.0], "q", "a")
+        assert await worker_b.find_similar([1.0, 0.0], query_text="q") is not None
+
+        await worker_a.invalidate_all()
+        assert await worker_b.find_similar([1.0, 0.0], query_text="q") is None
+
+
 class TestAnswerCacheEnableDisable:
     @pytest.mark.asyncio
     async def test_disable_makes_find_similar_return_none(self):
@@ -334,6 +709,16 @@ class TestAnswerCacheEnableDisable:
 
 
 class TestAnswerCacheInvalidate:
+    @pytest.mark.asyncio
+    async def test_invalidate_all_clears_in_memory_index(self):
+        cache = AsyncAnswerCache(similarity_threshold=0.9)
+        await cache.store(
+            embedding=[1.0, 0.0], question="q", answer="a", sources=[],
+            llm_provider="ollama", llm_model="qwen3:8b",
+        )
+        await cache.invalidate_all()
+        assert await cache.find_similar([1.0, 0.0], query_text="q") is None
+
     @pytest.mark.asyncio
     async def test_invalidate_all_does_not_log_success_when_redis_fails(self, caplog):
         # Same fix and same reason as AsyncRAGCache's equivalent test: a
@@ -128,7 +128,7 @@ class TestGetProgramAliasesQuery:
     # `_enrich_curriculum_text` input-budget fix (4000->20000 chars) made the
     # generated "RESUMEN DE MATERIAS POR SEMESTRE" summary long enough to
     # span 2-3 chunks once prepended to the document (see
-    # document_service.py's _build_enriched_text), pushing the "Primer ciclo
+    # document_service.py's _document_chunks), pushing the "Primer ciclo
     # de formación" intro line out of chunk 0 for every reindexed curriculum
     # document. A GoldStandard smoke test re-run kept failing GS-007/GS-009
     # even after this alias logic had deployed, tracing back to this. The
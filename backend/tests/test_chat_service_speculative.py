@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.services.chat_service import ChatService, _RAGContext
+from app.utils.tracing import start_trace
+
+CACHE_DELAY = 0.05
+RAG_DELAY = 0.2
+
+
+def _rag_ctx() -> _RAGContext:
+    return _RAGContext(
+        context_text="[1] Doc\ncontenido", sources_payload=[], source_infos=[],
+        quality="good", embed_ms=0, search_ms=0,
+    )
+
+
+@pytest.fixture
+def service():
+    svc = ChatService(db=None)
+    svc.rag_started = svc.rag_finished = 0
+    svc.cache_hit = None
+
+    async def check_answer_cache(query):
+        await asyncio.sleep(CACHE_DELAY)
+        return [0.1], svc.cache_hit
+
+    async def get_history(conversation_id, exclude_message_id):
+        return []
+
+    async def run_rag(query):
+        svc.rag_started += 1
+        await asyncio.sleep(RAG_DELAY)
+        svc.rag_finished += 1
+        return _rag_ctx()
+
+    svc._check_answer_cache = check_answer_cache
+    svc._get_history = get_history
+    svc._run_rag_isolated = run_rag
+    svc._run_rag = run_rag
+    return svc
+
+
+async def _prepare(service, content="¿Cuáles son los requisitos de admisión?"):
+    start_trace()
+    return await service._prepare_context(uuid.uuid4(), uuid.uuid4(), content)
+
+
+class TestSpeculativeRetrieval:
+    async def test_miss_overlaps_cache_lookup_and_retrieval(self, service):
+        prepared = await _prepare(service)
+
+        assert prepared.cached is None
+        assert prepared.rag_ctx.quality == "good"
+        timings = prepared.trace.as_dict()
+        assert timings["speculative"] is True
+        assert timings["prepare_ms"] < timings["answer_cache_ms"] + timings["rag_ms"]
+
+    async def test_hit_cancels_retrieval(self, service):
+        service.cache_hit = {"answer": "cached"}
+        prepared = await _prepare(service)
+        await asyncio.sleep(RAG_DELAY)
+
+        assert prepared.cached == {"answer": "cached"}
+        assert prepared.rag_ctx is None
+        assert service.rag_started == 1
+        assert service.rag_finished == 0
+        assert prepared.trace.as_dict()["rag_cancelled"] is True
+        assert "rag_ms" not in prepared.trace.as_dict()
+
+    async def test_greeting_never_starts_retrieval(self, service):
+        prepared = await _prepare(service, content="hola")
+        assert service.rag_started == 0
+        assert prepared.rag_ctx.quality == "none"
+
+    async def test_sequential_mode_skips_retrieval_on_hit(self, service, monkeypatch):
+        monkeypatch.setattr(settings, "chat_speculative_retrieval", False)
+        service.cache_hit = {"answer": "cached"}
+        prepared = await _prepare(service)
+
+        assert service.rag_started == 0
+        assert prepared.trace.as_dict()["speculative"] is False
+        assert set(prepared.trace.as_dict()) == {"speculative", "answer_cache_ms", "prepare_ms"}
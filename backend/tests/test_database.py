@@ -0,0 +1,70 @@
+import struct
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg
+
+from app.database import BinaryVector, _encode_vector, copy_records
+
+
+class TestVectorCodec:
+    def test_text_and_list_encode_identically(self):
+        assert _encode_vector("[0.5,-1,2.25]") == _encode_vector([0.5, -1.0, 2.25])
+
+    def test_binary_layout_is_dims_then_float32(self):
+        encoded = _encode_vector(np.array([1.0, 2.0], dtype=np.float32))
+        assert struct.unpack(">HH2f", encoded) == (2, 0, 1.0, 2.0)
+
+    def test_column_type_leaves_encoding_to_the_asyncpg_codec(self):
+        column_type = BinaryVector(3)
+        assert column_type.bind_processor(asyncpg.dialect()) is None
+        assert column_type.bind_processor(psycopg.dialect())([1, 2, 3]) == "[1.0,2.0,3.0]"
+
+
+class FakeDriver:
+    def __init__(self, in_transaction):
+        self.in_transaction = in_transaction
+        self.copies: list = []
+
+    def is_in_transaction(self):
+        return self.in_transaction
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, list(records), columns))
+
+
+class FakeConnection:
+    def __init__(self, driver):
+        self.driver = driver
+        self.statements: list[str] = []
+
+    async def get_raw_connection(self):
+        return type("Raw", (), {"driver_connection": self.driver})()
+
+    async def execute(self, stmt):
+        self.statements.append(str(stmt))
+        self.driver.in_transaction = True
+
+
+class FakeSession:
+    def __init__(self, connection):
+        self._connection = connection
+
+    async def connection(self):
+        return self._connection
+
+
+class TestCopyRecords:
+    async def test_copies_on_the_sessions_connection(self):
+        conn = FakeConnection(FakeDriver(in_transaction=True))
+        await copy_records(FakeSession(conn), "document_chunks", ("id", "content"), [(1, "a"), (2, "b")])
+
+        assert conn.driver.copies == [("document_chunks", [(1, "a"), (2, "b")], ["id", "content"])]
+        assert conn.statements == []
+
+    async def test_opens_the_transaction_before_copying(self):
+        conn = FakeConnection(FakeDriver(in_transaction=False))
+        await copy_records(FakeSession(conn), "document_chunks", ("id",), [(1,)])
+
+        # COPY outside the adapter's transaction would autocommit.
+        assert conn.statements == ["SELECT 1"]
+        assert len(conn.driver.copies) == 1
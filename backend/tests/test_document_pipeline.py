@@ -0,0 +1,220 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import document_service as mod
+from app.services.document_service import DocumentService, IndexStats, _chunk_hash
+from app.services.llm_service import LLMService
+
+MODEL = "nomic-embed-text"
+
+
+class FakeSession:
+    """Stored chunk rows in, recorded writes out."""
+
+    def __init__(self, stored=()):
+        # (id, content_hash, embedding_model, chunk_index)
+        self.stored = list(stored)
+        self.rows: list = []
+        self.updates: list[dict] = []
+        self.deleted: list = []
+        self.tsv_fills: list = []
+        self.df_deltas: list[tuple[int, list]] = []
+        self.copies = 0
+
+    async def execute(self, stmt, params=None):
+        kind = stmt.__visit_name__
+        if kind == "select":
+            stored = self.stored
+
+            class Result:
+                def all(self):
+                    return stored
+            return Result()
+        if kind == "update":
+            self.updates.extend(params)
+        elif kind == "delete":
+            self.deleted.extend(stmt.whereclause.right.value)
+        elif kind == "textclause" and "corpus_terms" in stmt.text:
+            self.df_deltas.append((params["sign"], params["ids"]))
+        elif kind == "textclause":
+            self.tsv_fills.append(params["document_id"])
+
+    async def copy_records(self, table, columns, records):
+        assert table == "document_chunks"
+        self.rows.extend(SimpleNamespace(**dict(zip(columns, r))) for r in records)
+        self.copies += 1
+
+
+@pytest.fixture(autouse=True)
+def copy_into_fake_session(monkeypatch):
+    async def copy_records(db, table, columns, records):
+        await db.copy_records(table, columns, records)
+
+    monkeypatch.setattr(mod, "copy_records", copy_records)
+
+
+def _chunks(*contents):
+    return [{"content": c, "token_count": 1, "metadata": {"chunk_index": i}} for i, c in enumerate(contents)]
+
+
+def _stored(*contents, model=MODEL):
+    return [(uuid.uuid4(), _chunk_hash(c), model, i) for i, c in enumerate(contents)]
+
+
+async def _batches(*batches):
+    for batch in batches:
+        yield _chunks(*batch), 1.0
+
+
+async def _no_report(stage, percent):
+    pass
+
+
+@pytest.fixture
+def events(monkeypatch):
+    log: list[str] = []
+
+    async def embed(self, chunks):
+        log.append(f"embed:{chunks[0]['content']}")
+        await asyncio.sleep(0.01)
+        log.append(f"embedded:{chunks[0]['content']}")
+        return [[0.0] for _ in chunks]
+
+    monkeypatch.setattr(DocumentService, "_embed_chunks", embed)
+    monkeypatch.setattr(LLMService, "embedding_model", staticmethod(lambda provider_name=None: MODEL))
+    return log
+
+
+async def _index(db, batches, report=_no_report) -> IndexStats:
+    stats = IndexStats()
+    await DocumentService(db=None)._index_chunks(db, uuid.uuid4(), batches, report, stats)
+    return stats
+
+
+class TestIndexChunks:
+    async def test_extraction_runs_ahead_of_embedding(self, events):
+        async def batches():
+            for name in ("a", "b", "c"):
+                events.append(f"extract:{name}")
+                yield _chunks(f"{name}0", f"{name}1"), 0.0
+
+        db = FakeSession()
+        stats = await _index(db, batches())
+
+        assert stats.chunks == stats.embedded == 6
+        assert events.index("extract:b") < events.index("embedded:a0")
+        assert [r.chunk_index for r in db.rows] == list(range(6))
+        assert [json.loads(r.metadata)["chunk_index"] for r in db.rows] == list(range(6))
+        assert all(r.embedding_model == MODEL for r in db.rows)
+        assert db.copies == 3
+
+    async def test_queue_bounds_how_far_extraction_gets_ahead(self, events, monkeypatch):
+        monkeypatch.setattr(mod, "_PIPELINE_DEPTH", 1)
+        extracted = 0
+
+        async def batches():
+            nonlocal extracted
+            for i in range(10):
+                extracted += 1
+                yield _chunks(f"{i}"), 0.0
+
+        async def report(stage, percent):
+            if stage == "embedding":
+                # current batch + one queued + one blocked in put()
+                assert extracted - len([e for e in events if e.startswith("embed:")]) <= 3
+
+        await _index(FakeSession(), batches(), report)
+
+    async def test_extraction_failure_propagates(self, events):
+        async def batches():
+            yield _chunks("a0"), 0.5
+            raise MemoryError("page 400")
+
+        with pytest.raises(MemoryError):
+            await _index(FakeSession(), batches())
+
+    async def test_embedding_failure_stops_extraction(self, events, monkeypatch):
+        extracted = 0
+
+        async def batches():
+            nonlocal extracted
+            for i in range(10):
+                extracted += 1
+                yield _chunks(f"{i}"), 0.0
+
+        async def embed(self, chunks):
+            raise RuntimeError("ollama down")
+
+        monkeypatch.setattr(DocumentService, "_embed_chunks", embed)
+        with pytest.raises(RuntimeError):
+            await _index(FakeSession(), batches())
+        await asyncio.sleep(0)
+        assert extracted < 10
+
+
+class TestIncrementalReindex:
+    async def test_unchanged_document_embeds_nothing(self, events):
+        db = FakeSession(_stored("a", "b", "c"))
+        stats = await _index(db, _batches(["a", "b"], ["c"]))
+
+        assert (stats.chunks, stats.reused, stats.embedded, stats.removed) == (3, 3, 0, 0)
+        assert events == [] and db.rows == [] and db.updates == [] and db.deleted == []
+        assert db.tsv_fills == [] and db.df_deltas == []
+
+    async def test_typo_fix_re_embeds_only_the_changed_chunk(self, events):
+        db = FakeSession(_stored("a", "b", "c", "d"))
+        stats = await _index(db, _batches(["a", "B"], ["c", "d"]))
+
+        assert (stats.reused, stats.embedded, stats.removed) == (3, 1, 1)
+        assert [(r.content, r.chunk_index) for r in db.rows] == [("B", 1)]
+        assert db.deleted == [db.stored[1][0]]
+        assert len(db.tsv_fills) == 1  # one set-based UPDATE for the new rows
+        # corpus df: the deleted row's terms out (before its DELETE), the new row's in
+        assert db.df_deltas == [(-1, [db.stored[1][0]]), (1, [db.rows[0].id])]
+
+    async def test_shifted_chunks_are_renumbered_not_re_embedded(self, events):
+        db = FakeSession(_stored("a", "b", "c"))
+        stats = await _index(db, _batches(["new", "a", "b", "c"]))
+
+        assert (stats.reused, stats.embedded, stats.removed) == (3, 1, 0)
+        assert [u["chunk_index"] for u in db.updates] == [1, 2, 3]
+        assert [u["metadata_"]["chunk_index"] for u in db.updates] == [1, 2, 3]
+
+    async def test_repeated_content_is_matched_one_to_one(self, events):
+        db = FakeSession(_stored("footer", "a", "footer"))
+        stats = await _index(db, _batches(["footer", "a", "footer", "footer"]))
+
+        assert (stats.reused, stats.embedded, stats.removed) == (3, 1, 0)
+
+    async def test_embeddings_from_another_model_are_not_reused(self, events):
+        db = FakeSession(_stored("a", "b", model="text-embedding-3-small"))
+        stats = await _index(db, _batches(["a", "b"]))
+
+        assert (stats.reused, stats.embedded, stats.removed) == (0, 2, 2)
+
+
+class TestIngestionDedup:
+    SLIDE = "Requisitos de grado: aprobar el plan de estudios, la prueba Saber Pro y el trabajo de grado."
+    # The same slide re-extracted from another page: case, accents, line breaks.
+    RESLIDE = "REQUISITOS DE GRADO\nAprobar el plan de estudios, la prueba SABER PRO y el trabajo de grado"
+
+    async def test_near_duplicates_are_collapsed_before_embedding(self, events, monkeypatch):
+        monkeypatch.setattr(mod.settings, "ingestion_dedup_enabled", True)
+        db = FakeSession()
+        stats = await _index(db, _batches([self.SLIDE, "a"], [self.RESLIDE]))
+
+        assert (stats.chunks, stats.embedded, stats.collapsed) == (2, 2, 1)
+        assert [r.chunk_index for r in db.rows] == [0, 1]
+        assert all(r.simhash is not None for r in db.rows)
+
+    async def test_disabled_by_default(self, events):
+        db = FakeSession()
+        stats = await _index(db, _batches([self.SLIDE, self.RESLIDE]))
+
+        assert (stats.chunks, stats.embedded, stats.collapsed) == (2, 2, 0)
+        # Signatures are stored either way — query-time dedup reads them.
+        assert all(r.simhash is not None for r in db.rows)
@@ -54,3 +54,52 @@ async def test_enrichment_input_budget_is_generous_enough_for_real_curricula():
     # Ingeniería de Sistemas) are both ~22,000 chars — the budget must clear
     # that comfortably, not just squeak past the old 4000-char cap.
     assert _ENRICHMENT_INPUT_CHARS >= 20000
+
+
+class TestSummaryReuse:
+    SOURCE = " ".join(f"palabra{i}" for i in range(40))
+
+    @pytest.fixture
+    def generated(self, monkeypatch, service):
+        calls = []
+
+        async def curriculum_summary(file_path, file_type, text):
+            calls.append(text)
+            return "SEMESTRE 1: Cálculo"
+
+        monkeypatch.setattr(service, "_curriculum_summary", curriculum_summary)
+        return calls
+
+    def _doc(self):
+        from app.models.document import Document
+        return Document(title="Pensum", file_name="x.pdf", file_type="pdf", content_hash="h1")
+
+    async def test_unchanged_source_reuses_stored_summary(self, service, generated):
+        from app.services.document_service import IndexStats
+        doc = self._doc()
+
+        first = await service._document_summary(doc, "x.pdf", self.SOURCE, IndexStats())
+        stats = IndexStats()
+        second = await service._document_summary(doc, "x.pdf", self.SOURCE, stats)
+
+        assert first == second and "SEMESTRE 1: Cálculo" in first
+        assert len(generated) == 1
+        assert stats.summary_reused
+
+    async def test_changed_source_or_model_regenerates(self, service, generated, monkeypatch):
+        from app.services.document_service import IndexStats
+        doc = self._doc()
+        await service._document_summary(doc, "x.pdf", self.SOURCE, IndexStats())
+        await service._document_summary(doc, "x.pdf", self.SOURCE + " cambio", IndexStats())
+        monkeypatch.setattr(runtime_config, "default_llm_provider", "ollama")
+        monkeypatch.setattr(runtime_config, "ollama_default_model", "otro-modelo")
+        await service._document_summary(doc, "x.pdf", self.SOURCE + " cambio", IndexStats())
+        assert len(generated) == 3
+
+    async def test_sparse_text_layer_keys_on_the_file_itself(self, service, generated):
+        from app.services.document_service import IndexStats
+        doc = self._doc()
+        await service._document_summary(doc, "x.pdf", "escaneado", IndexStats())
+        doc.content_hash = "h2"  # new scan, same (empty) text layer
+        await service._document_summary(doc, "x.pdf", "escaneado", IndexStats())
+        assert len(generated) == 2
@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.services import embedding_store as mod
+from app.services.embedding_store import EmbeddingStore, text_hash
+from app.utils.cache import embedding_cache
+
+
+class MemoryStore(EmbeddingStore):
+    """Real embed() orchestration; the table is a dict instead of Postgres."""
+
+    def __init__(self):
+        super().__init__()
+        self.table: dict[tuple[str, str], list[float]] = {}
+        self.lookups: list[list[str]] = []
+
+    async def _lookup(self, model, hashes):
+        self.lookups.append(sorted(hashes))
+        return {h: self.table[(model, h)] for h in hashes if (model, h) in self.table}
+
+    async def _save(self, model, vectors):
+        for h, v in vectors.items():
+            self.table[(model, h)] = v
+
+
+class Fetcher:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def __call__(self, texts, model):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    embedding_cache.invalidate_all()
+    yield
+    embedding_cache.invalidate_all()
+
+
+class TestEmbed:
+    async def test_misses_are_fetched_once_and_stored(self):
+        store, fetch = MemoryStore(), Fetcher()
+        vectors = await store.embed(["a", "bb", "a"], "m", fetch)
+
+        assert vectors == [[1.0], [2.0], [1.0]]
+        assert fetch.calls == [["a", "bb"]]
+        assert store.table == {("m", text_hash("a")): [1.0], ("m", text_hash("bb")): [2.0]}
+
+    async def test_stored_vectors_survive_a_cold_memory_cache(self):
+        store, fetch = MemoryStore(), Fetcher()
+        await store.embed(["uno", "dos"], "m", fetch)
+        embedding_cache.invalidate_all()  # restart: only the table is left
+
+        assert await store.embed(["dos", "tres"], "m", fetch) == [[3.0], [4.0]]
+        assert fetch.calls == [["uno", "dos"], ["tres"]]
+
+    async def test_memory_hits_skip_the_table(self):
+        store, fetch = MemoryStore(), Fetcher()
+        await store.embed(["x"], "m", fetch)
+        await store.embed(["x"], "m", fetch)
+
+        assert len(store.lookups) == 1
+        assert fetch.calls == [["x"]]
+
+    async def test_entries_are_per_model(self):
+        store, fetch = MemoryStore(), Fetcher()
+        await store.embed(["x"], "nomic-embed-text", fetch)
+        await store.embed(["x"], "embeddinggemma", fetch)
+
+        assert fetch.calls == [["x"], ["x"]]
+        assert len(store.table) == 2
+
+
+class FakeSession:
+    def __init__(self, rows=(), rowcount=0, error: Exception | None = None):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+        self.error = error
+        self.statements: list = []
+        self.commits = 0
+
+    async def __aenter__(self):
+        if self.error:
+            raise self.error
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(all=lambda: self.rows, rowcount=self.rowcount)
+
+    async def commit(self):
+        self.commits += 1
+
+
+class TestDatabase:
+    async def test_lookup_returns_lists_and_touches_only_stale_rows(self, monkeypatch):
+        now = datetime.now(timezone.utc)
+        session = FakeSession(rows=[
+            SimpleNamespace(text_hash="fresh", embedding=np.array([0.5], dtype=np.float32), last_used_at=now),
+            SimpleNamespace(
+                text_hash="old", embedding=np.array([0.25], dtype=np.float32),
+                last_used_at=now - timedelta(days=3),
+            ),
+        ])
+        monkeypatch.setattr(mod, "async_session", lambda: session)
+        store = EmbeddingStore()
+
+        found = await store._lookup("m", ["fresh", "old", "gone"])
+
+        assert found == {"fresh": [0.5], "old": [0.25]}
+        update = session.statements[1]
+        assert update.__visit_name__ == "update"
+        assert update.compile().params["text_hash_1"] == ["old"]
+        assert (store.hits, store.misses) == (2, 1)
+
+    async def test_unreachable_table_falls_back_to_provider_and_backs_off(self, monkeypatch):
+        attempts = 0
+
+        def broken_session():
+            nonlocal attempts
+            attempts += 1
+            return FakeSession(error=ConnectionRefusedError("db down"))
+
+        monkeypatch.setattr(mod, "async_session", broken_session)
+        store, fetch = EmbeddingStore(), Fetcher()
+
+        assert await store.embed(["a"], "m", fetch) == [[1.0]]
+        embedding_cache.invalidate_all()
+        assert await store.embed(["a"], "m", fetch) == [[1.0]]
+
+        # One failed lookup; the write and the second lookup were skipped.
+        assert attempts == 1
+        assert fetch.calls == [["a"], ["a"]]
+
+    async def test_disabled_store_never_opens_a_session(self, monkeypatch):
+        monkeypatch.setattr(settings, "embedding_store_enabled", False)
+        monkeypatch.setattr(mod, "async_session", lambda: pytest.fail("session opened"))
+
+        assert await EmbeddingStore().embed(["a"], "m", Fetcher()) == [[1.0]]
+
+    async def test_gc_spares_referenced_and_recently_used_entries(self, monkeypatch):
+        session = FakeSession(rowcount=3)
+        monkeypatch.setattr(mod, "async_session", lambda: session)
+        store = EmbeddingStore()
+
+        assert await store.gc(grace_hours=24) == 3
+        sql = str(session.statements[0].compile())
+        assert sql.startswith("DELETE FROM embedding_store")
+        assert "NOT (EXISTS (SELECT" in sql
+        assert "document_chunks.content_hash = embedding_store.text_hash" in sql
+        assert "document_chunks.embedding_model = embedding_store.model" in sql
+        assert "embedding_store.last_used_at <" in sql
+        assert store.collected == 3
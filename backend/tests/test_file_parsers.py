@@ -1,12 +1,21 @@
 import csv
 
+import fitz
 import openpyxl
 import pytest
 from docx import Document
 from pptx import Presentation
 from pptx.util import Inches
 
-from app.utils.file_parsers import _extract_csv, _extract_docx, _extract_pptx, _extract_xlsx
+from app.utils.file_parsers import (
+    _extract_csv,
+    _extract_docx,
+    _extract_pdf,
+    _extract_pptx,
+    _extract_xlsx,
+    iter_pdf_pages,
+    pdf_page_count,
+)
 
 
 @pytest.fixture
@@ -215,3 +224,27 @@ class TestExtractPptx:
         assert "SEMESTRE I" in text
         assert "Fundamentos de seguridad informática" in text
         assert "=== DIAPOSITIVA 1 ===" in text
+
+
+class TestExtractPdf:
+    @pytest.fixture
+    def pdf_with_blank_page(self, tmp_path):
+        path = tmp_path / "acuerdo.pdf"
+        with fitz.open() as doc:
+            for text in ("Artículo 1. Objeto del reglamento", None, "Artículo 2. Ámbito de aplicación"):
+                page = doc.new_page()
+                if text:
+                    page.insert_text((72, 72), text)
+            doc.save(path)
+        return str(path)
+
+    def test_pages_are_yielded_one_per_page(self, pdf_with_blank_page):
+        pages = list(iter_pdf_pages(pdf_with_blank_page))
+        assert len(pages) == pdf_page_count(pdf_with_blank_page) == 3
+        assert pages[1] == ""
+        assert list(iter_pdf_pages(pdf_with_blank_page, start=2)) == pages[2:]
+
+    def test_full_extraction_joins_non_blank_pages(self, pdf_with_blank_page):
+        assert _extract_pdf(pdf_with_blank_page) == (
+            "Artículo 1. Objeto del reglamento\n\nArtículo 2. Ámbito de aplicación"
+        )
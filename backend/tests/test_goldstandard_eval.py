@@ -119,6 +119,38 @@ class TestRetrievalMatchingIsSubstring:
         await _run_retrieval_case(rag, q, k=5)
         assert rag.last_request.hyde_provider_override == "openai"
 
+    @pytest.mark.asyncio
+    async def test_comparison_repeats_retrieval_per_mode_but_generates_once(self, monkeypatch):
+        from app.services import goldstandard_eval_service as mod
+
+        q = GoldQuery(id="6", category="c", query="query", query_type="dentro de alcance", expected_documents=["doc"])
+        rag = FakeRAGService(["doc"])
+        modes_seen, generation_passes = [], []
+
+        async def search(request):
+            modes_seen.append(request.retrieval_mode)
+            return await FakeRAGService.search(rag, request)
+
+        rag.search = search
+
+        async def fake_generation_eval(db, cases, provider_name, model):
+            generation_passes.append(provider_name)
+            return SimpleNamespace(provider=provider_name)
+
+        monkeypatch.setattr(mod, "parse_gold_queries", lambda _: [q])
+        monkeypatch.setattr(mod, "RAGService", lambda db: rag)
+        monkeypatch.setattr(mod, "run_generation_eval", fake_generation_eval)
+
+        result = await mod.run_gold_comparison(
+            None, b"", 5, [("openai", "m")], retrieval_modes=["fused", "legacy"],
+        )
+
+        assert modes_seen == ["fused", "legacy"]
+        assert generation_passes == ["openai"]
+        assert result.retrieval_mode == "fused"
+        assert list(result.alternative_retrievals) == ["legacy"]
+        assert result.alternative_retrievals["legacy"].mrr == 1.0
+
 
 class FakeRateLimitedProvider:
     """Raises openai.RateLimitError a fixed number of times, then succeeds —
@@ -366,3 +398,32 @@ class TestComputeGenerationStatsRecomputesFromCases:
         assert stats["hallucination_rate"] == pytest.approx(0.5)  # 1 real hallucination / 2 judged
         assert len(stats["clarification_triggered"]) == 1
         assert stats["clarification_triggered"][0]["id"] == "GS-003"
+
+
+class TestMarkdownReportRetrievalModes:
+    def _run(self, results):
+        from datetime import datetime
+
+        return SimpleNamespace(created_at=datetime(2026, 10, 17), total_queries=1, k=5, results=results)
+
+    def test_alternative_modes_get_a_side_by_side_table(self):
+        from app.routers.goldstandard_eval import _render_markdown_report
+
+        report = _render_markdown_report(self._run({
+            "retrieval": {"mrr": 0.7, "hit_rate": 0.8},
+            "retrieval_mode": "fused",
+            "alternative_retrievals": {"legacy": {"mrr": 0.6, "hit_rate": 0.75}},
+            "generations": [],
+        }))
+
+        assert "Modo de recuperación: `fused`" in report
+        assert "| Métrica | fused | legacy |" in report
+        assert "| MRR | 0.700 | 0.600 |" in report
+
+    def test_runs_stored_before_modes_existed_render_unchanged(self):
+        from app.routers.goldstandard_eval import _render_markdown_report
+
+        report = _render_markdown_report(self._run({"retrieval": {"mrr": 0.5}, "generations": []}))
+
+        assert "Modo de recuperación" not in report
+        assert "A/B" not in report
@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.providers.ollama_provider import OllamaProvider
+from app.utils.cache import embedding_cache
+from app.utils.http_pool import OllamaHTTPPool
+
+
+def _pool_with(handler) -> OllamaHTTPPool:
+    pool = OllamaHTTPPool()
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return pool
+
+
+class TestOllamaHTTPPool:
+    async def test_timeout_is_per_call(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.extensions["timeout"]["read"])
+            return httpx.Response(200, json={})
+
+        pool = _pool_with(handler)
+        await pool.get("http://ollama/api/tags", timeout=5.0)
+        await pool.post("http://ollama/api/chat", timeout=600.0, json={})
+        assert seen == [5.0, 600.0]
+
+    async def test_requests_past_max_connections_count_as_saturated(self, monkeypatch):
+        monkeypatch.setattr(settings, "ollama_pool_max_connections", 2)
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return httpx.Response(200, json={})
+
+        pool = _pool_with(handler)
+        calls = [
+            asyncio.create_task(pool.get("http://ollama/api/tags", timeout=5.0))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert pool.stats()["in_flight"] == 3
+        release.set()
+        await asyncio.gather(*calls)
+
+        stats = pool.stats()
+        assert stats["in_flight"] == 0
+        assert stats["peak_in_flight"] == 3
+        assert stats["requests"] == 3
+        assert stats["saturated_requests"] == 1
+
+    async def test_in_flight_released_when_request_fails(self):
+        def handler(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        pool = _pool_with(handler)
+        try:
+            await pool.get("http://ollama/api/tags", timeout=5.0)
+        except httpx.ConnectError:
+            pass
+        assert pool.stats()["in_flight"] == 0
+
+    async def test_aclose_closes_client(self):
+        pool = _pool_with(lambda request: httpx.Response(200))
+        client = pool._client
+        await pool.aclose()
+        assert client.is_closed
+        assert pool.stats()["active"] is False
+
+
+class TestOllamaProviderUsesPool:
+    async def test_all_calls_share_one_client(self):
+        def handler(request):
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": [{"name": "qwen3:8b"}]})
+            return httpx.Response(200, json={
+                "message": {"content": "<think>x</think>hola"}, "done_reason": "stop",
+            })
+
+        provider = OllamaProvider()
+        provider._pool = _pool_with(handler)
+
+        assert await provider.is_available() is True
+        assert await provider.get_installed_models() == ["qwen3:8b"]
+        result = await provider.generate([{"role": "user", "content": "hi"}], model="qwen3:8b")
+
+        assert result["content"] == "hola"
+        assert provider._pool.stats()["requests"] == 3
+
+
+class TestOllamaBatchEmbed:
+    @pytest.fixture(autouse=True)
+    def no_embedding_store(self, monkeypatch):
+        monkeypatch.setattr(settings, "embedding_store_enabled", False)
+
+    def _provider(self, handler):
+        embedding_cache.invalidate_all()
+        provider = OllamaProvider()
+        provider._pool = _pool_with(handler)
+        return provider
+
+    async def test_uses_one_embed_call_per_batch(self, monkeypatch):
+        monkeypatch.setattr(settings, "ollama_embed_batch_size", 2)
+        bodies = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            bodies.append((request.url.path, body["input"]))
+            return httpx.Response(200, json={"embeddings": [[float(len(t))] for t in body["input"]]})
+
+        provider = self._provider(handler)
+        result = await provider.embed(["a", "bb", "ccc", "a"], model="m")
+
+        assert result["embeddings"] == [[1.0], [2.0], [3.0], [1.0]]
+        # "a" is sent once even though it appears twice.
+        assert bodies == [("/api/embed", ["a", "bb"]), ("/api/embed", ["ccc"])]
+
+    async def test_cached_texts_are_not_sent(self):
+        sent = []
+
+        def handler(request):
+            inputs = json.loads(request.content)["input"]
+            sent.extend(inputs)
+            return httpx.Response(200, json={"embeddings": [[1.0] for _ in inputs]})
+
+        provider = self._provider(handler)
+        await provider.embed(["uno"], model="m")
+        await provider.embed(["uno", "dos"], model="m")
+        assert sent == ["uno", "dos"]
+
+    async def test_falls_back_to_legacy_endpoint_on_404(self):
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            if request.url.path == "/api/embed":
+                return httpx.Response(404, text="404 page not found")
+            return httpx.Response(200, json={"embedding": [9.0]})
+
+        provider = self._provider(handler)
+        assert (await provider.embed(["x", "y"], model="m"))["embeddings"] == [[9.0], [9.0]]
+        await provider.embed(["z"], model="m")
+
+        # Probed once, then straight to the per-text endpoint.
+        assert paths.count("/api/embed") == 1
+        assert paths.count("/api/embeddings") == 3
+
+    async def test_missing_model_404_raises_without_disabling_batching(self):
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            if json.loads(request.content)["model"] == "missing":
+                return httpx.Response(404, json={"error": 'model "missing" not found, try pulling it first'})
+            return httpx.Response(200, json={"embeddings": [[1.0]]})
+
+        provider = self._provider(handler)
+        with pytest.raises(httpx.HTTPStatusError):
+            await provider.embed(["x"], model="missing")
+        assert (await provider.embed(["y"], model="m"))["embeddings"] == [[1.0]]
+
+        assert paths == ["/api/embed", "/api/embed"]
+        assert provider._batch_embed_supported is True
+
+    async def test_in_flight_batches_capped_by_semaphore(self, monkeypatch):
+        monkeypatch.setattr(settings, "ollama_embed_batch_size", 1)
+        monkeypatch.setattr(settings, "ollama_embed_max_concurrency", 2)
+        active = peak = 0
+
+        async def handler(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return httpx.Response(200, json={"embeddings": [[1.0]]})
+
+        provider = self._provider(handler)
+        await provider.embed([f"t{i}" for i in range(6)], model="m")
+        assert peak == 2
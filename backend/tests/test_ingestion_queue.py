@@ -0,0 +1,196 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.services import ingestion_queue as mod
+from app.services.document_service import DocumentService, IndexStats
+from app.services.ingestion_queue import IngestionQueue, new_job, retry_delay
+from app.utils.activity import ForegroundActivity
+
+
+class RecordingQueue(IngestionQueue):
+    """Real _run/_fail logic; job-row writes recorded instead of hitting Postgres."""
+
+    def __init__(self):
+        super().__init__()
+        self.updates: list[dict] = []
+        self.failed_documents: list = []
+
+    async def _update(self, job_id, **values):
+        self.updates.append(values)
+
+    async def _mark_document_failed(self, document_ids):
+        self.failed_documents.extend(document_ids)
+
+
+def _claimed_job(kind="upload", attempts=1, max_attempts=3):
+    job = new_job(uuid.uuid4(), kind)
+    job.id = uuid.uuid4()
+    job.status = "running"
+    job.attempts = attempts
+    job.max_attempts = max_attempts
+    return job
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Replace the heavy pipeline; `pipeline.behavior` decides what it does."""
+    class Pipeline:
+        behavior = staticmethod(lambda: IndexStats(chunks=4, reused=3, embedded=1))
+        calls: list = []
+
+    async def process_document(self, document_id, reindex=False, progress=None):
+        Pipeline.calls.append((document_id, reindex))
+        await progress("extracting", 5)
+        result = Pipeline.behavior()
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    monkeypatch.setattr(DocumentService, "process_document", process_document)
+    monkeypatch.setattr(settings, "ingestion_chat_yield_max_seconds", 0.0)
+    return Pipeline
+
+
+class TestJobs:
+    def test_uploads_outrank_reindexes(self):
+        assert new_job(uuid.uuid4(), "upload").priority < new_job(uuid.uuid4(), "reindex").priority
+
+    def test_retry_backoff_is_exponential(self, monkeypatch):
+        monkeypatch.setattr(settings, "ingestion_retry_backoff_seconds", 10.0)
+        assert [retry_delay(n) for n in (1, 2, 3)] == [10.0, 20.0, 40.0]
+
+
+class TestRun:
+    async def test_success_completes_job(self, pipeline):
+        queue, job = RecordingQueue(), _claimed_job(kind="reindex")
+        await queue._run(job)
+
+        assert pipeline.calls[-1] == (job.document_id, True)
+        assert queue.updates[0] == {"stage": "extracting", "progress": 5}
+        assert queue.updates[-1]["status"] == "completed"
+        assert queue.updates[-1]["progress"] == 100
+        assert queue.updates[-1]["result"]["reused"] == 3
+
+    async def test_failure_requeues_with_backoff(self, pipeline):
+        def boom():
+            raise RuntimeError("ollama down")
+        pipeline.behavior = staticmethod(boom)
+        queue, job = RecordingQueue(), _claimed_job(attempts=1)
+        await queue._run(job)
+
+        final = queue.updates[-1]
+        assert final["status"] == "queued"
+        assert "ollama down" in final["last_error"]
+        assert final["run_after"] > job.run_after
+        assert queue.failed_documents == []
+
+    async def test_last_attempt_fails_job_and_document(self, pipeline):
+        def boom():
+            raise RuntimeError("corrupt pdf")
+        pipeline.behavior = staticmethod(boom)
+        queue, job = RecordingQueue(), _claimed_job(attempts=3, max_attempts=3)
+        await queue._run(job)
+
+        assert queue.updates[-1]["status"] == "failed"
+        assert queue.failed_documents == [job.document_id]
+
+    async def test_shutdown_requeues_without_charging_attempt(self, pipeline):
+        pipeline.behavior = staticmethod(lambda: asyncio.sleep(10))
+        queue, job = RecordingQueue(), _claimed_job(attempts=2)
+        task = asyncio.create_task(queue._run(job))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert queue.updates[-1]["status"] == "queued"
+        assert queue.updates[-1]["attempts"] == 1
+
+    async def test_missing_document_is_not_retried(self, pipeline):
+        pipeline.behavior = staticmethod(lambda: None)
+        queue = RecordingQueue()
+        await queue._run(_claimed_job())
+        assert queue.updates[-1]["status"] == "failed"
+        assert queue.updates[-1]["stage"] == "document_missing"
+
+
+class FlakyDbQueue(RecordingQueue):
+    """Hands out `jobs` from _claim; every job-row write raises."""
+
+    def __init__(self, jobs):
+        super().__init__()
+        self.jobs = list(jobs)
+        self.claimed: list = []
+
+    async def _claim(self):
+        if not self.jobs:
+            return None
+        job = self.jobs.pop(0)
+        self.claimed.append(job)
+        return job
+
+    async def _update(self, job_id, **values):
+        raise ConnectionError("db gone")
+
+
+class TestWorker:
+    async def test_bookkeeping_error_does_not_kill_worker(self, pipeline, monkeypatch):
+        monkeypatch.setattr(settings, "ingestion_poll_interval_seconds", 0.01)
+        first, second = _claimed_job(), _claimed_job()
+        queue = FlakyDbQueue([first, second])
+        queue._wakeup = asyncio.Event()
+        task = asyncio.create_task(queue._worker())
+        for _ in range(100):
+            if len(queue.claimed) == 2 or task.done():
+                break
+            await asyncio.sleep(0.01)
+
+        assert not task.done()
+        assert queue.claimed == [first, second]
+        assert queue.running == 0
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    async def test_failure_bookkeeping_error_does_not_escape(self, pipeline):
+        # The first progress write raises, the pipeline fails with it, and
+        # recording that failure raises again: _run must swallow the second.
+        queue = FlakyDbQueue([])
+        await queue._run(_claimed_job(attempts=3, max_attempts=3))
+        assert queue.failed_documents == []
+
+class TestForegroundActivity:
+    async def test_idle_returns_immediately(self):
+        assert await ForegroundActivity().wait_idle(5) == 0.0
+
+    async def test_waits_for_chat_to_finish(self):
+        activity = ForegroundActivity()
+        release = asyncio.Event()
+
+        async def chat():
+            with activity.track():
+                await release.wait()
+
+        task = asyncio.create_task(chat())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(activity.wait_idle(5))
+        await asyncio.sleep(0.02)
+        assert not waiter.done()
+        release.set()
+        await task
+        assert 0 < await waiter < 5
+
+    async def test_wait_is_bounded(self):
+        activity = ForegroundActivity()
+        with activity.track():
+            waited = await activity.wait_idle(0.02)
+        assert waited >= 0.02
+        assert activity.active == 0
+
+
+def test_module_registers_queue_metrics():
+    text = mod.REGISTRY.render()
+    assert "guaca_ingestion_queue_depth" in text
@@ -0,0 +1,87 @@
+import pytest
+
+from app.utils import http_pool, metrics, single_flight  # noqa: F401  (register collectors)
+from app.utils.cache import AsyncAnswerCache
+from app.utils.metrics import Counter, Histogram, Registry
+
+
+def _render(*instruments, extra=()) -> str:
+    registry = Registry()
+    for m in instruments:
+        registry.register(m)
+    return registry.render(extra)
+
+
+class TestExposition:
+    def test_counter_with_labels(self):
+        c = Counter("lookups", "Lookups.", ["result"])
+        c.inc(result="hit")
+        c.inc(2, result="miss")
+        text = _render(c)
+        assert "# TYPE guaca_lookups counter" in text
+        assert 'guaca_lookups_total{result="hit"} 1' in text
+        assert 'guaca_lookups_total{result="miss"} 2' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        h = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+        for v in (0.05, 0.5, 5):
+            h.observe(v)
+        lines = _render(h).splitlines()
+        assert 'guaca_latency_seconds_bucket{le="0.1"} 1' in lines
+        assert 'guaca_latency_seconds_bucket{le="1"} 2' in lines
+        assert 'guaca_latency_seconds_bucket{le="+Inf"} 3' in lines
+        assert "guaca_latency_seconds_count 3" in lines
+        assert "guaca_latency_seconds_sum 5.55" in lines
+
+    def test_wrong_labels_raise(self):
+        c = Counter("x", "X.", ["provider"])
+        with pytest.raises(ValueError):
+            c.inc(model="m")
+
+    def test_collected_families_skip_unknown_values(self):
+        text = _render(extra=[
+            ("db_rows_estimated", "gauge", "Rows.", [({"table": "messages"}, 42), ({"table": "x"}, None)]),
+        ])
+        assert 'guaca_db_rows_estimated{table="messages"} 42' in text
+        assert 'table="x"' not in text
+
+    def test_label_values_are_escaped(self):
+        c = Counter("q", "Q.", ["q"])
+        c.inc(q='dijo "hola"\n')
+        assert r'guaca_q_total{q="dijo \"hola\"\n"} 1' in _render(c)
+
+    def test_global_registry_renders_collectors(self):
+        text = metrics.REGISTRY.render()
+        for name in ("guaca_cache_lookups_total", "guaca_ollama_pool_in_flight",
+                     "guaca_single_flight_coalesced_total", "guaca_llm_request_seconds"):
+            assert f"# HELP {name.removesuffix('_total')}" in text
+
+
+class TestInstrumentation:
+    async def test_answer_cache_counts_outcomes(self):
+        lookups = metrics.ANSWER_CACHE_LOOKUPS
+        before = {r: lookups.value(result=r) for r in ("hit", "miss", "guard_rejected")}
+        entity_before = metrics.ANSWER_CACHE_GUARD_REJECTIONS.value(guard="entity")
+
+        cache = AsyncAnswerCache(similarity_threshold=0.9)
+        await cache.store(
+            embedding=[1.0, 0.0], question="requisitos de admisión para medicina",
+            answer="a", sources=[{"program": "Medicina", "faculty": None}],
+            llm_provider="ollama", llm_model="m",
+        )
+        await cache.find_similar([1.0, 0.0], query_text="requisitos de admisión para medicina")
+        await cache.find_similar([0.0, 1.0], query_text="otra cosa")
+        await cache.find_similar([1.0, 0.0], query_text="requisitos de admisión para enfermería")
+
+        assert lookups.value(result="hit") == before["hit"] + 1
+        assert lookups.value(result="miss") == before["miss"] + 1
+        assert lookups.value(result="guard_rejected") == before["guard_rejected"] + 1
+        assert metrics.ANSWER_CACHE_GUARD_REJECTIONS.value(guard="entity") == entity_before + 1
+
+    async def test_llm_call_records_latency_and_errors(self):
+        before = metrics.LLM_REQUEST_SECONDS.count(provider="test", op="generate")
+        with pytest.raises(RuntimeError):
+            with metrics.llm_call("test", "generate"):
+                raise RuntimeError("down")
+        assert metrics.LLM_REQUEST_SECONDS.count(provider="test", op="generate") == before + 1
+        assert metrics.LLM_ERRORS.value(provider="test", op="generate") >= 1
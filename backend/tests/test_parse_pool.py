@@ -0,0 +1,130 @@
+import time
+
+import fitz
+import openpyxl
+import pytest
+from docx import Document
+
+from app.config import settings
+from app.utils.chunking import chunk_tabular_text, chunk_text
+from app.utils.file_parsers import extract_text, iter_pdf_pages
+from app.utils.parse_pool import ParsePool, ParseTimeout
+from app.utils.text_processing import clean_text
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(settings, "parse_pool_workers", 1)
+    monkeypatch.setattr(settings, "parse_memory_limit_mb", 1024)
+    p = ParsePool()
+    yield p
+    p.shutdown()
+
+
+@pytest.fixture
+def docx_file(tmp_path):
+    path = tmp_path / "reglamento.docx"
+    doc = Document()
+    for i in range(40):
+        doc.add_paragraph(f"Artículo {i}. El estudiante deberá cumplir los requisitos del programa. " * 5)
+    doc.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def xlsx_file(tmp_path):
+    path = tmp_path / "pensum.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws["A1"] = "SEMESTRE I"
+    ws.merge_cells("A1:D1")
+    for i in range(30):
+        ws.append([f"TD{i:03}", f"Materia número {i}", 3, f"TD{i:03}"])
+    wb.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def pdf_file(tmp_path):
+    # Dense pages (each over one chunk): chunk_text never merges across a page
+    # break, so streamed and whole-document chunking must agree exactly.
+    path = tmp_path / "reglamento.pdf"
+    with fitz.open() as doc:
+        for p in range(11):
+            page = doc.new_page()
+            for line in range(45):
+                page.insert_text((40, 50 + line * 16), f"p{p} l{line} El estudiante deberá cumplir los requisitos del programa", fontsize=8)
+        doc.save(path)
+    return str(path)
+
+
+async def _stream(pool, path, min_pages=2, min_chars=0):
+    prefix, page_count = await pool.pdf_prefix(path, min_pages=min_pages, min_chars=min_chars)
+    batches = [
+        b async for b in pool.stream_pdf_chunks(
+            path, start=len(prefix), page_count=page_count, lead="\n\n".join(prefix),
+        )
+    ]
+    return prefix, page_count, batches
+
+
+class TestParsePool:
+    async def test_output_matches_in_process_parsing(self, pool, docx_file, xlsx_file):
+        for path, file_type, tabular in ((docx_file, "docx", False), (xlsx_file, "xlsx", True)):
+            expected_text = clean_text(extract_text(path, file_type))
+            text = await pool.extract_clean_text(path, file_type)
+            assert text == expected_text
+
+            chunker = chunk_tabular_text if tabular else chunk_text
+            expected_chunks = chunker(
+                text, chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap,
+            )
+            assert await pool.chunk(text, tabular=tabular) == expected_chunks
+
+    async def test_timeout_kills_worker_and_pool_recovers(self, pool, docx_file):
+        with pytest.raises(ParseTimeout):
+            await pool.run(time.sleep, 30, timeout=0.5)
+        assert await pool.extract_clean_text(docx_file, "docx")
+
+    async def test_memory_limit_fails_the_file_not_the_process(self, pool):
+        with pytest.raises(MemoryError):
+            await pool.run(bytearray, 4 * 1024**3)
+
+    async def test_parser_errors_propagate(self, pool, tmp_path):
+        with pytest.raises(ValueError):
+            await pool.extract_clean_text(str(tmp_path / "x.bin"), "bin")
+
+    async def test_disabled_pool_runs_in_a_thread(self, monkeypatch, docx_file):
+        monkeypatch.setattr(settings, "parse_pool_workers", 0)
+        p = ParsePool()
+        assert await p.extract_clean_text(docx_file, "docx") == clean_text(extract_text(docx_file, "docx"))
+        assert p._executor is None
+
+
+class TestPdfStreaming:
+    async def test_streamed_chunks_match_whole_document(self, pool, monkeypatch, pdf_file):
+        monkeypatch.setattr(settings, "pdf_stream_batch_pages", 4)
+        prefix, page_count, batches = await _stream(pool, pdf_file)
+
+        assert len(prefix) == 2 and page_count == 11
+        assert [done for _, done in batches] == [6, 10, 11]
+        streamed = [c["content"] for chunks, _ in batches for c in chunks]
+        whole = chunk_text(clean_text(extract_text(pdf_file, "pdf")))
+        assert streamed == [c["content"] for c in whole]
+
+    async def test_prefix_reads_until_both_thresholds(self, monkeypatch, pdf_file):
+        monkeypatch.setattr(settings, "parse_pool_workers", 0)
+        p = ParsePool()
+        one_page = len(clean_text(next(iter_pdf_pages(pdf_file))))
+
+        prefix, _ = await p.pdf_prefix(pdf_file, min_pages=2, min_chars=one_page * 3 + 1)
+        assert len(prefix) == 4
+        prefix, _ = await p.pdf_prefix(pdf_file, min_pages=50, min_chars=0)
+        assert len(prefix) == 11
+
+    async def test_document_read_entirely_for_the_prefix_is_one_batch(self, monkeypatch, pdf_file):
+        monkeypatch.setattr(settings, "parse_pool_workers", 0)
+        _, _, batches = await _stream(ParsePool(), pdf_file, min_pages=50)
+        assert len(batches) == 1
+        assert batches[0][1] == 11
+        assert batches[0][0] == chunk_text(clean_text(extract_text(pdf_file, "pdf")))
@@ -0,0 +1,167 @@
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.services.ingestion_queue import ingestion_queue
+from app.services.question_generation import QuestionGenerator, parse_questions
+from app.services.llm_service import LLMService
+from app.utils.activity import chat_activity
+
+
+class TestParseQuestions:
+    def test_strips_list_markers_and_quotes(self):
+        reply = '1. ¿Cuántos créditos tiene el programa?\n- "¿Qué pasa si pierdo una materia?"\n• ¿Cuándo son las matrículas?'
+        assert parse_questions(reply, 3) == [
+            "¿Cuántos créditos tiene el programa?",
+            "¿Qué pasa si pierdo una materia?",
+            "¿Cuándo son las matrículas?",
+        ]
+
+    def test_drops_preambles_repeats_and_extra_questions(self):
+        reply = "Aquí tienes tres preguntas:\n¿Qué es el PAPA?\n¿qué es el papa?\n\n¿Cómo se calcula?\n¿Y el PAPI?"
+        assert parse_questions(reply, 2) == ["¿Qué es el PAPA?", "¿Cómo se calcula?"]
+
+
+class RecordingGenerator(QuestionGenerator):
+    """Real batch logic; the DB side replaced by `pending` and recorded writes."""
+
+    def __init__(self, pending, already_stored=()):
+        super().__init__()
+        self.pending = list(pending)
+        self.already_stored = set(already_stored)
+        self.stored: list = []
+
+    async def _pending(self, limit, exclude):
+        return [c for c in self.pending if c[0] not in exclude][:limit]
+
+    async def _store(self, chunk_id, questions, embeddings):
+        if chunk_id in self.already_stored:
+            return False
+        self.stored.append((chunk_id, questions, embeddings))
+        return True
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    class Calls:
+        generated: list[str] = []
+        embedded: list[list[str]] = []
+        reply = "¿Cuántos créditos tiene?\n¿Quién lo aprueba?"
+        on_generate = staticmethod(lambda: None)
+
+    async def generate(self, title, content):
+        Calls.generated.append(content)
+        Calls.on_generate()
+        return parse_questions(Calls.reply, settings.doc2query_questions_per_chunk)
+
+    async def embed(self, request):
+        Calls.embedded.append(request.texts)
+        return type("Resp", (), {"embeddings": [[0.0] for _ in request.texts]})()
+
+    monkeypatch.setattr(QuestionGenerator, "_generate", generate)
+    monkeypatch.setattr(LLMService, "embed", embed)
+    monkeypatch.setattr(ingestion_queue, "running", 0)
+    monkeypatch.setattr(ingestion_queue, "queued", 0)
+    return Calls
+
+
+def _chunks(n):
+    return [(uuid.uuid4(), "Reglamento", f"chunk {i}") for i in range(n)]
+
+
+class TestRunBatch:
+    async def test_stores_questions_with_their_embeddings(self, llm):
+        gen = RecordingGenerator(_chunks(2))
+        assert await gen.run_batch() == 2
+
+        assert [q for _, q, _ in gen.stored] == [["¿Cuántos créditos tiene?", "¿Quién lo aprueba?"]] * 2
+        assert all(len(e) == len(q) for _, q, e in gen.stored)
+        assert (gen.chunks, gen.questions) == (2, 4)
+
+    async def test_a_reply_without_questions_still_marks_the_chunk(self, llm):
+        llm.reply = "No hay preguntas que hacer."
+        gen = RecordingGenerator(_chunks(1))
+        await gen.run_batch()
+
+        assert gen.stored[0][1] == [] and llm.embedded == []
+
+    async def test_chunk_stored_elsewhere_is_not_counted(self, llm):
+        chunks = _chunks(2)
+        gen = RecordingGenerator(chunks, already_stored={chunks[0][0]})
+        assert await gen.run_batch() == 2
+        assert gen.chunks == 1
+
+    async def test_stops_when_ingestion_arrives(self, llm, monkeypatch):
+        gen = RecordingGenerator(_chunks(3))
+        llm.on_generate = staticmethod(lambda: monkeypatch.setattr(ingestion_queue, "queued", 1))
+
+        assert await gen.run_batch() == 1
+        assert len(llm.generated) == 1
+
+    async def test_batch_size_bounds_a_pass(self, llm, monkeypatch):
+        monkeypatch.setattr(settings, "doc2query_batch_size", 2)
+        gen = RecordingGenerator(_chunks(5))
+        assert await gen.run_batch() == 2
+
+
+class TestFailures:
+    async def test_a_failing_chunk_does_not_stop_the_batch(self, llm):
+        chunks = _chunks(3)
+        llm.on_generate = staticmethod(lambda: _fail_on(llm, "chunk 0"))
+        gen = RecordingGenerator(chunks)
+
+        assert await gen.run_batch() == 2
+        assert [c for c, _, _ in gen.stored] == [chunks[1][0], chunks[2][0]]
+        assert gen.failures == 1
+
+    async def test_failing_chunk_backs_off_instead_of_coming_first(self, llm):
+        chunks = _chunks(2)
+        llm.on_generate = staticmethod(lambda: _fail_on(llm, "chunk 0"))
+        gen = RecordingGenerator(chunks)
+        await gen.run_batch()
+        llm.generated.clear()
+
+        await gen.run_batch()
+        assert "chunk 0" not in llm.generated
+
+    async def test_gives_up_after_max_attempts_with_no_questions(self, llm, monkeypatch):
+        monkeypatch.setattr(settings, "doc2query_retry_backoff_seconds", 0.0)
+        monkeypatch.setattr(settings, "doc2query_max_attempts", 2)
+        chunks = _chunks(2)
+        llm.on_generate = staticmethod(lambda: _fail_on(llm, "chunk 0"))
+        gen = RecordingGenerator(chunks)
+
+        await gen.run_batch()
+        assert chunks[0][0] not in [c for c, _, _ in gen.stored]
+        gen.stored.clear()
+        await gen.run_batch()
+        assert (chunks[0][0], [], []) in gen.stored
+
+    async def test_provider_outage_charges_no_attempts(self, llm, monkeypatch):
+        monkeypatch.setattr(settings, "doc2query_retry_backoff_seconds", 0.0)
+        monkeypatch.setattr(settings, "doc2query_max_attempts", 1)
+
+        def down():
+            raise ConnectionError("ollama down")
+        llm.on_generate = staticmethod(down)
+        gen = RecordingGenerator(_chunks(2))
+
+        assert await gen.run_batch() == 0
+        assert gen.stored == [] and gen.failures == 2
+
+
+def _fail_on(llm, content):
+    if llm.generated[-1] == content:
+        raise RuntimeError("context length exceeded")
+
+
+class TestBusy:
+    def test_chat_in_flight_is_busy(self, llm):
+        assert not QuestionGenerator.busy()
+        with chat_activity.track():
+            assert QuestionGenerator.busy()
+
+    def test_running_ingestion_is_busy(self, llm, monkeypatch):
+        monkeypatch.setattr(ingestion_queue, "running", 1)
+        assert QuestionGenerator.busy()
@@ -1,9 +1,13 @@
 import uuid
+from types import SimpleNamespace
 
+import numpy as np
 import pytest
 
-from app.schemas.rag import SearchResultItem
-from app.services.rag_service import RAGService
+from app.config import settings
+from app.schemas.rag import SearchRequest, SearchResultItem
+from app.services.rag_service import RAGService, _ChunkSignals
+from app.utils.simhash import signature
 
 
 def make_item(content, score=0.5, document_title="Doc", program=None, faculty=None):
@@ -42,6 +46,22 @@ class TestDeduplicate:
     def test_empty_list_returns_empty(self, service):
         assert service._deduplicate([]) == []
 
+    def test_stored_signatures_are_compared_instead_of_content(self, service):
+        a = make_item("Requisitos de admisión para el programa de medicina", score=0.9)
+        b = make_item("Costos de matrícula para el segundo semestre académico", score=0.8)
+        same = signature(a.content)
+        signals = {a.chunk_id: _ChunkSignals(None, None, same), b.chunk_id: _ChunkSignals(None, None, same ^ 0b111)}
+
+        assert service._deduplicate([a, b], signals) == [a]
+
+    def test_paraphrase_with_a_changed_word_is_a_duplicate(self, service):
+        base = (
+            "La institución universitaria del Putumayo ofrece programas académicos de pregrado "
+            "y posgrado en diversas áreas del conocimiento con modalidad presencial y a distancia"
+        )
+        items = [make_item(base), make_item(base.replace("diversas", "distintas"))]
+        assert len(service._deduplicate(items)) == 1
+
 
 class TestApplyDiversity:
     def test_caps_chunks_per_document(self, service):
@@ -68,6 +88,51 @@ class TestApplyDiversity:
         assert titles == {"DocA", "DocB", "DocC"}
 
 
+def _embedded(items, vectors):
+    return {item.chunk_id: _ChunkSignals(None, None, None, np.array(v, dtype=np.float32)) for item, v in zip(items, vectors)}
+
+
+class TestSelectMMR:
+    def test_skips_a_near_copy_of_an_already_picked_chunk(self, service):
+        first, copy, other = make_item("sem 1", score=0.9), make_item("sem 1 bis", score=0.88), make_item("sem 7", score=0.7)
+        signals = _embedded([first, copy, other], [[1, 0], [0.99, 0.05], [0.3, 1]])
+
+        assert service._select_mmr([first, copy, other], signals, top_k=2) == [first, other]
+
+    def test_lambda_one_is_plain_relevance(self, service, monkeypatch):
+        monkeypatch.setattr(settings, "rag_mmr_lambda", 1.0)
+        first, copy, other = make_item("sem 1", score=0.9), make_item("sem 1 bis", score=0.88), make_item("sem 7", score=0.7)
+        signals = _embedded([first, copy, other], [[1, 0], [0.99, 0.05], [0.3, 1]])
+
+        assert service._select_mmr([first, copy, other], signals, top_k=2) == [first, copy]
+
+    def test_keeps_the_per_document_cap(self, service):
+        items = [make_item(f"a{i}", score=0.9 - i / 100, document_title="DocA") for i in range(3)]
+        items.append(make_item("b", score=0.1, document_title="DocB"))
+        signals = _embedded(items, [[1, 0], [0, 1], [1, 1], [1, 0]])
+
+        result = service._select_mmr(items, signals, top_k=3, max_per_doc=2)
+        assert [r.document_title for r in result].count("DocA") == 2
+        assert result[-1].document_title == "DocB"
+
+    def test_ranks_by_upstream_relevance_not_cosine(self, service):
+        # A full-text-only RRF winner: cosine lifted to the threshold only.
+        lexical = make_item("artículo 42 reglamento", score=0.35)
+        vector_a, vector_b = make_item("sem 1", score=0.7), make_item("sem 2", score=0.68)
+        items = [lexical, vector_a, vector_b]
+        signals = _embedded(items, [[0, 1], [1, 0], [0.9, 0.3]])
+        relevance = {lexical.chunk_id: 1.0, vector_a.chunk_id: 0.6, vector_b.chunk_id: 0.55}
+
+        assert service._select_mmr(items, signals, top_k=2, relevance=relevance)[0] is lexical
+        # By raw cosine it would lose the top slot.
+        assert service._select_mmr(items, signals, top_k=2)[0] is vector_a
+
+    def test_falls_back_to_the_document_cap_without_embeddings(self, service):
+        items = [make_item(f"a{i}", document_title="DocA") for i in range(3)]
+
+        assert service._select_mmr(items, {}, top_k=3, max_per_doc=2) == items[:2]
+
+
 class TestRerank:
     def test_keyword_overlap_can_promote_lower_semantic_score(self, service):
         query = "créditos programa medicina"
@@ -80,6 +145,15 @@ class TestRerank:
         reranked = service._rerank(query, [high_semantic_low_keyword, low_semantic_high_keyword])
         assert reranked[0].content.startswith("el programa de medicina")
 
+    def test_stored_term_frequencies_are_used_instead_of_content(self, service):
+        # Content says nothing about the query; the stored frequencies do.
+        stored = make_item("texto sin relación", score=0.40)
+        other = make_item("otro texto sin relación", score=0.45)
+        signals = {stored.chunk_id: _ChunkSignals({"matricula": 3, "costo": 1}, 40, None)}
+
+        reranked = service._rerank("costo de la matrícula", [other, stored], signals)
+        assert reranked[0] is stored
+
     def test_empty_results_returns_empty(self, service):
         assert service._rerank("query", []) == []
 
@@ -88,6 +162,18 @@ class TestRerank:
         result = service._rerank("query", [item])
         assert result == [item]
 
+    def test_blends_over_the_first_stage_relevance_and_writes_the_hybrid_back(self, service):
+        # Fused mode: RRF put the low-cosine chunk first; BM25 must not undo that.
+        rrf_first = make_item("informacion general sin relacion aparente", score=0.35)
+        cosine_first = make_item("otra informacion general", score=0.70)
+        relevance = {rrf_first.chunk_id: 1.0, cosine_first.chunk_id: 0.5}
+
+        reranked = service._rerank("horario biblioteca", [rrf_first, cosine_first], None, relevance)
+        assert reranked == [rrf_first, cosine_first]
+        assert relevance[rrf_first.chunk_id] == pytest.approx(0.8)
+        assert relevance[cosine_first.chunk_id] == pytest.approx(0.4)
+        assert rrf_first.score == 0.35  # the cosine stays for the quality gate
+
 
 class TestEvaluateContextQuality:
     def test_no_results_is_none(self, service):
@@ -100,3 +186,79 @@ class TestEvaluateContextQuality:
     def test_top_score_below_threshold_is_weak(self, service):
         items = [make_item("x", score=0.01)]
         assert service.evaluate_context_quality(items) == "weak"
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed: list[tuple[str, dict]] = []
+
+    async def execute(self, sql, params):
+        self.executed.append((str(sql), params))
+        return SimpleNamespace(fetchall=lambda: self.rows)
+
+
+def make_row(score, lexical, title="Doc", rrf=0.03):
+    return SimpleNamespace(
+        chunk_id=uuid.uuid4(), document_id=uuid.uuid4(), content=f"chunk {score}",
+        score=score, lexical=lexical, rrf=rrf, document_title=title,
+        program=None, faculty=None, metadata=None, simhash=7,
+        term_freqs={"chunk": 1}, term_count=1,
+    )
+
+
+class TestFusedSearch:
+    async def test_vector_and_fulltext_lists_fuse_in_one_statement(self):
+        db = FakeDB([])
+        await RAGService(db)._fused_search(
+            SearchRequest(query="créditos medicina"), "d.program = :program",
+            {"embedding": [0.1, 0.2], "program": "Medicina"}, candidate_k=30, signals={},
+        )
+
+        assert len(db.executed) == 1
+        sql, params = db.executed[0]
+        assert "WITH vec AS" in sql and "fts AS" in sql
+        assert "FULL OUTER JOIN fts" in sql
+        assert "ORDER BY fused.rrf DESC" in sql
+        assert sql.count("d.program = :program") == 2  # filters apply to both lists
+        assert params["top_k"] == 30 and params["query_text"] == "créditos medicina"
+
+    async def test_questions_mode_adds_a_third_list(self):
+        db = FakeDB([])
+        await RAGService(db)._fused_search(
+            SearchRequest(query="q"), "d.program = :program",
+            {"embedding": [0.1], "program": "Medicina"}, candidate_k=30, signals={}, questions=True,
+        )
+
+        sql, params = db.executed[0]
+        assert "qst AS" in sql and "FROM chunk_questions cq" in sql
+        assert "FULL OUTER JOIN qst" in sql and "qst.score >= :threshold" in sql
+        assert sql.count("d.program = :program") == 3
+        assert params["question_k"] > params["top_k"]
+
+    async def test_fused_mode_leaves_questions_out(self):
+        db = FakeDB([])
+        await RAGService(db)._fused_search(
+            SearchRequest(query="q"), "1=1", {"embedding": [0.1]}, candidate_k=30, signals={},
+        )
+
+        sql, params = db.executed[0]
+        assert "chunk_questions" not in sql and "question_k" not in params
+
+    async def test_keeps_rrf_order_and_lifts_lexical_matches_to_threshold(self):
+        rows = [make_row(0.2, lexical=True), make_row(0.6, lexical=False), make_row(0.7, lexical=True)]
+        items = await RAGService(FakeDB(rows))._fused_search(
+            SearchRequest(query="q", score_threshold=0.35), "1=1", {"embedding": [0.1]}, candidate_k=30, signals={},
+        )
+
+        assert [i.score for i in items] == [0.35, 0.6, 0.7]
+
+    async def test_reports_rrf_relative_to_the_best_row_as_relevance(self):
+        rows = [make_row(0.2, lexical=True, rrf=0.032), make_row(0.6, lexical=False, rrf=0.016)]
+        relevance: dict = {}
+        items = await RAGService(FakeDB(rows))._fused_search(
+            SearchRequest(query="q"), "1=1", {"embedding": [0.1]}, candidate_k=30, signals={},
+            relevance=relevance,
+        )
+
+        assert [relevance[i.chunk_id] for i in items] == [1.0, 0.5]
@@ -0,0 +1,46 @@
+from app.utils.simhash import SignatureIndex, distance, signature
+
+RULE = (
+    "El estudiante que obtenga un promedio aritmético ponderado acumulado inferior "
+    "a tres punto cero perderá la calidad de estudiante y no podrá matricularse"
+)
+
+
+class TestSignature:
+    def test_is_stable_and_order_insensitive(self):
+        assert signature(RULE) == signature(RULE)
+        assert signature("créditos del semestre") == signature("semestre Creditos del")
+
+    def test_fits_a_signed_bigint(self):
+        sig = signature(RULE)
+        assert -(1 << 63) <= sig < (1 << 63)
+
+    def test_no_terms_signs_zero(self):
+        assert signature("") == 0
+        assert signature("— a y o —") == 0
+
+    def test_near_duplicates_are_closer_than_unrelated_text(self):
+        edited = RULE.replace("tres punto cero", "3.0")
+        unrelated = "La biblioteca central abre de lunes a sábado entre las siete y las veinte horas"
+        assert distance(signature(RULE), signature(edited)) < distance(signature(RULE), signature(unrelated))
+
+
+class TestDistance:
+    def test_signed_and_unsigned_forms_compare_equal(self):
+        assert distance(-1, (1 << 64) - 1) == 0
+        assert distance(-1, 0) == 64
+        assert distance(0b1010, 0b0110) == 2
+
+
+class TestSignatureIndex:
+    def test_finds_signatures_within_max_bits(self):
+        index = SignatureIndex(max_bits=3)
+        base = signature(RULE)
+        index.add(base)
+
+        assert index.near(base ^ 0b111)
+        assert index.near(base ^ (1 << 63) ^ (1 << 40))  # high bits, signed form
+        assert not index.near(base ^ 0b1111)
+
+    def test_empty_index_finds_nothing(self):
+        assert not SignatureIndex(max_bits=3).near(signature(RULE))
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.utils.single_flight import SingleFlight, coalesce_key, normalize_query
+
+
+class TestCoalesceKey:
+    def test_normalizes_case_accents_and_punctuation(self):
+        assert normalize_query("¿Cuáles son los  requisitos de admisión?") == (
+            "cuales son los requisitos de admision"
+        )
+        assert coalesce_key("¿Cuáles son los requisitos?", top_k=5) == coalesce_key(
+            "cuales son los requisitos", top_k=5
+        )
+
+    def test_params_are_part_of_the_key(self):
+        assert coalesce_key("pensum", filters={"program": "Medicina"}) != coalesce_key(
+            "pensum", filters=None
+        )
+
+
+class TestSingleFlight:
+    async def test_concurrent_callers_share_one_computation(self):
+        flight = SingleFlight("test")
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "respuesta"
+
+        tasks = [asyncio.create_task(flight.do("k", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert calls == 1
+        assert [r for r, _ in results] == ["respuesta"] * 5
+        assert sorted(computed for _, computed in results) == [False] * 4 + [True]
+        assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+    async def test_different_keys_do_not_coalesce(self):
+        flight = SingleFlight("test")
+        results = await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0, result="a")),
+            flight.do("b", lambda: asyncio.sleep(0, result="b")),
+        )
+        assert results == [("a", True), ("b", True)]
+
+    async def test_followers_compute_independently_when_leader_fails(self):
+        flight = SingleFlight("test")
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError("ollama down")
+
+        leader = asyncio.create_task(flight.do("k", failing))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(0, result="ok")))
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(RuntimeError):
+            await leader
+        assert await follower == ("ok", True)
+
+    async def test_leader_cancellation_does_not_cancel_followers(self):
+        flight = SingleFlight("test")
+        leader = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(0, result="ok")))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        assert await follower == ("ok", True)
+
+    async def test_disabled_setting_bypasses_coalescing(self, monkeypatch):
+        monkeypatch.setattr(settings, "single_flight_enabled", False)
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return calls
+
+        await asyncio.gather(flight.do("k", compute), flight.do("k", compute))
+        assert calls == 2
+
+
+class FakeLockRedis:
+    def __init__(self, held: bool):
+        self.held = held
+
+    async def set(self, key, value, nx=False, px=None):
+        if self.held:
+            return None
+        self.held = True
+        return True
+
+    async def exists(self, key):
+        return int(self.held)
+
+    async def eval(self, script, numkeys, key, token):
+        self.held = False
+        return 1
+
+
+class TestCrossWorker:
+    async def test_waits_for_other_workers_result_in_shared_cache(self):
+        flight = SingleFlight("test", poll_interval=0.001)
+        flight.use_redis(FakeLockRedis(held=True))
+        polls = 0
+
+        async def recheck():
+            nonlocal polls
+            polls += 1
+            return "from-other-worker" if polls >= 3 else None
+
+        async def compute():
+            raise AssertionError("must not compute while another worker holds the lock")
+
+        assert await flight.do("k", compute, recheck=recheck) == ("from-other-worker", False)
+
+    async def test_computes_when_other_worker_releases_without_result(self):
+        redis = FakeLockRedis(held=True)
+        flight = SingleFlight("test", poll_interval=0.001)
+        flight.use_redis(redis)
+
+        async def recheck():
+            redis.held = False  # other worker finished but cached nothing
+            return None
+
+        assert await flight.do("k", lambda: asyncio.sleep(0, result="mine"), recheck=recheck) == (
+            "mine", True,
+        )
+
+    async def test_lock_is_released_after_computing(self):
+        redis = FakeLockRedis(held=False)
+        flight = SingleFlight("test")
+        flight.use_redis(redis)
+
+        await flight.do("k", lambda: asyncio.sleep(0, result="x"), recheck=lambda: None)
+        assert redis.held is False
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.utils.tracing import current_trace, record, span, start_trace
+
+
+class TestStageTrace:
+    async def test_spans_accumulate_and_count_repeats(self):
+        trace = start_trace()
+        with span("rag"):
+            await asyncio.sleep(0.01)
+        for _ in range(2):
+            with span("llm_generate"):
+                pass
+        record("llm_first_token", 12.7)
+        trace.flag("speculative", True)
+
+        out = trace.as_dict()
+        assert out["rag_ms"] >= 10
+        assert out["llm_generate_n"] == 2
+        assert "rag_n" not in out
+        assert out["llm_first_token_ms"] == 12
+        assert out["speculative"] is True
+
+    async def test_cancelled_span_is_not_recorded(self):
+        trace = start_trace()
+
+        async def slow():
+            with span("rag"):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert trace.as_dict() == {}
+
+    async def test_failed_span_is_still_recorded(self):
+        trace = start_trace()
+        with pytest.raises(RuntimeError):
+            with span("llm_generate"):
+                raise RuntimeError("ollama down")
+        assert "llm_generate_ms" in trace.as_dict()
+
+    async def test_spawned_tasks_report_to_the_parent_trace(self):
+        trace = start_trace()
+
+        async def child():
+            with span("rag_vector"):
+                await asyncio.sleep(0)
+
+        await asyncio.create_task(child())
+        assert "rag_vector_ms" in trace.as_dict()
+
+    def test_span_without_trace_is_a_noop(self):
+        assert current_trace() is None
+        with span("rag"):
+            pass
+        record("llm_first_token", 5)
@@ -0,0 +1,229 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile as StarletteUploadFile
+
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
+from app.services import document_service as mod
+from app.config import settings
+from app.models.document import Document
+from app.services.document_service import DocumentService, _spool_upload
+
+
+def _upload(data: bytes, size: int | None = None) -> StarletteUploadFile:
+    return StarletteUploadFile(io.BytesIO(data), size=size, filename="acuerdo.pdf")
+
+
+class TestSpoolUpload:
+    async def test_hashes_and_writes_in_blocks(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(mod, "_UPLOAD_READ_BYTES", 1000)
+        data = os.urandom(4500)
+
+        part_path, size, digest = await _spool_upload(_upload(data), str(tmp_path), max_bytes=10_000)
+
+        assert size == 4500
+        assert digest == hashlib.sha256(data).hexdigest()
+        assert open(part_path, "rb").read() == data
+        assert os.path.dirname(part_path) == str(tmp_path)
+
+    async def test_declared_oversize_is_rejected_without_reading(self, tmp_path):
+        file = _upload(b"x" * 100, size=100)
+        assert await _spool_upload(file, str(tmp_path), max_bytes=50) is None
+        assert file.file.tell() == 0
+        assert os.listdir(tmp_path) == []
+
+    async def test_oversize_stops_at_the_limit_and_cleans_up(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(mod, "_UPLOAD_READ_BYTES", 10)
+        file = _upload(b"x" * 1000)  # size unknown, so only counting can catch it
+
+        assert await _spool_upload(file, str(tmp_path), max_bytes=35) is None
+        assert file.file.tell() == 40
+        assert os.listdir(tmp_path) == []
+
+    async def test_read_error_removes_the_partial_file(self, tmp_path):
+        class Broken(StarletteUploadFile):
+            async def read(self, size=-1):
+                raise ConnectionResetError("client went away")
+
+        with pytest.raises(ConnectionResetError):
+            await _spool_upload(Broken(io.BytesIO(), filename="x.pdf"), str(tmp_path), max_bytes=100)
+        assert os.listdir(tmp_path) == []
+
+
+    async def test_open_error_is_not_masked_by_cleanup(self, tmp_path):
+        missing_dir = str(tmp_path / "missing")
+        with pytest.raises(FileNotFoundError) as excinfo:
+            await _spool_upload(_upload(b"data"), missing_dir, max_bytes=100)
+        # The open() failure itself, not a second one from removing the .part file.
+        assert excinfo.value.__context__ is None
+
+
+class TestUploadAndProcess:
+    async def test_duplicate_upload_leaves_nothing_on_disk(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        existing = Document(title="Reglamento", file_name="x.pdf", file_type="pdf")
+
+        class Result:
+            def scalar_one_or_none(self):
+                return existing
+
+        class FakeSession:
+            async def execute(self, stmt):
+                return Result()
+
+        response = await DocumentService(FakeSession()).upload_and_process(_upload(b"%PDF-1.7"), title="Otra")
+
+        assert response.status == "duplicate"
+        assert os.listdir(tmp_path) == []
+
+
+class TestReindexReplacement:
+    @pytest.fixture
+    def doc(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+        doc = Document(title="Reglamento", file_name="old_acuerdo.pdf", file_type="pdf")
+        (tmp_path / doc.file_name).write_bytes(b"old")
+
+        async def get_document(self, document_id):
+            return doc
+
+        async def has_active_job(db, document_id):
+            return False
+
+        monkeypatch.setattr(DocumentService, "get_document", get_document)
+        monkeypatch.setattr(mod.ingestion_queue, "has_active_job", has_active_job)
+        return doc
+
+    @staticmethod
+    def _session(fail_commit=False):
+        class FakeSession:
+            def add(self, obj):
+                pass
+
+            async def commit(self):
+                if fail_commit:
+                    raise ConnectionError("db went away")
+        return FakeSession()
+
+    async def test_old_original_is_removed_after_the_commit(self, doc, tmp_path):
+        response = await DocumentService(self._session()).reindex(doc.id, _upload(b"new"))
+
+        assert response.status == "processing"
+        assert os.listdir(tmp_path) == [doc.file_name]
+        assert (tmp_path / doc.file_name).read_bytes() == b"new"
+
+    async def test_failed_commit_keeps_the_old_original(self, doc, tmp_path):
+        with pytest.raises(ConnectionError):
+            await DocumentService(self._session(fail_commit=True)).reindex(doc.id, _upload(b"new"))
+
+        assert os.listdir(tmp_path) == ["old_acuerdo.pdf"]
+        assert (tmp_path / "old_acuerdo.pdf").read_bytes() == b"old"
+
+
+class TestProcessCacheInvalidation:
+    @pytest.fixture
+    def run(self, monkeypatch):
+        """Run process_document with the index diff replaced by `stats`;
+        returns which caches were flushed or tag-evicted."""
+        import app.database
+
+        doc = Document(title="Reglamento", file_name="acuerdo.pdf", file_type="pdf", program="MEDICINA")
+        calls = []
+
+        class Result:
+            def scalar_one_or_none(self):
+                return doc
+
+        class FakeSession:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, stmt):
+                return Result()
+
+            async def commit(self):
+                pass
+
+        async def invalidate_all():
+            calls.append("all")
+
+        async def invalidate_tags(tags):
+            calls.append(sorted(tags))
+
+        monkeypatch.setattr(app.database, "async_session", FakeSession)
+        monkeypatch.setattr(DocumentService, "_document_chunks", lambda self, *a: iter(()))
+        monkeypatch.setattr(mod.corpus_stats, "mark_stale", lambda: None)
+        for cache in (mod.rag_cache, mod.answer_cache):
+            monkeypatch.setattr(cache, "invalidate_all", invalidate_all)
+            monkeypatch.setattr(cache, "invalidate_tags", invalidate_tags)
+
+        async def run(reindex, **stats):
+            async def index_chunks(self, db, document_id, chunks, report, into):
+                for name, value in stats.items():
+                    setattr(into, name, value)
+
+            monkeypatch.setattr(DocumentService, "_index_chunks", index_chunks)
+            await DocumentService(db=None).process_document(doc.id, reindex=reindex)
+            return calls
+
+        run.doc = doc
+        return run
+
+    async def test_new_upload_flushes_everything(self, run):
+        assert await run(reindex=False, embedded=3) == ["all", "all"]
+
+    async def test_reindex_that_embedded_new_chunks_flushes_everything(self, run):
+        # Unfiltered searches cached without this content carry no tag for it.
+        assert await run(reindex=True, embedded=2, removed=1) == ["all", "all"]
+
+    async def test_reindex_that_only_removed_chunks_evicts_by_tag(self, run):
+        tags = sorted(mod.cache_tags(document_ids=[run.doc.id], programs=["MEDICINA"]))
+        assert await run(reindex=True, removed=2) == [tags, tags]
+
+    async def test_unchanged_reindex_keeps_the_caches(self, run):
+        assert await run(reindex=True, reused=5) == []
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=10_000, path_pattern="/upload")
+    return TestClient(app)
+
+
+class TestUploadSizeLimitMiddleware:
+    def test_within_limit_passes_through(self, client):
+        response = client.post("/upload", files={"file": ("a.pdf", b"x" * 5000)})
+        assert response.status_code == 200
+        assert response.json() == {"size": 5000}
+
+    def test_declared_length_over_limit_is_rejected_up_front(self, client):
+        response = client.post("/upload", files={"file": ("a.pdf", b"x" * 20_000)})
+        assert response.status_code == 413
+        assert "demasiado grande" in response.json()["detail"]
+
+    def test_undeclared_length_is_counted_as_it_arrives(self, client):
+        def body():
+            for _ in range(30):
+                yield b"x" * 1000
+
+        response = client.post(
+            "/upload", content=body(),
+            headers={"content-type": "multipart/form-data; boundary=abc"},
+        )
+        assert response.status_code == 413
+
+    def test_other_routes_are_not_limited(self, client):
+        assert client.post("/other", content=b"x" * 20_000).status_code == 404
@@ -177,7 +177,14 @@ export default function DocumentsPage() {
       for (const doc of data) {
         const prev = lastStatusRef.current.get(doc.id);
         if (prev === "processing" && doc.ingestion_status === "completed") {
-          toast.success(`"${doc.title}" procesado correctamente (${doc.total_chunks} chunks)`);
+          apiClient.getDocumentJob(doc.id)
+            .then(({ result }) => {
+              const detail = result && result.reused > 0
+                ? `${result.chunks} chunks: ${result.reused} reutilizados, ${result.embedded} recalculados`
+                : `${doc.total_chunks} chunks`;
+              toast.success(`"${doc.title}" procesado correctamente (${detail})`);
+            })
+            .catch(() => toast.success(`"${doc.title}" procesado correctamente (${doc.total_chunks} chunks)`));
         } else if (prev === "processing" && doc.ingestion_status === "failed") {
           toast.error(`Error procesando "${doc.title}". Revisa el documento o intenta reindexar.`);
         }
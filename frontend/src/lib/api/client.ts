@@ -347,6 +347,14 @@ export const apiClient = {
       { method: "POST" }
     ),
 
+  // Latest ingestion job; `result` (set once completed) says how many chunks
+  // a reindex kept vs. re-embedded.
+  getDocumentJob: (id: string) =>
+    request<{
+      status: string; stage: string | null; progress: number; last_error: string | null;
+      result: { chunks: number; reused: number; embedded: number; removed: number; summary_reused: boolean } | null;
+    }>(`/api/v1/documents/${id}/job`),
+
   // ── Taxonomy (Admin) ──
   getFaculties: () =>
     request<Array<{ id: string; name: string; created_at: string }>>("/api/v1/taxonomy/faculties"),